@@ -10,6 +10,7 @@ import openpyxl
 from datetime import datetime
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
+from booking_parser import parse_booking_card
 
 # Dictionary of properties and their hotel IDs
 PROPERTIES = {
@@ -154,55 +155,7 @@ def fetch_and_display_bookings(driver, wait, hotel_id):
 
 def extract_booking_data_from_text(text, hotel_id):
     """Extract booking information including room number and type from text."""
-    booking_data = {
-        'name': None,
-        'booking_id': None,
-        'phone': None,
-        'booking_period': None,
-        'booking_source': None,
-        'total_without_taxes': None,
-        'total_tax_amount': None,
-        'total_with_taxes': None,
-        'payment_made': None,
-        'balance_due': None,
-        'room_number': 'N/A',
-        'room_type': 'N/A',
-        'rate_plan': 'N/A',
-        'adults_children_infant': 'N/A'
-    }
-
-    lines = text.split('\n')
-
-    if lines and not re.search(r'SFBOOKING|Rs\.|CONFIRMED|ON_HOLD|Mar| - |[0-9]', lines[0]):
-        booking_data['name'] = lines[0].strip()
-
-    booking_id_match = re.search(rf'SFBOOKING_{hotel_id}_\d+', text)
-    if booking_id_match:
-        booking_data['booking_id'] = booking_id_match.group(0)
-
-    for line in lines:
-        line = line.strip()
-        if re.match(r'NA|(\+\d{1,3}\s*)?[\d\s()-]{8,}', line):
-            booking_data['phone'] = line
-            break
-
-    date_pattern = r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2},\s+\d{4}\s+\d{1,2}:\d{2}\s+(?:AM|PM)\s+-\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2},\s+\d{4}\s+\d{1,2}:\d{2}\s+(?:AM|PM)'
-    date_match = re.search(date_pattern, text)
-    if date_match:
-        booking_data['booking_period'] = date_match.group(0)
-    else:
-        for i in range(len(lines) - 1):
-            if " - " in lines[i] and re.search(r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)', lines[i]):
-                booking_data['booking_period'] = f"{lines[i].strip()} - {lines[i+1].strip()}"
-                break
-
-    room_pattern = r'(\d+)\s*\(\s*([^)]+)\s*\)'
-    room_match = re.search(room_pattern, text)
-    if room_match:
-        booking_data['room_number'] = room_match.group(1).strip()
-        booking_data['room_type'] = room_match.group(2).strip()
-
-    return booking_data
+    return parse_booking_card(text, hotel_id)
 
 def fetch_folio_details(driver, wait, booking, hotel_id):
     """Navigate to the folio page and fetch financial details, Rate Plan, and Adults/Children/Infant."""
@@ -1,8 +1,10 @@
 import streamlit as st
 import os
 from supabase import create_client, Client
+from config import METRICS_HOST, METRICS_PORT, METRICS_FILE
+from metrics import start_metrics_exporter
 try:
-    from directreservation import show_new_reservation_form, show_reservations, show_edit_reservations, show_analytics, load_reservations_from_supabase
+    from directreservation import show_new_reservation_form, show_reservations, show_edit_reservations, show_analytics
     from online_reservation import show_online_reservations
 except ImportError as e:
     st.error(f"❌ Import error: {e}. Please ensure directreservation.py and online_reservation.py are in the repository.")
@@ -39,14 +41,8 @@ def check_authentication():
                 st.session_state.reservations = []
                 st.session_state.edit_mode = False
                 st.session_state.edit_index = None
-                try:
-                    st.session_state.reservations = load_reservations_from_supabase()
-                    if st.session_state.reservations:
-                        st.success("✅ Management login successful! Reservations fetched.")
-                    else:
-                        st.warning("✅ Management login successful! No reservations found.")
-                except Exception as e:
-                    st.error(f"❌ Error fetching reservations: {e}")
+                # Reservations are loaded lazily, page by page, by the views that need them
+                st.success("✅ Management login successful!")
                 st.rerun()
             elif role == "ReservationTeam" and password == "TIE123":
                 st.session_state.authenticated = True
@@ -54,20 +50,15 @@ def check_authentication():
                 st.session_state.reservations = []
                 st.session_state.edit_mode = False
                 st.session_state.edit_index = None
-                try:
-                    st.session_state.reservations = load_reservations_from_supabase()
-                    if st.session_state.reservations:
-                        st.success("✅ Agent login successful! Reservations fetched.")
-                    else:
-                        st.warning("✅ Agent login successful! No reservations found.")
-                except Exception as e:
-                    st.error(f"❌ Error fetching reservations: {e}")
+                st.success("✅ Agent login successful!")
                 st.rerun()
             else:
                 st.error("❌ Invalid password. Please try again.")
         st.stop()
 
 def main():
+    # Started once per process; later script reruns are no-ops
+    start_metrics_exporter(METRICS_PORT, METRICS_FILE, METRICS_HOST)
     check_authentication()
     st.title("🏢 TIE Reservations")
     st.markdown("---")
@@ -0,0 +1,112 @@
+"""Micro-benchmark: compiled booking card parser vs. the previous per-call regex implementation.
+
+Run from the repository root:  python benchmarks/bench_booking_parser.py [--rounds N]
+Both parsers must agree on every card of the corpus; the script exits non-zero if they do not.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from booking_parser import parse_booking_card  # noqa: E402
+
+CORPUS_PATH = os.path.join(ROOT, "benchmarks", "corpus", "booking_cards.json")
+
+def legacy_parse(text, hotel_id):
+    """The card parser as it was before booking_parser (text-based source detection included)."""
+    booking_data = {
+        'name': None, 'booking_id': None, 'phone': None, 'booking_period': None, 'booking_source': None,
+        'total_without_taxes': None, 'total_tax_amount': None, 'total_with_taxes': None, 'payment_made': None,
+        'balance_due': None, 'room_number': 'N/A', 'room_type': 'N/A', 'rate_plan': 'N/A', 'adults_children_infant': 'N/A'
+    }
+    lines = text.split('\n')
+    text_upper = text.upper()
+    ota_patterns = {
+        'BOOKING.COM': ['BOOKING.COM', 'BOOKING COM', 'BOOKINGCOM', 'BOOKING DOT COM', 'BOOKING_COM'],
+        'AGODA': ['AGODA'],
+        'EXPEDIA': ['EXPEDIA', 'EXPEDIA.COM'],
+        'MAKEMYTRIP': ['MAKEMYTRIP', 'MAKE MY TRIP', 'MMT'],
+        'GOIBIBO': ['GOIBIBO'],
+        'CLEARTRIP': ['CLEARTRIP', 'CLEAR TRIP'],
+        'TRAVELOKA': ['TRAVELOKA'],
+        'AIRBNB': ['AIRBNB'],
+        'HOTELS.COM': ['HOTELS.COM', 'HOTELS COM'],
+        'PRICELINE': ['PRICELINE']
+    }
+    source_found = False
+    for ota_name, patterns in ota_patterns.items():
+        if any(pattern in text_upper for pattern in patterns):
+            booking_data['booking_source'] = ota_name
+            source_found = True
+            break
+    if not source_found:
+        if any(indicator in text_upper for indicator in ['COMMISSION', 'BOOKING REFERENCE', 'CONFIRMATION CODE', 'CHANNEL', 'PARTNER']):
+            booking_data['booking_source'] = 'UNKNOWN_OTA'
+        elif any(indicator in text_upper for indicator in ['ONLINE', 'WEB', 'INTERNET', 'EMAIL', 'CONFIRMED']):
+            booking_data['booking_source'] = 'POSSIBLE_OTA'
+    if lines and not re.search(r'SFBOOKING|Rs\.|CONFIRMED|ON_HOLD|Mar| - |[0-9]', lines[0]):
+        booking_data['name'] = lines[0].strip()
+    booking_id_match = re.search(rf'SFBOOKING_{hotel_id}_\d+', text)
+    if booking_id_match:
+        booking_data['booking_id'] = booking_id_match.group(0)
+    for line in lines:
+        line = line.strip()
+        if re.match(r'NA|(\+\d{1,3}\s*)?[\d\s()-]{8,}', line):
+            booking_data['phone'] = line
+            break
+    date_pattern = r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2},\s+\d{4}\s+\d{1,2}:\d{2}\s+(?:AM|PM)\s+-\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2},\s+\d{4}\s+\d{1,2}:\d{2}\s+(?:AM|PM)'
+    date_match = re.search(date_pattern, text)
+    if date_match:
+        booking_data['booking_period'] = date_match.group(0)
+    else:
+        for i in range(len(lines) - 1):
+            if " - " in lines[i] and re.search(r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)', lines[i]):
+                booking_data['booking_period'] = f"{lines[i].strip()} - {lines[i+1].strip()}"
+                break
+    room_match = re.search(r'(\d+)\s*\(\s*([^)]+)\s*\)', text)
+    if room_match:
+        booking_data['room_number'] = room_match.group(1).strip()
+        booking_data['room_type'] = room_match.group(2).strip()
+    return booking_data
+
+def time_parser(parse, cards, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for card in cards:
+            parse(card["text"], card["hotel_id"])
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        cards = json.load(f)["cards"]
+
+    def compiled(text, hotel):
+        return parse_booking_card(text, hotel, detect_source=True)
+
+    mismatches = [card for card in cards if compiled(card["text"], card["hotel_id"]) != legacy_parse(card["text"], card["hotel_id"])]
+    if mismatches:
+        print(f"Parsers disagree on {len(mismatches)} cards")
+        for card in mismatches:
+            print(f"  legacy:   {legacy_parse(card['text'], card['hotel_id'])}")
+            print(f"  compiled: {compiled(card['text'], card['hotel_id'])}")
+        return 1
+
+    total = len(cards) * args.rounds
+    legacy_seconds = time_parser(legacy_parse, cards, args.rounds)
+    compiled_seconds = time_parser(compiled, cards, args.rounds)
+    print(f"{len(cards)} cards x {args.rounds} rounds")
+    print(f"legacy:   {total / legacy_seconds:,.0f} cards/s")
+    print(f"compiled: {total / compiled_seconds:,.0f} cards/s ({legacy_seconds / compiled_seconds:.2f}x)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+"""Golden-corpus regression benchmark for the scraping parsers.
+
+Replays the saved snapshots in benchmarks/golden through the parsers offline, reports throughput
+and per-field accuracy, and exits non-zero when accuracy falls below benchmarks/golden/baseline.json,
+a section could not run, or a section ran without a baseline entry to check it against.
+
+Run from the repository root:
+    python benchmarks/bench_golden.py                    # check against the baseline
+    python benchmarks/bench_golden.py --allow-skip       # same, tolerating skipped sections and sections without a baseline
+    python benchmarks/bench_golden.py --update-baseline  # accept the current accuracy as the baseline
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from booking_parser import parse_booking_card, parse_folio_lines  # noqa: E402
+
+GOLDEN_DIR = os.path.join(ROOT, "benchmarks", "golden")
+CARDS_PATH = os.path.join(ROOT, "benchmarks", "corpus", "booking_cards.json")  # Shared with bench_booking_parser.py
+BASELINE_PATH = os.path.join(GOLDEN_DIR, "baseline.json")
+BROWSER_ROUNDS = 5  # Every browser pass reloads each page, so fewer timed passes are enough
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class _TextLines(HTMLParser):
+    """Visible text of an HTML document, one line per text node (close to what innerText yields)."""
+
+    SKIP_TAGS = ("script", "style", "noscript", "head")
+
+    def __init__(self):
+        super().__init__()
+        self.lines: List[str] = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.lines.extend(line.strip() for line in data.split("\n") if line.strip())
+
+class SectionSkipped(Exception):
+    """A section cannot run in this environment (e.g. no headless browser)."""
+
+def html_text_lines(html: str) -> List[str]:
+    parser = _TextLines()
+    parser.feed(html)
+    parser.close()
+    return parser.lines
+
+class ReplayDriver:
+    """Stands in for a Selenium driver: every script call returns the elements captured from a live page."""
+
+    def __init__(self, elements: List[Dict[str, str]]):
+        self.elements = elements
+
+    def execute_script(self, script, *args):
+        return self.elements
+
+def load_json(name: str) -> Dict:
+    with open(os.path.join(GOLDEN_DIR, name), encoding="utf-8") as f:
+        return json.load(f)
+
+def score(cases: List[Tuple[object, Dict]], parse: Callable[[object], Dict], rounds: int) -> Dict:
+    """Run parse over every case for accuracy, then rounds more times for throughput."""
+    hits: Dict[str, int] = {}
+    totals: Dict[str, int] = {}
+    failures = []
+    for case, expected in cases:
+        actual = parse(case)
+        for field, value in expected.items():
+            totals[field] = totals.get(field, 0) + 1
+            if actual.get(field) == value:
+                hits[field] = hits.get(field, 0) + 1
+            else:
+                failures.append(f"{expected.get('booking_id') or actual.get('booking_id') or '?'} {field}: expected {value!r}, got {actual.get(field)!r}")
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for case, _ in cases:
+            parse(case)
+    elapsed = time.perf_counter() - start
+    return {
+        "accuracy": {field: round(hits.get(field, 0) / totals[field], 4) for field in totals},
+        "per_second": round(len(cases) * rounds / elapsed) if elapsed else 0,
+        "failures": failures
+    }
+
+def bench_cards(rounds: int) -> Dict:
+    with open(CARDS_PATH, encoding="utf-8") as f:
+        cards = json.load(f)["cards"]
+    # Cards without expected values are only there for the parser micro-benchmark
+    cases = [((card["text"], card["hotel_id"]), card["expected"]) for card in cards if "expected" in card]
+    return score(cases, lambda case: parse_booking_card(case[0], case[1], detect_source=True), rounds)
+
+def load_folio_files() -> List[Tuple[str, Dict]]:
+    return [(os.path.join(GOLDEN_DIR, folio["file"]), folio["expected"]) for folio in load_json("folios.json")["folios"]]
+
+def load_folio_cases() -> List[Tuple[str, Dict]]:
+    cases = []
+    for path, expected in load_folio_files():
+        with open(path, encoding="utf-8") as f:
+            cases.append((f.read(), expected))
+    return cases
+
+def bench_folio_lines(rounds: int) -> Dict:
+    """booking_parser.parse_folio_lines on the folio's text lines, without the HTML parser of the HTTP path."""
+    return score(load_folio_cases(), lambda html: parse_folio_lines(html_text_lines(html)), rounds)
+
+def bench_folio_http(rounds: int) -> Dict:
+    """The HTTP path: folio_http.parse_folio_html on the raw page."""
+    from folio_http import parse_folio_html
+    return score(load_folio_cases(), parse_folio_html, rounds)
+
+def bench_folio_script(rounds: int) -> Dict:
+    """The browser path: folio_extract.FOLIO_EXTRACT_JS in headless Chrome, counting only the values it trusts."""
+    from selenium import webdriver
+    from booking_parser import FINANCIAL_LABELS
+    from folio_extract import FOLIO_EXTRACT_JS, FOLIO_OTA_PATTERNS, trusted_values
+
+    options = webdriver.ChromeOptions()
+    for argument in ("--headless=new", "--no-sandbox", "--disable-dev-shm-usage"):
+        options.add_argument(argument)
+    try:
+        driver = webdriver.Chrome(options=options)
+    except Exception as e:
+        raise SectionSkipped(f"no headless Chrome: {str(e).strip().splitlines()[0]}") from e
+
+    def parse(url: str) -> Dict:
+        driver.get(url)
+        return trusted_values(driver.execute_script(FOLIO_EXTRACT_JS, FINANCIAL_LABELS, FOLIO_OTA_PATTERNS) or {})
+
+    try:
+        cases = [(f"file://{path}", expected) for path, expected in load_folio_files()]
+        return score(cases, parse, min(rounds, BROWSER_ROUNDS))
+    finally:
+        driver.quit()
+
+def bench_pages(rounds: int) -> Dict:
+    """online_reservation.match_patterns_on_page against replayed page elements."""
+    from online_reservation import match_patterns_on_page
+
+    def parse(page: Dict) -> Dict:
+        found = [booking["booking_id"] for booking in match_patterns_on_page(ReplayDriver(page["elements"]), page["hotel_id"])]
+        return {"booking_ids": found}
+
+    cases = [(page, {"booking_ids": page["expected_booking_ids"]}) for page in load_json("pages.json")["pages"]]
+    return score(cases, parse, rounds)
+
+SECTIONS = {
+    "cards": bench_cards,
+    "folio_lines": bench_folio_lines,
+    "folio_http": bench_folio_http,
+    "folio_script": bench_folio_script,
+    "pages": bench_pages
+}
+
+def run_sections(rounds: int) -> Dict[str, Optional[Dict]]:
+    """Results per section; None for sections that cannot run in this environment."""
+    results = {}
+    for name, bench in SECTIONS.items():
+        try:
+            results[name] = bench(rounds)
+        except (ImportError, SectionSkipped) as e:
+            logger.warning(f"{name}: skipped ({e})")
+            results[name] = None
+    return results
+
+def regressions(results: Dict[str, Optional[Dict]], baseline: Dict, min_per_second: Dict[str, int]) -> List[str]:
+    problems = []
+    for name, expected_accuracy in baseline.get("accuracy", {}).items():
+        result = results.get(name)
+        if result is None:
+            continue
+        for field, floor in expected_accuracy.items():
+            actual = result["accuracy"].get(field, 0.0)
+            if actual < floor:
+                problems.append(f"{name}.{field} accuracy {actual:.2%} is below the baseline {floor:.2%}")
+    for name, floor in min_per_second.items():
+        result = results.get(name)
+        if result is not None and result["per_second"] < floor:
+            problems.append(f"{name} throughput {result['per_second']:,}/s is below {floor:,}/s")
+    return problems
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Golden-corpus regression benchmark for the scraping parsers")
+    parser.add_argument("--rounds", type=int, default=200, help="Timed passes over each corpus")
+    parser.add_argument("--update-baseline", action="store_true", help="Store the current accuracy as the new baseline")
+    parser.add_argument("--min-per-second", action="append", default=[], metavar="SECTION=N",
+                        help="Fail when a section parses fewer than N items per second (repeatable)")
+    parser.add_argument("--allow-skip", action="store_true", help="Do not fail when a section cannot run here or has no baseline")
+    parser.add_argument("--verbose", action="store_true", help="List every field mismatch")
+    args = parser.parse_args()
+
+    results = run_sections(args.rounds)
+    for name, result in results.items():
+        if result is None:
+            print(f"{name}: skipped")
+            continue
+        accuracy = ", ".join(f"{field} {value:.0%}" for field, value in result["accuracy"].items())
+        print(f"{name}: {result['per_second']:,}/s | {accuracy}")
+        if args.verbose:
+            for failure in result["failures"]:
+                print(f"    {failure}")
+
+    if args.update_baseline:
+        baseline = {"accuracy": {name: result["accuracy"] for name, result in results.items() if result is not None}}
+        if os.path.exists(BASELINE_PATH):
+            with open(BASELINE_PATH, encoding="utf-8") as f:
+                previous = json.load(f).get("accuracy", {})
+            # Keep the stored floors of sections that could not run here
+            baseline["accuracy"] = {**{name: value for name, value in previous.items() if results.get(name) is None}, **baseline["accuracy"]}
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {BASELINE_PATH}")
+        return 0
+
+    if not os.path.exists(BASELINE_PATH):
+        print("No baseline yet; run with --update-baseline to create one")
+        return 1
+    with open(BASELINE_PATH, encoding="utf-8") as f:
+        baseline = json.load(f)
+    min_per_second = {}
+    for item in args.min_per_second:
+        name, _, value = item.partition("=")
+        min_per_second[name] = int(value)
+
+    problems = regressions(results, baseline, min_per_second)
+    for problem in problems:
+        print(f"REGRESSION: {problem}")
+    skipped = [name for name, result in results.items() if result is None]
+    ungated = [name for name, result in results.items() if result is not None and name not in baseline.get("accuracy", {})]
+    if not args.allow_skip:
+        if skipped:
+            print(f"SKIPPED: {', '.join(skipped)} did not run; install their dependencies or pass --allow-skip")
+        if ungated:
+            print(f"NO BASELINE: {', '.join(ungated)} ran without a floor; record one with --update-baseline or pass --allow-skip")
+    return 1 if problems or (not args.allow_skip and (skipped or ungated)) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
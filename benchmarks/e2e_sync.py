@@ -0,0 +1,123 @@
+"""End-to-end sync benchmark against the local Stayflexi and PostgREST stand-ins.
+
+Starts benchmarks/mock_stayflexi.py and benchmarks/mock_postgrest.py in-process, points the app at
+them through STAYFLEXI_BASE_URL and SUPABASE_URL, and runs the real fetch_for_property path
+(login, reservations list, folios, writes to 'otabooking') for each property. Reports the sync
+time per property, the rows written and the page wait timings, for each worker count requested.
+
+Run from the repository root with Chromium and the app's dependencies installed:
+    python benchmarks/e2e_sync.py --bookings 40 --latency-ms 50 --workers 1,2,4
+    python benchmarks/e2e_sync.py --set FOLIO_TABS=1
+    python benchmarks/e2e_sync.py --set "FOLIO_API_URL={base}/folio/{booking_id}?hotelId={hotel_id}"
+
+Settings read at import time (FOLIO_TABS, PAGE_QUIET_MS, BROWSER_PROFILE, ...) are passed with
+--set; compare them across separate runs. {base} in a value stands for the mock's URL, and as the
+mock serves server-rendered folios the FOLIO_API_URL example exercises the HTTP fast path.
+Login uses st.secrets["stayflexi"], so .streamlit/secrets.toml needs a [stayflexi] section; the
+mock accepts any email and password.
+"""
+import argparse
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARKS_DIR = os.path.join(ROOT, "benchmarks")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from mock_postgrest import SqliteRestStore, start_server as start_postgrest  # noqa: E402
+from mock_stayflexi import MockStayflexi, start_server as start_stayflexi  # noqa: E402
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="End-to-end sync benchmark against local Stayflexi and PostgREST stand-ins")
+    parser.add_argument("--properties", default="Villa Shakti,EdenBeachResort", help="Comma-separated property names from config.PROPERTIES")
+    parser.add_argument("--bookings", type=int, default=20, help="Bookings per property served by the mock")
+    parser.add_argument("--page-size", type=int, default=20, help="Booking cards per reservations list page")
+    parser.add_argument("--latency-ms", type=int, default=0, help="Delay added to every mock Stayflexi request")
+    parser.add_argument("--db-latency-ms", type=int, default=0, help="Delay added to every mock PostgREST request")
+    parser.add_argument("--workers", default="1", help="Comma-separated worker counts to compare")
+    parser.add_argument("--runs", type=int, default=1, help="Syncs per worker count; runs after the first are incremental")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="Environment setting for the app (repeatable)")
+    return parser.parse_args()
+
+def configure_environment(args: argparse.Namespace, stayflexi_url: str, postgrest_url: str, state_dir: str) -> None:
+    """Point the app at the stand-ins; must run before any app module is imported."""
+    os.environ["STAYFLEXI_BASE_URL"] = stayflexi_url
+    os.environ["SUPABASE_URL"] = postgrest_url
+    os.environ["SYNC_STATE_DIR"] = state_dir
+    os.environ["SYNC_JOBS_DB"] = os.path.join(state_dir, "sync_jobs.db")
+    os.environ.setdefault("DRIVER_POOL_SIZE", str(max(int(w) for w in args.workers.split(","))))
+    for item in args.set:
+        key, _, value = item.partition("=")
+        os.environ[key.strip()] = value.strip().replace("{base}", stayflexi_url)
+
+def print_report(workers: int, run: int, results: Dict[str, Dict], wall: float, rows: int, timings: Dict[str, Dict[str, float]]) -> None:
+    print(f"\n=== workers={workers} run={run}: {wall:.1f}s wall, {rows} rows in otabooking ===")
+    for name, result in results.items():
+        summary = result.get("summary") or {}
+        print(f"  {name:<24} {result['status']:<10} {result.get('elapsed', 0):>7.1f}s  "
+              f"stored {summary.get('stored', 0)}, updated {summary.get('updated', 0)}, skipped {summary.get('skipped', 0)}, errors {summary.get('errors', 0)}"
+              + (f"  ({result['error']})" if result.get("error") else ""))
+    if timings:
+        print("  page waits (count / total s / max s):")
+        for step, timing in sorted(timings.items(), key=lambda item: -item[1]["total"]):
+            print(f"    {step:<24} {timing['count']:>5} {timing['total']:>9.2f} {timing['max']:>7.2f}")
+
+def main() -> int:
+    args = parse_args()
+    state_dir = tempfile.mkdtemp(prefix="e2e_sync_state_")
+    store = SqliteRestStore()
+    postgrest = start_postgrest(store, latency_ms=args.db_latency_ms)
+
+    # The mock needs the hotel IDs before its URL can be put into the environment config reads
+    import config
+    names: List[str] = [name.strip() for name in args.properties.split(",") if name.strip()]
+    unknown = [name for name in names if name not in config.PROPERTIES]
+    if unknown:
+        print(f"Unknown properties: {', '.join(unknown)}")
+        return 1
+    properties = {name: config.PROPERTIES[name] for name in names}
+
+    site = MockStayflexi(list(properties.values()), args.bookings, args.page_size, args.latency_ms)
+    stayflexi = start_stayflexi(site)
+    configure_environment(args, f"http://127.0.0.1:{stayflexi.server_address[1]}",
+                          f"http://127.0.0.1:{postgrest.server_address[1]}", state_dir)
+    importlib.reload(config)
+
+    import streamlit as st
+    from online_reservation import fetch_for_property
+    from page_waits import get_wait_timings, reset_wait_timings
+    from sync_engine import run_parallel_sync
+
+    try:
+        if "stayflexi" not in st.secrets:
+            raise KeyError("stayflexi")
+    except Exception:
+        print("Add a [stayflexi] section with any email and password to .streamlit/secrets.toml; the mock accepts any login.")
+        return 1
+
+    try:
+        for workers in [int(w) for w in args.workers.split(",")]:
+            # Every worker count starts from an empty table and no sync state
+            store.delete("otabooking", [])
+            shutil.rmtree(state_dir, ignore_errors=True)
+            os.makedirs(state_dir, exist_ok=True)
+            for run in range(1, args.runs + 1):
+                reset_wait_timings()
+                start = time.monotonic()
+                results = run_parallel_sync(properties, fetch_for_property, max_workers=workers)
+                print_report(workers, run, results, time.monotonic() - start, len(store.rows("otabooking")), get_wait_timings())
+        print(f"\nMock Stayflexi requests: {site.requests}")
+    finally:
+        stayflexi.shutdown()
+        postgrest.shutdown()
+        shutil.rmtree(state_dir, ignore_errors=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
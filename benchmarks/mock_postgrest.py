@@ -0,0 +1,235 @@
+"""Local PostgREST stand-in backed by SQLite, for running the sync without the live Supabase project.
+
+Implements the slice of the PostgREST API that supabase-py uses for the 'otabooking' writes:
+select with eq/in filters, insert, upsert (on_conflict with ignore or merge of duplicates), update
+and delete. Rows are stored as JSON documents keyed by each table's unique column.
+
+Run standalone:  python benchmarks/mock_postgrest.py --port 8766 --db /tmp/mock_supabase.db
+then start the app with SUPABASE_URL=http://127.0.0.1:8766.
+"""
+import argparse
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlparse
+
+# Unique column of each table; inserts hitting an existing value conflict, as with the real constraints
+UNIQUE_COLUMNS = {
+    "otabooking": "booking_id"
+}
+
+# Query parameters that are options rather than column filters
+RESERVED_PARAMS = ("select", "on_conflict", "columns", "limit", "offset", "order")
+
+# Set up logging for debugging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class SqliteRestStore:
+    """Tables of JSON rows in one SQLite file, safe to share between server threads."""
+
+    def __init__(self, path: str = ":memory:"):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+
+    def _table(self, table: str) -> str:
+        with self._lock:
+            self._conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" (key TEXT PRIMARY KEY, data TEXT NOT NULL)')
+        return table
+
+    def rows(self, table: str) -> List[Dict]:
+        table = self._table(table)
+        with self._lock:
+            return [json.loads(data) for (data,) in self._conn.execute(f'SELECT data FROM "{table}" ORDER BY rowid')]
+
+    def select(self, table: str, filters: List[Tuple[str, str]]) -> List[Dict]:
+        return [row for row in self.rows(table) if matches(row, filters)]
+
+    def insert(self, table: str, rows: List[Dict], resolution: Optional[str] = None, on_conflict: Optional[str] = None) -> List[Dict]:
+        """Insert rows; resolution is None (conflicts fail), 'ignore-duplicates' or 'merge-duplicates'."""
+        table = self._table(table)
+        key_column = on_conflict or UNIQUE_COLUMNS.get(table)
+        written = []
+        with self._lock, self._conn:
+            for row in rows:
+                key = str(row.get(key_column)) if key_column and row.get(key_column) is not None else uuid.uuid4().hex
+                existing = self._conn.execute(f'SELECT data FROM "{table}" WHERE key = ?', (key,)).fetchone()
+                if existing is None:
+                    self._conn.execute(f'INSERT INTO "{table}" (key, data) VALUES (?, ?)', (key, json.dumps(row)))
+                    written.append(row)
+                elif resolution == "merge-duplicates":
+                    merged = dict(json.loads(existing[0]), **row)
+                    self._conn.execute(f'UPDATE "{table}" SET data = ? WHERE key = ?', (json.dumps(merged), key))
+                    written.append(merged)
+                elif resolution != "ignore-duplicates":
+                    raise ValueError(f'duplicate key value violates unique constraint "{table}_{key_column}_key"')
+        return written
+
+    def update(self, table: str, filters: List[Tuple[str, str]], values: Dict) -> List[Dict]:
+        table = self._table(table)
+        updated = []
+        with self._lock, self._conn:
+            for key, data in self._conn.execute(f'SELECT key, data FROM "{table}"').fetchall():
+                row = json.loads(data)
+                if matches(row, filters):
+                    row.update(values)
+                    self._conn.execute(f'UPDATE "{table}" SET data = ? WHERE key = ?', (json.dumps(row), key))
+                    updated.append(row)
+        return updated
+
+    def delete(self, table: str, filters: List[Tuple[str, str]]) -> List[Dict]:
+        table = self._table(table)
+        deleted = []
+        with self._lock, self._conn:
+            for key, data in self._conn.execute(f'SELECT key, data FROM "{table}"').fetchall():
+                row = json.loads(data)
+                if matches(row, filters):
+                    self._conn.execute(f'DELETE FROM "{table}" WHERE key = ?', (key,))
+                    deleted.append(row)
+        return deleted
+
+def _as_text(value) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+def matches(row: Dict, filters: List[Tuple[str, str]]) -> bool:
+    """Apply PostgREST column filters such as ('property', 'eq.Villa Shakti') or ('booking_id', 'in.(a,b)')."""
+    for column, expression in filters:
+        operator, _, operand = expression.partition(".")
+        value = _as_text(row.get(column))
+        if operator == "eq" and value != operand:
+            return False
+        if operator == "neq" and value == operand:
+            return False
+        if operator == "in" and value not in [item.strip().strip('"') for item in operand.strip("()").split(",")]:
+            return False
+        if operator == "is" and value != operand:
+            return False
+    return True
+
+def project(rows: List[Dict], select: Optional[str]) -> List[Dict]:
+    if not select or select.strip() == "*":
+        return rows
+    columns = [column.strip() for column in select.split(",") if column.strip()]
+    return [{column: row.get(column) for column in columns} for row in rows]
+
+def make_handler(store: SqliteRestStore, latency: float = 0.0):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            logger.debug(f"{self.address_string()} {format % args}")
+
+        def _send_json(self, status: int, data) -> None:
+            body = json.dumps(data).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _parse(self) -> Optional[Tuple[str, Dict[str, str], List[Tuple[str, str]]]]:
+            if latency:
+                time.sleep(latency)
+            url = urlparse(self.path)
+            if not url.path.startswith("/rest/v1/"):
+                self._send_json(404, {"message": f"Unknown path {url.path}"})
+                return None
+            params = parse_qsl(url.query, keep_blank_values=True)
+            options = {name: value for name, value in params if name in RESERVED_PARAMS}
+            filters = [(name, value) for name, value in params if name not in RESERVED_PARAMS]
+            return url.path[len("/rest/v1/"):].strip("/"), options, filters
+
+        def _body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"null")
+
+        def _prefer(self) -> Dict[str, str]:
+            prefer = {}
+            for item in (self.headers.get("Prefer") or "").split(","):
+                name, _, value = item.strip().partition("=")
+                if name:
+                    prefer[name] = value
+            return prefer
+
+        def _respond_rows(self, status: int, rows: List[Dict], options: Dict[str, str]) -> None:
+            if self._prefer().get("return") == "minimal":
+                self.send_response(status if status != 200 else 204)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self._send_json(status, project(rows, options.get("select")))
+
+        def do_GET(self):
+            parsed = self._parse()
+            if parsed is None:
+                return
+            table, options, filters = parsed
+            rows = store.select(table, filters)
+            offset = int(options.get("offset") or 0)
+            if options.get("limit"):
+                rows = rows[offset:offset + int(options["limit"])]
+            elif offset:
+                rows = rows[offset:]
+            self._send_json(200, project(rows, options.get("select")))
+
+        def do_POST(self):
+            parsed = self._parse()
+            if parsed is None:
+                return
+            table, options, _ = parsed
+            body = self._body()
+            rows = body if isinstance(body, list) else [body]
+            try:
+                written = store.insert(table, rows, self._prefer().get("resolution"), options.get("on_conflict"))
+            except ValueError as e:
+                return self._send_json(409, {"code": "23505", "message": str(e), "details": None, "hint": None})
+            self._respond_rows(201, written, options)
+
+        def do_PATCH(self):
+            parsed = self._parse()
+            if parsed is None:
+                return
+            table, options, filters = parsed
+            self._respond_rows(200, store.update(table, filters, self._body() or {}), options)
+
+        def do_DELETE(self):
+            parsed = self._parse()
+            if parsed is None:
+                return
+            table, options, filters = parsed
+            self._respond_rows(200, store.delete(table, filters), options)
+
+    return Handler
+
+def start_server(store: SqliteRestStore, host: str = "127.0.0.1", port: int = 0, latency_ms: int = 0) -> ThreadingHTTPServer:
+    """Serve the store from a daemon thread; port 0 picks a free port (see server.server_address)."""
+    server = ThreadingHTTPServer((host, port), make_handler(store, latency_ms / 1000))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-postgrest", daemon=True).start()
+    logger.info(f"Mock PostgREST serving on http://{host}:{server.server_address[1]}/rest/v1/")
+    return server
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local PostgREST stand-in backed by SQLite")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--db", default=":memory:", help="SQLite file holding the tables")
+    parser.add_argument("--latency-ms", type=int, default=0, help="Delay added to every request")
+    args = parser.parse_args()
+
+    server = start_server(SqliteRestStore(args.db), args.host, args.port, args.latency_ms)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""Local stand-in for the Stayflexi web app, for offline end-to-end sync benchmarks.
+
+Serves the login, property list, dashboard, paginated reservations list and folio pages that the
+scraper walks through, rendered from the HTML templates in benchmarks/templates (replace them with
+recorded pages to match a newer site). Booking cards are generated from the golden corpus with
+fresh booking IDs, so any number of bookings per hotel can be served. Every request can be delayed
+to imitate network latency.
+
+Run standalone:  python benchmarks/mock_stayflexi.py --port 8765 --bookings 40 --latency-ms 50
+then start the app with STAYFLEXI_BASE_URL=http://127.0.0.1:8765.
+"""
+import argparse
+import html
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from string import Template
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATES_DIR = os.path.join(BENCHMARKS_DIR, "templates")
+CARDS_PATH = os.path.join(BENCHMARKS_DIR, "corpus", "booking_cards.json")
+
+SESSION_COOKIE = "sf_session"
+
+# Display names shown on folio pages for the sources detected in the card corpus
+SOURCE_NAMES = {
+    "BOOKING.COM": "Booking.com",
+    "AGODA": "Agoda",
+    "EXPEDIA": "Expedia",
+    "MAKEMYTRIP": "MakeMyTrip",
+    "GOIBIBO": "Goibibo",
+    "CLEARTRIP": "Cleartrip",
+    "TRAVELOKA": "Traveloka",
+    "AIRBNB": "Airbnb",
+    "HOTELS.COM": "Hotels.com",
+    "PRICELINE": "Priceline"
+}
+
+# Set up logging for debugging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_BOOKING_ID_RE = re.compile(r'SFBOOKING_\d+_\d+')
+_AMOUNT_RE = re.compile(r'Rs\.\s*([\d,]+\.\d{2})')
+
+def load_template(name: str) -> Template:
+    with open(os.path.join(TEMPLATES_DIR, name), encoding="utf-8") as f:
+        return Template(f.read())
+
+def _money(value: float) -> str:
+    return f"{value:,.2f}"
+
+def generate_bookings(hotel_id: str, count: int, seed: int = 0) -> List[Dict[str, str]]:
+    """count bookings for a hotel built from the labelled card texts of the corpus, with folio figures that add up."""
+    with open(CARDS_PATH, encoding="utf-8") as f:
+        templates = [card for card in json.load(f)["cards"] if "expected" in card]
+    rng = random.Random(f"{seed}:{hotel_id}")
+    bookings = []
+    for i in range(count):
+        template = templates[i % len(templates)]
+        booking_id = f"SFBOOKING_{hotel_id}_{100000 + i}"
+        text = _BOOKING_ID_RE.sub(booking_id, template["text"])
+        amount = _AMOUNT_RE.search(text)
+        total = float(amount.group(1).replace(",", "")) if amount else rng.randint(2000, 30000)
+        without_taxes = round(total / 1.12, 2)
+        paid = rng.choice([0.0, round(total / 2, 2), total])
+        source = template["expected"].get("booking_source")
+        bookings.append({
+            "booking_id": booking_id,
+            "text": text,
+            "booking_source": SOURCE_NAMES.get(source, "Walk-in"),
+            "rate_plan": rng.choice(["Standard Plan (EP)", "Flexible Plan (CP)", "Standard Plan (MAP)"]),
+            "adults_children_infant": rng.choice(["1/0/0", "2/0/0", "2/1/0", "3/0/1"]),
+            "total_without_taxes": _money(without_taxes),
+            "total_tax_amount": _money(total - without_taxes),
+            "total_with_taxes": _money(total),
+            "payment_made": _money(paid),
+            "balance_due": _money(total - paid)
+        })
+    return bookings
+
+class MockStayflexi:
+    """The data and page rendering behind the mock site; thread-safe for a ThreadingHTTPServer."""
+
+    def __init__(self, hotel_ids: List[str], bookings_per_hotel: int = 20, page_size: int = 20, latency_ms: int = 0,
+                 step_delay_ms: int = 100, seed: int = 0):
+        self.page_size = max(1, page_size)
+        self.latency = latency_ms / 1000
+        self.step_delay_ms = step_delay_ms
+        self.bookings = {hotel_id: generate_bookings(hotel_id, bookings_per_hotel, seed) for hotel_id in hotel_ids}
+        self.folios = {booking["booking_id"]: booking for bookings in self.bookings.values() for booking in bookings}
+        self.templates = {name: load_template(f"{name}.html") for name in ("login", "hotels", "dashboard", "reservations", "reservation_card", "folio")}
+        self.requests: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def count_request(self, kind: str) -> None:
+        with self._lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+
+    def render_login(self) -> str:
+        return self.templates["login"].substitute(step_delay_ms=self.step_delay_ms)
+
+    def render_hotels(self) -> str:
+        links = "\n".join(f'    <li><a href="/dashboard?hotelId={hotel_id}" target="_blank">Hotel {hotel_id}</a></li>' for hotel_id in self.bookings)
+        return self.templates["hotels"].substitute(hotel_links=links)
+
+    def render_dashboard(self, hotel_id: str) -> str:
+        return self.templates["dashboard"].substitute(hotel_id=hotel_id)
+
+    def render_reservations(self, hotel_id: str, page: int) -> str:
+        bookings = self.bookings[hotel_id]
+        pages = max(1, -(-len(bookings) // self.page_size))
+        page = min(max(1, page), pages)
+        cards = []
+        for booking in bookings[(page - 1) * self.page_size:page * self.page_size]:
+            card_html = "".join(f"<div>{html.escape(line)}</div>" for line in booking["text"].split("\n"))
+            cards.append(self.templates["reservation_card"].substitute(card_html=card_html, booking_id=booking["booking_id"], hotel_id=hotel_id))
+        last = page >= pages
+        return self.templates["reservations"].substitute(
+            hotel_id=hotel_id, cards="\n".join(cards), page=page, pages=pages, next_page=page + 1,
+            next_class="MuiButtonBase-root Mui-disabled" if last else "MuiButtonBase-root",
+            next_disabled="disabled" if last else "", expand_delay_ms=self.step_delay_ms)
+
+    def render_folio(self, booking_id: str) -> Optional[str]:
+        booking = self.folios.get(booking_id)
+        if booking is None:
+            return None
+        return self.templates["folio"].substitute({key: html.escape(value) for key, value in booking.items() if key != "text"})
+
+def make_handler(site: MockStayflexi):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            logger.debug(f"{self.address_string()} {format % args}")
+
+        def _send(self, status: int, body: str = "", headers: Optional[Dict[str, str]] = None) -> None:
+            data = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _redirect(self, location: str, headers: Optional[Dict[str, str]] = None) -> None:
+            self._send(302, "", dict(headers or {}, Location=location))
+
+        def _logged_in(self) -> bool:
+            return f"{SESSION_COOKIE}=" in (self.headers.get("Cookie") or "")
+
+        def do_GET(self):
+            if site.latency:
+                time.sleep(site.latency)
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            hotel_id = (query.get("hotelId") or [""])[0]
+            if url.path in ("/", "/auth/login"):
+                site.count_request("login")
+                return self._send(200, site.render_login())
+            if not self._logged_in():
+                return self._redirect("/auth/login")
+            if url.path == "/hotels":
+                site.count_request("hotels")
+                return self._send(200, site.render_hotels())
+            if url.path == "/dashboard" and hotel_id in site.bookings:
+                site.count_request("dashboard")
+                return self._send(200, site.render_dashboard(hotel_id))
+            if url.path == "/reservations" and hotel_id in site.bookings:
+                site.count_request("reservations")
+                page = int((query.get("page") or ["1"])[0] or 1)
+                return self._send(200, site.render_reservations(hotel_id, page))
+            if url.path.startswith("/folio/"):
+                site.count_request("folio")
+                page = site.render_folio(url.path[len("/folio/"):])
+                if page is not None:
+                    return self._send(200, page)
+            self._send(404, "<h1>Not found</h1>")
+
+        def do_POST(self):
+            if site.latency:
+                time.sleep(site.latency)
+            length = int(self.headers.get("Content-Length") or 0)
+            self.rfile.read(length)  # Any credentials are accepted
+            if urlparse(self.path).path == "/auth/login":
+                site.count_request("sign_in")
+                return self._redirect("/hotels", {"Set-Cookie": f"{SESSION_COOKIE}={int(time.time())}; Path=/"})
+            self._send(404, "<h1>Not found</h1>")
+
+    return Handler
+
+def start_server(site: MockStayflexi, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Serve the mock site from a daemon thread; port 0 picks a free port (see server.server_address)."""
+    server = ThreadingHTTPServer((host, port), make_handler(site))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-stayflexi", daemon=True).start()
+    logger.info(f"Mock Stayflexi serving {sum(len(b) for b in site.bookings.values())} bookings on http://{host}:{server.server_address[1]}")
+    return server
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local stand-in for the Stayflexi web app")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--hotels", default="27724,30357", help="Comma-separated hotel IDs to serve")
+    parser.add_argument("--bookings", type=int, default=20, help="Bookings per hotel")
+    parser.add_argument("--page-size", type=int, default=20, help="Booking cards per reservations list page")
+    parser.add_argument("--latency-ms", type=int, default=0, help="Delay added to every request")
+    parser.add_argument("--step-delay-ms", type=int, default=100, help="Client-side delay of the login and card expand steps")
+    args = parser.parse_args()
+
+    site = MockStayflexi([hotel_id.strip() for hotel_id in args.hotels.split(",") if hotel_id.strip()], args.bookings,
+                         args.page_size, args.latency_ms, args.step_delay_ms)
+    server = start_server(site, args.host, args.port)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+from config import BOOKING_ID_BLOCK_SIZE
+
+# Set up logging for debugging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Prefix per table: direct reservations use TIE, OTA bookings use SFX
+BOOKING_ID_PREFIXES = {"reservations": "TIE", "otabooking": "SFX"}
+
+def format_booking_id(prefix: str, day: str, sequence: int) -> str:
+    """Format an ID such as TIE20250101001."""
+    return f"{prefix}{day}{sequence:03d}"
+
+class SupabaseCounterBackend:
+    """Atomic per-(prefix, day) counter implemented by the allocate_booking_ids Postgres function."""
+
+    def __init__(self, supabase):
+        self.supabase = supabase
+
+    def allocate(self, prefix: str, day: str, count: int) -> int:
+        """Reserve count sequence numbers and return the last one."""
+        response = self.supabase.rpc("allocate_booking_ids", {"p_prefix": prefix, "p_day": day, "p_count": count}).execute()
+        data = response.data
+        if isinstance(data, list):
+            data = data[0] if data else None
+            if isinstance(data, dict):
+                data = next(iter(data.values()))
+        if data is None:
+            raise RuntimeError(f"allocate_booking_ids returned no value for {prefix}{day}")
+        return int(data)
+
+class SQLiteCounterBackend:
+    """Local stand-in for the Supabase counter, with the same semantics (for tests and offline runs)."""
+
+    def __init__(self, path: str = ":memory:"):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._lock = threading.Lock()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS booking_id_counters ("
+            "prefix TEXT NOT NULL, day TEXT NOT NULL, last_value INTEGER NOT NULL, PRIMARY KEY (prefix, day))"
+        )
+
+    def allocate(self, prefix: str, day: str, count: int) -> int:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO booking_id_counters (prefix, day, last_value) VALUES (?, ?, ?) "
+                    "ON CONFLICT (prefix, day) DO UPDATE SET last_value = last_value + excluded.last_value",
+                    (prefix, day, count)
+                )
+                last_value = self._conn.execute(
+                    "SELECT last_value FROM booking_id_counters WHERE prefix = ? AND day = ?", (prefix, day)
+                ).fetchone()[0]
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return last_value
+
+class BookingIdAllocator:
+    """Hands out booking IDs from an atomic counter without scanning the table.
+
+    With block_size > 1 each process reserves a block of sequence numbers per round-trip and serves
+    later IDs from memory; unused numbers of a block are simply skipped, never reused.
+    """
+
+    def __init__(self, backend, block_size: int = BOOKING_ID_BLOCK_SIZE):
+        self.backend = backend
+        self.block_size = max(1, block_size)
+        self._blocks: Dict[tuple, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def next_id(self, prefix: str, day: Optional[str] = None) -> str:
+        day = day or datetime.now().strftime('%Y%m%d')
+        with self._lock:
+            block = self._blocks.get((prefix, day))
+            if not block:
+                last_value = self.backend.allocate(prefix, day, self.block_size)
+                block = list(range(last_value - self.block_size + 1, last_value + 1))
+                # Blocks of earlier days can never be used again
+                self._blocks = {key: value for key, value in self._blocks.items() if key[1] == day}
+                self._blocks[(prefix, day)] = block
+            return format_booking_id(prefix, day, block.pop(0))
+
+_allocators: Dict[int, BookingIdAllocator] = {}
+_allocators_lock = threading.Lock()
+
+def get_booking_id_allocator(supabase) -> BookingIdAllocator:
+    """Process-wide allocator for a Supabase client."""
+    with _allocators_lock:
+        allocator = _allocators.get(id(supabase))
+        if allocator is None:
+            allocator = BookingIdAllocator(SupabaseCounterBackend(supabase))
+            _allocators[id(supabase)] = allocator
+        return allocator
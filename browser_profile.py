@@ -0,0 +1,59 @@
+import logging
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from config import BROWSER_PROFILE, BROWSER_BLOCKED_URLS, BROWSER_JS_HEAP_MB
+
+# Set up logging for debugging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PROFILE_LIGHT = "light"
+PROFILE_FULL = "full"
+
+# Chromium switches that drop features a scraper never uses
+LIGHT_PROFILE_ARGUMENTS = [
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-sync",
+    "--disable-default-apps",
+    "--disable-component-update",
+    "--disable-features=Translate,MediaRouter,OptimizationHints,AutofillServerCommunication",
+    "--mute-audio",
+    "--no-first-run",
+    "--blink-settings=imagesEnabled=false",
+    # Folio tabs load in the background; do not let Chromium throttle them
+    "--disable-background-timer-throttling",
+    "--disable-renderer-backgrounding",
+    "--disable-backgrounding-occluded-windows"
+]
+
+# Content settings: 2 = block
+LIGHT_PROFILE_PREFS = {
+    "profile.managed_default_content_settings.images": 2,
+    "profile.managed_default_content_settings.media_stream": 2,
+    "profile.default_content_setting_values.notifications": 2,
+    "profile.default_content_setting_values.geolocation": 2
+}
+
+def is_light_profile() -> bool:
+    return BROWSER_PROFILE == PROFILE_LIGHT
+
+def apply_light_profile(chrome_options: Options) -> None:
+    """Add the light scraping profile's switches, prefs and memory cap to Chrome options."""
+    for argument in LIGHT_PROFILE_ARGUMENTS:
+        chrome_options.add_argument(argument)
+    chrome_options.add_argument(f"--js-flags=--max-old-space-size={BROWSER_JS_HEAP_MB}")
+    chrome_options.add_experimental_option("prefs", LIGHT_PROFILE_PREFS)
+
+def block_resources(driver: webdriver.Chrome) -> None:
+    """Block image, media, font and tracker requests in the current tab through DevTools.
+
+    Network.setBlockedURLs applies per tab, so it has to be repeated for every tab that is opened.
+    """
+    if not BROWSER_BLOCKED_URLS:
+        return
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BROWSER_BLOCKED_URLS})
+    except Exception as e:
+        logger.warning(f"Could not enable resource blocking: {str(e)}")
@@ -1,8 +1,11 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from datetime import datetime, date, timedelta
+from datetime import date, timedelta
 from supabase import create_client, Client
+from booking_ids import get_booking_id_allocator
+from reservation_repository import fetch_all_reservations, invalidate_reservation_cache, filter_by_check_in, load_reservations_dataframe
+from metrics import observe_database
 
 # Booking source dropdown options
 BOOKING_SOURCES = [
@@ -116,16 +119,10 @@ def load_property_room_map():
 
 def generate_booking_id():
     """
-    Generate a unique booking ID by checking existing IDs in Supabase.
+    Generate a unique booking ID from the atomic Supabase counter (no table scan, no collisions).
     """
     try:
-        today = datetime.now().strftime('%Y%m%d')
-        response = supabase.table("reservations").select("bookingId").like("bookingId", f"TIE{today}%").execute()
-        existing_ids = [record["bookingId"] for record in response.data]
-        sequence = 1
-        while f"TIE{today}{sequence:03d}" in existing_ids:
-            sequence += 1
-        return f"TIE{today}{sequence:03d}"
+        return get_booking_id_allocator(supabase).next_id("TIE")
     except Exception as e:
         st.error(f"Error generating booking ID: {e}")
         return None
@@ -133,7 +130,9 @@ def generate_booking_id():
 def insert_reservation_in_supabase(reservation):
     """Insert a new reservation into Supabase."""
     try:
-        response = supabase.table("reservations").insert(reservation).execute()
+        with observe_database("reservations", "insert"):
+            response = supabase.table("reservations").insert(reservation).execute()
+        invalidate_reservation_cache()
         return bool(response.data)
     except Exception as e:
         st.error(f"Error inserting reservation: {e}")
@@ -297,88 +296,21 @@ def show_new_reservation_form():
             # Insert reservation into Supabase
             if insert_reservation_in_supabase(reservation):
                 st.success(f"✅ Reservation {booking_id} created successfully!")
-                st.session_state.reservations.append({
-                    "Property Name": property_name,
-                    "Booking ID": booking_id,
-                    "Guest Name": guest_name,
-                    "Guest Phone": guest_phone,
-                    "Check In": check_in.isoformat(),
-                    "Check Out": check_out.isoformat(),
-                    "Room No": room_no,
-                    "Room Type": room_type,
-                    "No of Adults": int(no_of_adults),
-                    "No of Children": int(no_of_children),
-                    "No of Infants": int(no_of_infants),
-                    "Rate Plans": rate_plans,
-                    "Booking Source": booking_source,
-                    "Total Tariff": float(total_tariff),
-                    "Advance Payment": float(advance_payment),
-                    "Balance": float(balance),
-                    "Advance MOP": advance_mop,
-                    "Balance MOP": balance_mop,
-                    "Booking Status": booking_status,
-                    "Payment Status": payment_status,
-                    "Submitted By": submitted_by,
-                    "Modified By": "",
-                    "Modified Comments": "",
-                    "Remarks": remarks
-                })
                 st.rerun()
             else:
                 st.error("❌ Failed to create reservation. Please try again.")
 
-def load_reservations_from_supabase():
-    """Load all reservations from Supabase."""
+def load_reservations_from_supabase(start_date=None, end_date=None, property_name=None):
+    """Load reservations from Supabase through the cached, paginated repository (filters applied server-side)."""
     try:
-        response = supabase.table("reservations").select("*").order("checkIn", desc=True).execute()
-        if not response.data:
+        reservations = fetch_all_reservations(start_date, end_date, property_name)
+        if not reservations:
             st.warning("No reservations found in Supabase.")
-            return []
-        
-        # Transform Supabase camelCase to title case for UI consistency
-        transformed_data = []
-        for record in response.data:
-            transformed_record = {
-                "Property Name": record.get("propertyName", ""),
-                "Booking ID": record.get("bookingId", ""),
-                "Guest Name": record.get("guestName", ""),
-                "Guest Phone": record.get("guestPhone", ""),
-                "Check In": record.get("checkIn", ""),
-                "Check Out": record.get("checkOut", ""),
-                "Room No": record.get("roomNo", ""),
-                "Room Type": record.get("roomType", ""),
-                "No of Adults": record.get("noOfAdults", 0),
-                "No of Children": record.get("noOfChildren", 0),
-                "No of Infants": record.get("noOfInfants", 0),
-                "Rate Plans": record.get("ratePlans", ""),
-                "Booking Source": record.get("bookingSource", ""),
-                "Total Tariff": record.get("totalTariff", 0.0),
-                "Advance Payment": record.get("advancePayment", 0.0),
-                "Balance": record.get("balance", 0.0),
-                "Advance MOP": record.get("advanceMop", "Not Paid"),
-                "Balance MOP": record.get("balanceMop", "Not Paid"),
-                "Booking Status": record.get("bookingStatus", "Pending"),
-                "Payment Status": record.get("paymentStatus", "Not Paid"),
-                "Submitted By": record.get("submittedBy", ""),
-                "Modified By": record.get("modifiedBy", ""),
-                "Modified Comments": record.get("modifiedComments", ""),
-                "Remarks": record.get("remarks", "")
-            }
-            transformed_data.append(transformed_record)
-        return transformed_data
+        return reservations
     except Exception as e:
         st.error(f"Error loading reservations: {e}")
         return []
 
-def insert_reservation_in_supabase(reservation):
-    """Insert a new reservation into Supabase."""
-    try:
-        response = supabase.table("reservations").insert(reservation).execute()
-        return bool(response.data)
-    except Exception as e:
-        st.error(f"Error inserting reservation: {e}")
-        return False
-
 def update_reservation_in_supabase(booking_id, updated_reservation):
     """Update a reservation in Supabase."""
     try:
@@ -408,7 +340,9 @@ def update_reservation_in_supabase(booking_id, updated_reservation):
             "modifiedComments": updated_reservation["modifiedComments"],
             "remarks": updated_reservation["remarks"]
         }
-        response = supabase.table("reservations").update(supabase_reservation).eq("bookingId", booking_id).execute()
+        with observe_database("reservations", "update"):
+            response = supabase.table("reservations").update(supabase_reservation).eq("bookingId", booking_id).execute()
+        invalidate_reservation_cache()
         return bool(response.data)
     except Exception as e:
         st.error(f"Error updating reservation {booking_id}: {e}")
@@ -417,20 +351,26 @@ def update_reservation_in_supabase(booking_id, updated_reservation):
 def delete_reservation_in_supabase(booking_id):
     """Delete a reservation from Supabase."""
     try:
-        response = supabase.table("reservations").delete().eq("bookingId", booking_id).execute()
+        with observe_database("reservations", "delete"):
+            response = supabase.table("reservations").delete().eq("bookingId", booking_id).execute()
+        invalidate_reservation_cache()
         return bool(response.data)
     except Exception as e:
         st.error(f"Error deleting reservation {booking_id}: {e}")
         return False
 
-def display_filtered_analysis(df, start_date, end_date, view_mode=True):
-    """Helper function to filter dataframe for analytics or view."""
-    filtered_df = df.copy()
+def display_filtered_analysis(df, start_date, end_date, view_mode=True, property_name=None):
+    """Helper function to filter dataframe for analytics or view.
+
+    With df=None the typed reservations DataFrame is loaded for the range (filtered by Supabase and cached).
+    """
     try:
-        if start_date:
-            filtered_df = filtered_df[pd.to_datetime(filtered_df["Check In"]) >= pd.to_datetime(start_date)]
-        if end_date:
-            filtered_df = filtered_df[pd.to_datetime(filtered_df["Check In"]) <= pd.to_datetime(end_date)]
+        if df is None:
+            return load_reservations_dataframe(start_date, end_date, property_name)
+        if not pd.api.types.is_datetime64_any_dtype(df["Check In"]):
+            # Frames built from dict records: parse the column once instead of once per filter
+            df = df.assign(**{"Check In": pd.to_datetime(df["Check In"], errors="coerce")})
+        return filter_by_check_in(df, start_date, end_date, property_name)
     except Exception as e:
         st.error(f"Error filtering data: {e}")
-    return filtered_df
+        return df if df is not None else pd.DataFrame()
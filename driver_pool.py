@@ -0,0 +1,120 @@
+import logging
+import threading
+import time
+from typing import Callable, List, Optional
+from selenium import webdriver
+
+# Set up logging for debugging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class PooledDriver:
+    """A browser kept alive by the pool together with its login state."""
+
+    def __init__(self, driver: webdriver.Chrome, profile_path: str):
+        self.driver = driver
+        self.profile_path = profile_path
+        self.uses = 0
+        self.authenticated = False
+        self.broken = False
+        self.created_at = time.time()
+
+class DriverPool:
+    """Thread-safe pool of warm WebDriver sessions that survive across properties and sync runs.
+
+    Sessions are health-checked when borrowed, recycled after max_uses borrows and
+    discarded when marked broken, so a crashed Chromium is replaced on the next acquire.
+    """
+
+    def __init__(self, factory: Callable[[str], webdriver.Chrome], size: int, max_uses: int, profile_root: str):
+        self._factory = factory
+        self._size = max(1, size)
+        self._max_uses = max(1, max_uses)
+        self._profile_root = profile_root
+        self._idle: List[PooledDriver] = []
+        self._free_profiles = [f"{profile_root}_pool_{n}" for n in range(self._size)]
+        self._condition = threading.Condition()
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledDriver:
+        """Return a healthy idle session, starting a new browser if the pool has room.
+
+        Raises TimeoutError if every session is still borrowed after timeout seconds (None waits forever).
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._condition:
+            while True:
+                while self._idle:
+                    pooled = self._idle.pop()
+                    if self._is_healthy(pooled):
+                        pooled.uses += 1
+                        logger.info(f"Reusing pooled browser {pooled.profile_path} (use {pooled.uses}/{self._max_uses})")
+                        return pooled
+                    logger.warning(f"Pooled browser {pooled.profile_path} failed health check, recycling")
+                    self._discard(pooled)
+                if self._free_profiles:
+                    profile_path = self._free_profiles.pop()
+                    break
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("Timed out waiting for a free browser session")
+                self._condition.wait(remaining)
+
+        # Start the browser outside the lock so other threads can keep borrowing
+        try:
+            pooled = PooledDriver(self._factory(profile_path), profile_path)
+        except Exception:
+            with self._condition:
+                self._free_profiles.append(profile_path)
+                self._condition.notify()
+            raise
+        pooled.uses = 1
+        logger.info(f"Started pooled browser {profile_path}")
+        return pooled
+
+    def release(self, pooled: PooledDriver) -> None:
+        """Return a session to the pool, or close it if it is broken or worn out."""
+        if not pooled.broken and pooled.uses < self._max_uses and self._reset(pooled):
+            with self._condition:
+                self._idle.append(pooled)
+                self._condition.notify()
+            return
+        logger.info(f"Recycling pooled browser {pooled.profile_path} after {pooled.uses} uses (broken: {pooled.broken})")
+        with self._condition:
+            self._discard(pooled)
+            self._condition.notify()
+
+    def close_all(self) -> None:
+        """Quit every idle browser; borrowed sessions are closed when released."""
+        with self._condition:
+            while self._idle:
+                self._discard(self._idle.pop())
+            self._condition.notify_all()
+
+    def _discard(self, pooled: PooledDriver) -> None:
+        # Caller must hold the lock
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            logger.warning(f"Failed to close pooled browser {pooled.profile_path}: {str(e)}")
+        self._free_profiles.append(pooled.profile_path)
+
+    @staticmethod
+    def _is_healthy(pooled: PooledDriver) -> bool:
+        try:
+            return bool(pooled.driver.window_handles) and pooled.driver.current_url is not None
+        except Exception:
+            return False
+
+    @staticmethod
+    def _reset(pooled: PooledDriver) -> bool:
+        """Close extra tabs opened during the sync and keep only the first window."""
+        try:
+            handles = pooled.driver.window_handles
+            for handle in handles[1:]:
+                pooled.driver.switch_to.window(handle)
+                pooled.driver.close()
+            pooled.driver.switch_to.window(handles[0])
+            return True
+        except Exception as e:
+            logger.warning(f"Could not reset pooled browser {pooled.profile_path}: {str(e)}")
+            return False
@@ -0,0 +1,112 @@
+import logging
+import time
+from typing import Dict
+from selenium import webdriver
+from booking_parser import FINANCIAL_LABELS
+from page_waits import record_wait_timing
+
+# Set up logging for debugging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Confidence markers returned per field, weakest first
+CONFIDENCE_LOW = "low"
+CONFIDENCE_MEDIUM = "medium"
+CONFIDENCE_HIGH = "high"
+TRUSTED_CONFIDENCE = (CONFIDENCE_MEDIUM, CONFIDENCE_HIGH)
+
+# Canonical OTA names and the (upper-case) spellings that identify them on a folio page
+FOLIO_OTA_PATTERNS = {
+    'BOOKING.COM': ['BOOKING.COM', 'BOOKING COM', 'BOOKINGCOM', 'BOOKING_COM'],
+    'AGODA': ['AGODA'],
+    'EXPEDIA': ['EXPEDIA'],
+    'MAKEMYTRIP': ['MAKEMYTRIP', 'MAKE MY TRIP'],
+    'GOIBIBO': ['GOIBIBO'],
+    'CLEARTRIP': ['CLEARTRIP'],
+    'TRAVELOKA': ['TRAVELOKA'],
+    'HOTELS.COM': ['HOTELS.COM', 'HOTELS COM'],
+    'AIRBNB': ['AIRBNB']
+}
+
+# Walks the folio DOM once and returns {field: {value, confidence}} for every field it can find
+FOLIO_EXTRACT_JS = """
+const labels = arguments[0], otaPatterns = arguments[1];
+const rank = {low: 1, medium: 2, high: 3};
+const result = {};
+const set = (key, value, confidence) => {
+    if (!value) return;
+    if (!result[key] || rank[confidence] > rank[result[key].confidence]) result[key] = {value: String(value).trim(), confidence: confidence};
+};
+const otaName = (text) => {
+    const upper = text.toUpperCase();
+    for (const [name, patterns] of Object.entries(otaPatterns)) {
+        if (patterns.some(p => upper.includes(p))) return name;
+    }
+    return null;
+};
+const panel = document.getElementById('panel1a-content');
+
+// Visible text nodes in document order
+const nodes = [];
+const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+let node;
+while (node = walker.nextNode()) {
+    const text = node.textContent.trim();
+    const parent = node.parentElement;
+    if (!text || !parent || parent.closest('script, style, noscript')) continue;
+    nodes.push({text: text, parent: parent});
+}
+
+for (let i = 0; i < nodes.length; i++) {
+    const text = nodes[i].text, parent = nodes[i].parent;
+    const lower = text.toLowerCase();
+
+    // Financial figures: a label followed by its amount
+    for (const [label, key] of Object.entries(labels)) {
+        if (text.includes(label) && i + 1 < nodes.length) {
+            const amount = nodes[i + 1].text.replace(/(INR|Rs\\.)\\s*/g, '').trim();
+            set(key, amount, /^-?[\\d,]+(\\.\\d+)?$/.test(amount) ? 'high' : 'low');
+        }
+    }
+
+    // Occupancy: exact adults/children/infants triple, or a lone guest count next to a guest label
+    if (/^\\d+\\/\\d+\\/\\d+$/.test(text)) {
+        set('adults_children_infant', text, 'high');
+    } else if (/^\\d+$/.test(text) && +text > 0 && +text <= 20) {
+        const context = (parent.parentElement ? parent.parentElement.textContent : '').toLowerCase();
+        if (/guest|adult|pax|occupancy/.test(context)) set('adults_children_infant', text + '/0/0', 'low');
+    }
+
+    // Rate plan: short plan-like text, trusted inside the booking details panel
+    if (text.length < 50 && /plan|standard|flexible/i.test(text) && !/add|view|booking|notes|\\(0\\)/i.test(text)) {
+        set('rate_plan', text, panel && panel.contains(parent) ? 'medium' : 'low');
+    }
+
+    // Booking source: the dedicated source element, otherwise any OTA name in the page text
+    const ota = otaName(text);
+    if (ota) set('booking_source', ota, parent.closest('.sourceName, [class*="source"]') ? 'high' : 'medium');
+}
+
+// Hidden inputs and data attributes are not text nodes
+for (const elem of document.querySelectorAll('[data-source], [data-booking-source], input[type="hidden"]')) {
+    const ota = otaName(elem.value || elem.dataset.source || elem.dataset.bookingSource || '');
+    if (ota) set('booking_source', ota, 'medium');
+}
+return result;
+"""
+
+def extract_folio_fields(driver: webdriver.Chrome) -> Dict[str, Dict[str, str]]:
+    """Read every folio field with one script call; returns {field: {"value", "confidence"}} ({} on failure)."""
+    start = time.monotonic()
+    try:
+        fields = driver.execute_script(FOLIO_EXTRACT_JS, FINANCIAL_LABELS, FOLIO_OTA_PATTERNS)
+    except Exception as e:
+        logger.warning(f"Folio extraction script failed: {str(e)}")
+        return {}
+    finally:
+        record_wait_timing("folio_script_extract", time.monotonic() - start)
+    return fields if isinstance(fields, dict) else {}
+
+def trusted_values(fields: Dict[str, Dict[str, str]]) -> Dict[str, str]:
+    """Values extracted with at least medium confidence."""
+    return {key: field["value"] for key, field in fields.items() if field.get("confidence") in TRUSTED_CONFIDENCE}
@@ -0,0 +1,150 @@
+import logging
+from typing import Any, Dict, List, Optional
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from selenium import webdriver
+from urllib3.util.retry import Retry
+from utils import text_fingerprint
+from booking_parser import FINANCIAL_LABELS, parse_financial_lines, parse_folio_lines  # Parsers live in booking_parser; re-exported here
+from config import FOLIO_FAST_PATH, FOLIO_API_URL, FOLIO_HTTP_TIMEOUT, FOLIO_HTTP_MAX_FAILURES, STAYFLEXI_TOKEN_STORAGE_KEY, DRIVER_POOL_SIZE, STAYFLEXI_BASE_URL
+
+# Set up logging for debugging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FOLIO_PAGE_URL = STAYFLEXI_BASE_URL + "/folio/{booking_id}?hotelId={hotel_id}"
+
+# JSON keys (lowercase) that may carry each folio field in a Stayflexi API response
+JSON_FIELD_KEYS = {
+    "booking_source": ["bookingsource", "booking_source", "source", "sourcename", "channel"],
+    "rate_plan": ["rateplan", "rate_plan", "rateplanname", "rate_plan_name"],
+    "adults": ["adults", "noofadults", "adult"],
+    "children": ["children", "noofchildren", "child"],
+    "infants": ["infants", "noofinfants", "infant"],
+    "total_without_taxes": ["totalwithouttaxes", "total_without_taxes", "totalbeforetax", "pretaxamount"],
+    "total_tax_amount": ["totaltaxamount", "total_tax_amount", "taxamount"],
+    "total_with_taxes": ["totalwithtaxes", "total_with_taxes", "totalamount", "grandtotal"],
+    "payment_made": ["paymentmade", "payment_made", "totalpayment", "paidamount"],
+    "balance_due": ["balancedue", "balance_due", "balance"]
+}
+
+def folio_fingerprint(booking: Dict[str, str]) -> str:
+    """Fingerprint of the folio financial block, used to detect changed amounts between syncs."""
+    return text_fingerprint("|".join(str(booking.get(key) or "") for key in FINANCIAL_LABELS.values()))
+
+def folio_was_read(booking: Dict[str, str]) -> bool:
+    """True if the folio totals were actually extracted; a failed or timed-out folio read leaves them unset."""
+    return bool(booking.get("total_with_taxes"))
+
+def _find_json_value(data: Any, keys: List[str]) -> Optional[Any]:
+    """Depth-first search for the first scalar stored under any of the given keys."""
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if key.lower() in keys and value not in (None, "") and not isinstance(value, (dict, list)):
+                return value
+        for value in data.values():
+            found = _find_json_value(value, keys)
+            if found is not None:
+                return found
+    elif isinstance(data, list):
+        for item in data:
+            found = _find_json_value(item, keys)
+            if found is not None:
+                return found
+    return None
+
+def parse_folio_json(data: Any) -> Dict[str, str]:
+    """Map a folio/reservation JSON document onto booking keys."""
+    fields = {}
+    for field, keys in JSON_FIELD_KEYS.items():
+        value = _find_json_value(data, keys)
+        if value is not None:
+            fields[field] = str(value).strip()
+    if "adults" in fields:
+        fields["adults_children_infant"] = f"{fields.pop('adults')}/{fields.pop('children', '0')}/{fields.pop('infants', '0')}"
+    fields.pop("children", None)
+    fields.pop("infants", None)
+    if fields.get("booking_source"):
+        fields["booking_source"] = fields["booking_source"].upper()
+    return fields
+
+def parse_folio_html(html: str) -> Dict[str, str]:
+    """Parse a server-rendered folio page without a browser."""
+    soup = BeautifulSoup(html, "html.parser")
+    lines = [line.strip() for line in soup.get_text("\n").split("\n") if line.strip()]
+    return parse_folio_lines(lines)
+
+def http_fetch_enabled() -> bool:
+    """The HTTP fast path needs FOLIO_API_URL: the /folio/{id} page itself is a client-rendered shell without totals."""
+    return FOLIO_FAST_PATH and bool(FOLIO_API_URL)
+
+class FolioHttpFetcher:
+    """Fetches folio data from FOLIO_API_URL over plain HTTP using the cookies of an authenticated browser session.
+
+    After FOLIO_HTTP_MAX_FAILURES consecutive misses the fetcher disables itself so a property
+    whose folios cannot be read this way does not pay for a failed request per booking.
+    """
+
+    def __init__(self, session: requests.Session, hotel_id: str):
+        self.session = session
+        self.hotel_id = hotel_id
+        self.consecutive_failures = 0
+        self.enabled = True
+
+    @classmethod
+    def from_driver(cls, driver: webdriver.Chrome, hotel_id: str) -> "FolioHttpFetcher":
+        """Build a pooled requests.Session carrying the browser's cookies, user agent and auth token."""
+        session = requests.Session()
+        retries = Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(4, DRIVER_POOL_SIZE), max_retries=retries)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        for cookie in driver.get_cookies():
+            session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain"), path=cookie.get("path", "/"))
+        session.headers["User-Agent"] = driver.execute_script("return navigator.userAgent;")
+        session.headers["Accept"] = "application/json, text/html;q=0.9"
+        if STAYFLEXI_TOKEN_STORAGE_KEY:
+            token = driver.execute_script("return window.localStorage.getItem(arguments[0]);", STAYFLEXI_TOKEN_STORAGE_KEY)
+            if token:
+                session.headers["Authorization"] = f"Bearer {token.strip(chr(34))}"
+        logger.info(f"Built HTTP folio session for hotel {hotel_id} with {len(session.cookies)} cookies")
+        return cls(session, hotel_id)
+
+    def fetch(self, booking: Dict[str, str]) -> bool:
+        """Fill the booking's folio fields over HTTP; return False so the caller can fall back to Selenium."""
+        if not self.enabled or not booking.get('booking_id'):
+            return False
+        try:
+            fields = self._fetch_fields(booking['booking_id'])
+        except Exception as e:
+            logger.warning(f"HTTP folio fetch failed for {booking['booking_id']}: {str(e)}")
+            fields = {}
+
+        if not fields.get("total_with_taxes"):
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= FOLIO_HTTP_MAX_FAILURES:
+                self.enabled = False
+                logger.warning(f"Disabling HTTP folio fetch for hotel {self.hotel_id} after {self.consecutive_failures} consecutive failures")
+            return False
+
+        self.consecutive_failures = 0
+        original_source = booking.get('booking_source')
+        booking.update(fields)
+        if original_source and original_source not in ['DIRECT', None]:
+            booking['booking_source'] = original_source  # Text detection wins, as in the browser path
+        booking.setdefault('rate_plan', 'N/A')
+        if booking.get('adults_children_infant') in (None, 'N/A'):
+            booking['adults_children_infant'] = '1/0/0'
+        logger.info(f"Fetched folio details over HTTP for {booking['booking_id']}")
+        return True
+
+    def _fetch_fields(self, booking_id: str) -> Dict[str, str]:
+        response = self.session.get(FOLIO_API_URL.format(booking_id=booking_id, hotel_id=self.hotel_id), timeout=FOLIO_HTTP_TIMEOUT)
+        response.raise_for_status()
+        if "json" in response.headers.get("Content-Type", ""):
+            return parse_folio_json(response.json())
+        return parse_folio_html(response.text)
+
+    def close(self) -> None:
+        self.session.close()
@@ -0,0 +1,100 @@
+import logging
+import time
+from typing import Callable, Dict, Iterator, Optional, Tuple
+from selenium import webdriver
+from page_waits import page_settled_now, record_wait_timing
+from config import PAGE_WAIT_TIMEOUT, PAGE_QUIET_MS
+
+# Set up logging for debugging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class FolioTabPool:
+    """Loads several folio pages at once in tabs of one authenticated browser.
+
+    Each submitted booking gets its own tab; tabs are polled in turn and read with the
+    extract callback as soon as their page has settled (or timed out), then closed.
+    The window that was current when the pool was created is never navigated. With prepare_tab,
+    each tab is opened blank and prepared (e.g. resource blocking) before it loads the folio.
+    """
+
+    def __init__(self, driver: webdriver.Chrome, url_for: Callable[[Dict[str, str]], str],
+                 extract: Callable[[webdriver.Chrome, Dict[str, str]], None], max_tabs: int,
+                 timeout: float = PAGE_WAIT_TIMEOUT, quiet_ms: int = PAGE_QUIET_MS,
+                 prepare_tab: Optional[Callable[[webdriver.Chrome], None]] = None):
+        self.driver = driver
+        self.url_for = url_for
+        self.extract = extract
+        self.prepare_tab = prepare_tab
+        self.max_tabs = max(1, max_tabs)
+        self.timeout = timeout
+        self.quiet_ms = quiet_ms
+        self.home_handle = driver.current_window_handle
+        self._open: Dict[str, Tuple[Dict[str, str], float]] = {}  # Window handle -> (booking, opened at)
+
+    def submit(self, booking: Dict[str, str]) -> Iterator[Dict[str, str]]:
+        """Open a tab for the booking, first yielding finished bookings until a tab is free."""
+        while len(self._open) >= self.max_tabs:
+            yield from self._collect()
+        self._open_tab(booking)
+
+    def drain(self) -> Iterator[Dict[str, str]]:
+        """Yield the remaining bookings as their tabs finish."""
+        while self._open:
+            yield from self._collect()
+
+    def close(self) -> None:
+        """Close any tabs still open and return to the original window."""
+        for handle in list(self._open):
+            try:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+            except Exception as e:
+                logger.warning(f"Could not close folio tab: {str(e)}")
+        self._open.clear()
+        self.driver.switch_to.window(self.home_handle)
+
+    def _open_tab(self, booking: Dict[str, str]) -> None:
+        driver = self.driver
+        handles_before = set(driver.window_handles)
+        driver.switch_to.window(self.home_handle)
+        url = self.url_for(booking)
+        driver.execute_script("window.open(arguments[0], '_blank');", "about:blank" if self.prepare_tab else url)
+        new_handles = [handle for handle in driver.window_handles if handle not in handles_before]
+        if not new_handles:
+            raise RuntimeError(f"Browser did not open a tab for folio {booking.get('booking_id')}")
+        if self.prepare_tab:
+            driver.switch_to.window(new_handles[0])
+            self.prepare_tab(driver)
+            driver.execute_script("window.location.href = arguments[0];", url)  # Returns without waiting for the load
+            driver.switch_to.window(self.home_handle)
+        self._open[new_handles[0]] = (booking, time.monotonic())
+        logger.info(f"Opened folio tab for {booking.get('booking_id')} ({len(self._open)}/{self.max_tabs} tabs)")
+
+    def _collect(self) -> Iterator[Dict[str, str]]:
+        """Read and close every tab that is ready; pause briefly if none was."""
+        driver = self.driver
+        finished = False
+        for handle, (booking, opened_at) in list(self._open.items()):
+            driver.switch_to.window(handle)
+            elapsed = time.monotonic() - opened_at
+            if elapsed < self.timeout and not page_settled_now(driver, self.quiet_ms):
+                continue
+            if elapsed >= self.timeout:
+                logger.warning(f"Folio tab for {booking.get('booking_id')} did not settle within {self.timeout}s, reading it anyway")
+            record_wait_timing("folio_tab_load", elapsed)
+            try:
+                self.extract(driver, booking)
+            except Exception as e:
+                logger.error(f"Error reading folio tab for {booking.get('booking_id')}: {str(e)}")
+            finally:
+                del self._open[handle]
+                try:
+                    driver.close()
+                except Exception as e:
+                    logger.warning(f"Could not close folio tab for {booking.get('booking_id')}: {str(e)}")
+            finished = True
+            yield booking
+        driver.switch_to.window(self.home_handle)
+        if not finished:
+            time.sleep(0.1)
@@ -0,0 +1,203 @@
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Set up logging for debugging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Bucket upper bounds in seconds
+DATABASE_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SYNC_BUCKETS = (5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1200.0, 1800.0, 3600.0)
+
+METRICS_FILE_INTERVAL = 15  # Seconds between rewrites of the metrics file
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values)) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class Metric:
+    """A named metric with a fixed set of label names; values are kept per label combination."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(lines + self.samples())
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in items]
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets, with their count and sum."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = DATABASE_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.setdefault(key, {"buckets": [0] * len(self.buckets), "count": 0, "sum": 0.0})
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["buckets"][i] += 1
+            state["count"] += 1
+            state["sum"] += value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, {"buckets": list(state["buckets"]), "count": state["count"], "sum": state["sum"]}) for key, state in self._values.items())
+        lines = []
+        for key, state in items:
+            for bound, count in zip(self.buckets, state["buckets"]):
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, ('le', _format_value(bound)))} {count}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {state['count']}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(round(state['sum'], 6))}")
+        return lines
+
+REGISTRY: List[Metric] = []
+
+# OTA sync
+SYNC_RUNS = Counter("tie_ota_sync_runs_total", "Property syncs finished, by outcome.", ["property", "status"])
+SYNC_DURATION = Histogram("tie_ota_sync_duration_seconds", "Wall time of a property sync.", ["property"], SYNC_BUCKETS)
+SYNC_IN_PROGRESS = Gauge("tie_ota_sync_in_progress", "Property syncs currently running in this process.", ["property"])
+SYNC_LAST_SUCCESS = Gauge("tie_ota_sync_last_success_timestamp_seconds", "Unix time of the last sync without errors.", ["property"])
+BOOKINGS_SCRAPED = Counter("tie_ota_bookings_scraped_total", "OTA bookings read from Stayflexi and handed to the writer.", ["property"])
+BOOKINGS_WRITTEN = Counter("tie_ota_bookings_written_total", "Scraped bookings by write outcome (stored, updated, skipped, error).", ["property", "result"])
+DUPLICATES_SKIPPED = Counter("tie_ota_duplicates_skipped_total", "Bookings not written because they were already stored, by kind of duplicate.", ["property", "kind"])
+BROWSER_FAILURES = Counter("tie_browser_failures_total", "Browser sessions that failed to start or broke during a sync.", ["stage"])
+
+# Supabase
+DATABASE_DURATION = Histogram("tie_supabase_request_duration_seconds", "Latency of Supabase calls.", ["table", "operation"])
+DATABASE_ERRORS = Counter("tie_supabase_request_errors_total", "Supabase calls that raised an error.", ["table", "operation"])
+
+@contextmanager
+def observe_database(table: str, operation: str) -> Iterator[None]:
+    """Time a Supabase call; an exception is counted as an error and re-raised."""
+    start = time.monotonic()
+    try:
+        yield
+    except Exception:
+        DATABASE_ERRORS.inc(table=table, operation=operation)
+        raise
+    finally:
+        DATABASE_DURATION.observe(time.monotonic() - start, table=table, operation=operation)
+
+def render_metrics() -> str:
+    """All metrics of this process in the Prometheus text exposition format."""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+def write_metrics_file(path: str) -> None:
+    """Write the metrics through a temporary file, so a scraper never reads a partial file."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}_")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(render_metrics())
+    os.replace(tmp_path, path)
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render_metrics().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"Metrics request from {self.address_string()}: {format % args}")
+
+_exporter_lock = threading.Lock()
+_exporter_started = False
+
+def start_metrics_exporter(port: int = 0, file_path: str = "", host: str = "127.0.0.1") -> None:
+    """Serve /metrics on port and/or rewrite file_path every METRICS_FILE_INTERVAL seconds; only the first call per process acts."""
+    global _exporter_started
+    with _exporter_lock:
+        if _exporter_started or not (port or file_path):
+            return
+        _exporter_started = True
+
+    if port:
+        try:
+            server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+            logger.info(f"Serving Prometheus metrics on http://{host}:{port}/metrics")
+        except OSError as e:
+            logger.warning(f"Could not serve metrics on port {port}: {str(e)}")
+
+    if file_path:
+        def write_periodically() -> None:
+            while True:
+                try:
+                    write_metrics_file(file_path)
+                except Exception as e:
+                    logger.warning(f"Could not write metrics to {file_path}: {str(e)}")
+                time.sleep(METRICS_FILE_INTERVAL)
+
+        threading.Thread(target=write_periodically, name="metrics-file", daemon=True).start()
+        logger.info(f"Writing Prometheus metrics to {file_path} every {METRICS_FILE_INTERVAL}s")
@@ -10,15 +10,32 @@ import chromedriver_autoinstaller
 import os
 import logging
 import shutil
+import functools
+import threading
 import time
 from datetime import datetime
 import re
 from bs4 import BeautifulSoup
-from tenacity import retry, stop_after_attempt, wait_fixed
 from selenium.common.exceptions import ElementNotInteractableException
-from typing import List, Dict
-from config import SUPABASE_URL, SUPABASE_KEY, PROPERTIES, OTA_SOURCES
-from utils import safe_int, safe_float, check_duplicate_guest, get_property_name
+from typing import List, Dict, Iterator, Optional, Tuple
+from config import SUPABASE_URL, SUPABASE_KEY, PROPERTIES, OTA_SOURCES, SYNC_MAX_WORKERS, SYNC_PROPERTY_TIMEOUT, USE_DRIVER_POOL, DRIVER_POOL_SIZE, BROWSER_PROFILE, DRIVER_MAX_USES, DRIVER_ACQUIRE_TIMEOUT, FOLIO_TABS, LIST_MAX_PAGES, SYNC_WORKER_POLL_SECONDS, SYNC_WRITE_BATCH_SIZE, OTABOOKING_PAGE_SIZE, STAYFLEXI_BASE_URL
+from utils import safe_int, safe_float, get_property_name, GuestIndex, text_fingerprint
+from driver_pool import DriverPool, PooledDriver
+from folio_http import FolioHttpFetcher, http_fetch_enabled, parse_financial_lines, folio_fingerprint, folio_was_read, FOLIO_PAGE_URL, FINANCIAL_LABELS
+from folio_extract import extract_folio_fields, trusted_values
+from booking_parser import parse_booking_card
+from folio_tabs import FolioTabPool
+from browser_profile import apply_light_profile, block_resources, is_light_profile
+from page_waits import wait_for_page_settled, wait_for_dom_quiet, wait_for_stable_element, wait_for_new_window, record_wait_timing
+from sync_state import SyncWatermark, ScrapeCheckpoint
+from sync_engine import run_parallel_sync, show_progress, summarize_results, summary_status, STATUS_DONE, STATUS_CANCELLED, FINISHED_STATUSES
+from sync_trace import (span, trace_property, load_runs, active_runs, aggregate_by_property, export_json, STAGE_BROWSER_SETUP, STAGE_LOGIN,
+                        STAGE_DASHBOARD, STAGE_LIST_CAPTURE, STAGE_FOLIO_PLAN, STAGE_FOLIO_HTTP, STAGE_FOLIO_TAB, STAGE_FOLIO_DIRECT,
+                        STAGE_FOLIO_EXTRACT, STAGE_SUPABASE_FINGERPRINTS, STAGE_SUPABASE_PREFETCH, STAGE_SUPABASE_UPSERT,
+                        STAGE_SUPABASE_INSERT_ROW, STAGE_SUPABASE_UPDATE)
+from metrics import (observe_database, SYNC_RUNS, SYNC_DURATION, SYNC_IN_PROGRESS, SYNC_LAST_SUCCESS, BOOKINGS_SCRAPED, BOOKINGS_WRITTEN,
+                     DUPLICATES_SKIPPED, BROWSER_FAILURES)
+from sync_jobs import enqueue_all_properties, run_sync_job, ensure_worker_running, list_jobs, request_cancel, ACTIVE_STATUSES
 
 # Set up logging for debugging
 logging.basicConfig(level=logging.INFO)
@@ -28,13 +45,35 @@ logger = logging.getLogger(__name__)
 CHROME_PROFILE_PATH = os.getenv("CHROME_PROFILE_PATH", f"/tmp/chrome_profile_{int(time.time())}")
 CHROMEDRIVER_PATH = "/tmp/chromedriver/chromedriver"
 
+# Next-page buttons of the reservations list (MUI pagination)
+LIST_NEXT_PAGE_SELECTORS = [
+    "button[aria-label='Go to next page']",
+    "button[aria-label='next page']",
+    "button[title='Go to next page']"
+]
+
+# chromedriver_autoinstaller.install is only run once per process
+_chromedriver_lock = threading.Lock()
+_chromedriver_installed_path = None
+
+def install_chromedriver() -> str:
+    """Install ChromeDriver on first use and return the cached path afterwards."""
+    global _chromedriver_installed_path
+    with _chromedriver_lock:
+        if _chromedriver_installed_path is None:
+            os.makedirs(os.path.dirname(CHROMEDRIVER_PATH), exist_ok=True)
+            chromedriver_path = chromedriver_autoinstaller.install(path=os.path.dirname(CHROMEDRIVER_PATH))
+            logger.info(f"ChromeDriver installed at: {chromedriver_path}")
+            os.chmod(chromedriver_path, 0o755)
+            _chromedriver_installed_path = chromedriver_path
+        return _chromedriver_installed_path
+
 def setup_driver(chrome_profile_path: str) -> webdriver.Chrome:
-    """Set up Chrome WebDriver with a fresh user profile."""
+    """Set up Chrome WebDriver with a fresh user profile, using the light scraping profile unless BROWSER_PROFILE is "full"."""
     try:
         if os.path.exists(chrome_profile_path):
             shutil.rmtree(chrome_profile_path, ignore_errors=True)
         os.makedirs(chrome_profile_path, exist_ok=True)
-        os.makedirs(os.path.dirname(CHROMEDRIVER_PATH), exist_ok=True)
         
         chrome_options = Options()
         chrome_options.add_argument(f"user-data-dir={chrome_profile_path}")
@@ -47,534 +86,507 @@ def setup_driver(chrome_profile_path: str) -> webdriver.Chrome:
         chrome_options.add_argument("--disable-gpu")
         chrome_options.add_argument("--window-size=1920,1080")
         chrome_options.binary_location = "/usr/bin/chromium"
+        if is_light_profile():
+            apply_light_profile(chrome_options)
         
-        chromedriver_path = chromedriver_autoinstaller.install(path=os.path.dirname(CHROMEDRIVER_PATH))
-        logger.info(f"ChromeDriver installed at: {chromedriver_path}")
-        os.chmod(chromedriver_path, 0o755)
-        service = ChromeService(executable_path=chromedriver_path)
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        logger.info("Chrome WebDriver initialized successfully")
+        with span(STAGE_BROWSER_SETUP):
+            service = ChromeService(executable_path=install_chromedriver())
+            driver = webdriver.Chrome(service=service, options=chrome_options)
+            if is_light_profile():
+                block_resources(driver)
+        logger.info(f"Chrome WebDriver initialized successfully ({BROWSER_PROFILE} profile)")
         return driver
     except Exception as e:
         logger.error(f"Failed to set up Chrome WebDriver: {str(e)}")
+        BROWSER_FAILURES.inc(stage="setup")
         st.error(f"Failed to initialize browser: {str(e)}")
         raise
 
+@st.cache_resource
+def get_driver_pool() -> DriverPool:
+    """Process-wide pool of warm browser sessions shared by all Streamlit sessions and sync runs."""
+    return DriverPool(setup_driver, size=DRIVER_POOL_SIZE, max_uses=DRIVER_MAX_USES, profile_root=CHROME_PROFILE_PATH)
+
 def extract_booking_data_from_text(text: str, hotel_id: str) -> Dict[str, str]:
     """Extract booking information including room number and type from text - ENHANCED with source detection"""
-    booking_data = {
-        'name': None,
-        'booking_id': None,
-        'phone': None,
-        'booking_period': None,
-        'booking_source': None,
-        'total_without_taxes': None,
-        'total_tax_amount': None,
-        'total_with_taxes': None,
-        'payment_made': None,
-        'balance_due': None,
-        'room_number': 'N/A',
-        'room_type': 'N/A',
-        'rate_plan': 'N/A',
-        'adults_children_infant': 'N/A',
-        '_original_text': text  # Store for debugging
-    }
-
-    lines = text.split('\n')
-
-    # ENHANCED BOOKING SOURCE DETECTION FROM TEXT
-    text_upper = text.upper()
-    source_found = False
-    
-    # Check for OTA sources in the text with more comprehensive patterns
-    ota_patterns = {
-        'BOOKING.COM': ['BOOKING.COM', 'BOOKING COM', 'BOOKINGCOM', 'BOOKING DOT COM', 'BOOKING_COM'],
-        'AGODA': ['AGODA'],
-        'EXPEDIA': ['EXPEDIA', 'EXPEDIA.COM'],
-        'MAKEMYTRIP': ['MAKEMYTRIP', 'MAKE MY TRIP', 'MMT'],
-        'GOIBIBO': ['GOIBIBO'],
-        'CLEARTRIP': ['CLEARTRIP', 'CLEAR TRIP'],
-        'TRAVELOKA': ['TRAVELOKA'],
-        'AIRBNB': ['AIRBNB'],
-        'HOTELS.COM': ['HOTELS.COM', 'HOTELS COM'],
-        'PRICELINE': ['PRICELINE']
-    }
-    
-    for ota_name, patterns in ota_patterns.items():
-        if any(pattern in text_upper for pattern in patterns):
-            booking_data['booking_source'] = ota_name
-            source_found = True
-            logger.info(f"Booking source detected from text: {ota_name} for booking ID: {booking_data.get('booking_id', 'unknown')}")
-            break
-    
-    if not source_found:
-        # Look for less obvious OTA indicators
-        ota_indicators = ['COMMISSION', 'BOOKING REFERENCE', 'CONFIRMATION CODE', 'CHANNEL', 'PARTNER']
-        if any(indicator in text_upper for indicator in ota_indicators):
-            booking_data['booking_source'] = 'UNKNOWN_OTA'
-            logger.info("Possible OTA booking detected based on text indicators")
-        else:
-            # Check for patterns that might indicate online booking vs walk-in
-            online_indicators = ['ONLINE', 'WEB', 'INTERNET', 'EMAIL', 'CONFIRMED']
-            if any(indicator in text_upper for indicator in online_indicators):
-                booking_data['booking_source'] = 'POSSIBLE_OTA'
-                logger.info("Possible online booking detected")
-
-    # Extract name - should be the first line if it doesn't contain booking patterns
-    if lines and not re.search(r'SFBOOKING|Rs\.|CONFIRMED|ON_HOLD|Mar| - |[0-9]', lines[0]):
-        booking_data['name'] = lines[0].strip()
-
-    # Extract booking ID with specific hotel_id pattern
-    booking_id_match = re.search(rf'SFBOOKING_{hotel_id}_\d+', text)
-    if booking_id_match:
-        booking_data['booking_id'] = booking_id_match.group(0)
-
-    # Extract phone number
-    for line in lines:
-        line = line.strip()
-        if re.match(r'NA|(\+\d{1,3}\s*)?[\d\s()-]{8,}', line):
-            booking_data['phone'] = line
-            break
-
-    # Extract booking period (check-in to check-out dates)
-    date_pattern = r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2},\s+\d{4}\s+\d{1,2}:\d{2}\s+(?:AM|PM)\s+-\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2},\s+\d{4}\s+\d{1,2}:\d{2}\s+(?:AM|PM)'
-    date_match = re.search(date_pattern, text)
-    if date_match:
-        booking_data['booking_period'] = date_match.group(0)
-    else:
-        # Try alternate pattern for dates split across lines
-        for i in range(len(lines) - 1):
-            if " - " in lines[i] and re.search(r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)', lines[i]):
-                booking_data['booking_period'] = f"{lines[i].strip()} - {lines[i+1].strip()}"
-                break
-
-    # Extract room number and type from pattern like "101 (Deluxe Room)"
-    room_pattern = r'(\d+)\s*\(\s*([^)]+)\s*\)'
-    room_match = re.search(room_pattern, text)
-    if room_match:
-        booking_data['room_number'] = room_match.group(1).strip()
-        booking_data['room_type'] = room_match.group(2).strip()
-
+    booking_data = parse_booking_card(text, hotel_id, detect_source=True, keep_text=True)
+    booking_data['card_hash'] = text_fingerprint(text)  # Change detection across syncs
+    if booking_data['booking_source']:
+        logger.info(f"Booking source detected from text: {booking_data['booking_source']} for booking ID: {booking_data.get('booking_id') or 'unknown'}")
     return booking_data
 
-def fetch_folio_details(driver: webdriver.Chrome, wait: WebDriverWait, booking: Dict[str, str], hotel_id: str) -> None:
-    """Navigate to the folio page and fetch financial details, Rate Plan, and Adults/Children/Infant."""
+def expand_folio(driver: webdriver.Chrome, wait: WebDriverWait) -> None:
+    """Open the booking details accordion of the folio page in the current window."""
     try:
-        if booking['booking_id']:
-            folio_url = f"https://app.stayflexi.com/folio/{booking['booking_id']}?hotelId={hotel_id}"
-            logger.info(f"Navigating to folio page for {booking['booking_id']}...")
-            driver.get(folio_url)
-            time.sleep(5)
-
-            # Try to expand accordion on folio page
-            try:
-                expand_button = wait.until(EC.element_to_be_clickable(
-                    (By.CSS_SELECTOR, ".MuiAccordionSummary-expandIconWrapper.css-1fx8m19")))
-                driver.execute_script("arguments[0].scrollIntoView(); arguments[0].click();", expand_button)
-                logger.info("Clicked down arrow button using CSS selector on View Folio page")
-            except Exception as e:
-                logger.warning(f"Could not click down arrow using CSS selector: {str(e)}")
+        expand_button = wait.until(EC.element_to_be_clickable(
+            (By.CSS_SELECTOR, ".MuiAccordionSummary-expandIconWrapper.css-1fx8m19")))
+        driver.execute_script("arguments[0].scrollIntoView(); arguments[0].click();", expand_button)
+        logger.info("Clicked down arrow button using CSS selector on View Folio page")
+    except Exception as e:
+        logger.warning(f"Could not click down arrow using CSS selector: {str(e)}")
 
-            time.sleep(2)
+    wait_for_dom_quiet(driver, "folio_expand", quiet_ms=300)
 
-            # ENHANCED BOOKING SOURCE EXTRACTION
+def find_folio_booking_source(driver: webdriver.Chrome, booking: Dict[str, str]) -> None:
+    """Legacy multi-strategy search for the booking source on the open folio page."""
+    try:
+        booking_source_found = False
+        original_source = booking.get('booking_source')  # Keep original detection
+        
+        # Method 1: Check if we already detected source from original text
+        if original_source and original_source not in ['DIRECT', None]:
+            booking_source_found = True
+            logger.info(f"Using booking source from original text: {original_source}")
+        
+        # Method 2: Look for specific OTA elements on folio page
+        if not booking_source_found:
             try:
-                booking_source_found = False
-                original_source = booking.get('booking_source')  # Keep original detection
-                
-                # Method 1: Check if we already detected source from original text
-                if original_source and original_source not in ['DIRECT', None]:
-                    booking_source_found = True
-                    logger.info(f"Using booking source from original text: {original_source}")
-                
-                # Method 2: Look for specific OTA elements on folio page
-                if not booking_source_found:
-                    try:
-                        # Try different selectors for booking source
-                        source_selectors = [
-                            "div.sourceName",
-                            "[class*='source']",
-                            "[class*='booking']", 
-                            "div[class*='MuiTypography'][class*='body']",
-                            ".css-*[class*='source']"
-                        ]
-                        
-                        for selector in source_selectors:
-                            try:
-                                elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                                for elem in elements:
-                                    text = elem.text.strip().upper()
-                                    if text and any(ota.upper() in text for ota in ['BOOKING', 'AGODA', 'EXPEDIA', 'MAKEMYTRIP', 'GOIBIBO']):
-                                        booking['booking_source'] = text
-                                        booking_source_found = True
-                                        logger.info(f"Booking Source found via CSS selector '{selector}': {booking['booking_source']}")
-                                        break
-                                if booking_source_found:
-                                    break
-                            except Exception as selector_error:
-                                logger.debug(f"Selector '{selector}' failed: {str(selector_error)}")
-                                continue
-                    except Exception as e:
-                        logger.warning(f"CSS selector method failed: {str(e)}")
+                # Try different selectors for booking source
+                source_selectors = [
+                    "div.sourceName",
+                    "[class*='source']",
+                    "[class*='booking']", 
+                    "div[class*='MuiTypography'][class*='body']",
+                    ".css-*[class*='source']"
+                ]
                 
-                # Method 3: Search entire page source for OTA indicators
-                if not booking_source_found:
+                for selector in source_selectors:
                     try:
-                        page_source = driver.page_source.upper()
-                        
-                        # More comprehensive OTA detection patterns
-                        ota_patterns = {
-                            'BOOKING.COM': ['BOOKING.COM', 'BOOKING COM', '"BOOKING"', 'BOOKINGCOM', 'BOOKING_COM'],
-                            'AGODA': ['AGODA', '"AGODA"'],
-                            'EXPEDIA': ['EXPEDIA', '"EXPEDIA"'],
-                            'MAKEMYTRIP': ['MAKEMYTRIP', 'MAKE MY TRIP', '"MAKEMYTRIP"'],
-                            'GOIBIBO': ['GOIBIBO', '"GOIBIBO"'],
-                            'CLEARTRIP': ['CLEARTRIP', '"CLEARTRIP"'],
-                            'TRAVELOKA': ['TRAVELOKA', '"TRAVELOKA"'],
-                            'HOTELS.COM': ['HOTELS.COM', 'HOTELS COM'],
-                            'AIRBNB': ['AIRBNB']
-                        }
-                        
-                        for ota_name, patterns in ota_patterns.items():
-                            if any(pattern in page_source for pattern in patterns):
-                                booking['booking_source'] = ota_name
+                        elements = driver.find_elements(By.CSS_SELECTOR, selector)
+                        for elem in elements:
+                            text = elem.text.strip().upper()
+                            if text and any(ota.upper() in text for ota in ['BOOKING', 'AGODA', 'EXPEDIA', 'MAKEMYTRIP', 'GOIBIBO']):
+                                booking['booking_source'] = text
                                 booking_source_found = True
-                                logger.info(f"Booking Source found in page source: {booking['booking_source']}")
+                                logger.info(f"Booking Source found via CSS selector '{selector}': {booking['booking_source']}")
                                 break
-                    except Exception as e:
-                        logger.warning(f"Page source search failed: {str(e)}")
+                        if booking_source_found:
+                            break
+                    except Exception as selector_error:
+                        logger.debug(f"Selector '{selector}' failed: {str(selector_error)}")
+                        continue
+            except Exception as e:
+                logger.warning(f"CSS selector method failed: {str(e)}")
+        
+        # Method 3: Search entire page source for OTA indicators
+        if not booking_source_found:
+            try:
+                page_source = driver.page_source.upper()
                 
-                # Method 4: Check URL parameters or hidden fields
-                if not booking_source_found:
-                    try:
-                        current_url = driver.current_url.upper()
-                        if 'BOOKING' in current_url or 'AGODA' in current_url:
-                            # Extract from URL if possible
-                            for ota in ['BOOKING', 'AGODA', 'EXPEDIA']:
-                                if ota in current_url:
-                                    booking['booking_source'] = ota + '.COM' if ota != 'AGODA' else ota
-                                    booking_source_found = True
-                                    logger.info(f"Booking Source found in URL: {booking['booking_source']}")
-                                    break
-                    except Exception as e:
-                        logger.warning(f"URL check failed: {str(e)}")
+                # More comprehensive OTA detection patterns
+                ota_patterns = {
+                    'BOOKING.COM': ['BOOKING.COM', 'BOOKING COM', '"BOOKING"', 'BOOKINGCOM', 'BOOKING_COM'],
+                    'AGODA': ['AGODA', '"AGODA"'],
+                    'EXPEDIA': ['EXPEDIA', '"EXPEDIA"'],
+                    'MAKEMYTRIP': ['MAKEMYTRIP', 'MAKE MY TRIP', '"MAKEMYTRIP"'],
+                    'GOIBIBO': ['GOIBIBO', '"GOIBIBO"'],
+                    'CLEARTRIP': ['CLEARTRIP', '"CLEARTRIP"'],
+                    'TRAVELOKA': ['TRAVELOKA', '"TRAVELOKA"'],
+                    'HOTELS.COM': ['HOTELS.COM', 'HOTELS COM'],
+                    'AIRBNB': ['AIRBNB']
+                }
                 
-                # Method 5: Enhanced JavaScript search for booking source
-                if not booking_source_found:
-                    try:
-                        js_source_check = driver.execute_script("""
-                            // Check for data attributes containing source info
-                            const elements = document.querySelectorAll('[data-source], [data-booking-source], input[type="hidden"]');
-                            for (let elem of elements) {
-                                const value = elem.value || elem.dataset.source || elem.dataset.bookingSource || elem.textContent;
-                                if (value && (value.toLowerCase().includes('booking') || value.toLowerCase().includes('agoda') || value.toLowerCase().includes('expedia'))) {
-                                    return value;
-                                }
-                            }
-                            
-                            // Check for any text nodes containing OTA names
-                            const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
-                            let node;
-                            const candidates = [];
-                            
-                            while (node = walker.nextNode()) {
-                                const text = node.textContent.trim().toLowerCase();
-                                if (text.includes('booking.com') || text.includes('agoda') || text.includes('expedia') || 
-                                    text.includes('makemytrip') || text.includes('goibibo')) {
-                                    candidates.push(text);
-                                }
-                            }
-                            
-                            return candidates.length > 0 ? candidates[0] : null;
-                        """)
-                        
-                        if js_source_check:
-                            source_text = js_source_check.upper()
-                            if 'BOOKING' in source_text:
-                                booking['booking_source'] = 'BOOKING.COM'
-                            elif 'AGODA' in source_text:
-                                booking['booking_source'] = 'AGODA'
-                            elif 'EXPEDIA' in source_text:
-                                booking['booking_source'] = 'EXPEDIA'
-                            elif 'MAKEMYTRIP' in source_text:
-                                booking['booking_source'] = 'MAKEMYTRIP'
-                            elif 'GOIBIBO' in source_text:
-                                booking['booking_source'] = 'GOIBIBO'
-                            else:
-                                booking['booking_source'] = source_text[:50]  # Limit length
+                for ota_name, patterns in ota_patterns.items():
+                    if any(pattern in page_source for pattern in patterns):
+                        booking['booking_source'] = ota_name
+                        booking_source_found = True
+                        logger.info(f"Booking Source found in page source: {booking['booking_source']}")
+                        break
+            except Exception as e:
+                logger.warning(f"Page source search failed: {str(e)}")
+        
+        # Method 4: Check URL parameters or hidden fields
+        if not booking_source_found:
+            try:
+                current_url = driver.current_url.upper()
+                if 'BOOKING' in current_url or 'AGODA' in current_url:
+                    # Extract from URL if possible
+                    for ota in ['BOOKING', 'AGODA', 'EXPEDIA']:
+                        if ota in current_url:
+                            booking['booking_source'] = ota + '.COM' if ota != 'AGODA' else ota
                             booking_source_found = True
-                            logger.info(f"Booking Source found via JavaScript: {booking['booking_source']}")
-                    except Exception as e:
-                        logger.warning(f"JavaScript source check failed: {str(e)}")
-                
-                # Method 6: Debug logging - capture page content for analysis
-                if not booking_source_found:
-                    try:
-                        # Log detailed page information for debugging
-                        logger.warning(f"Could not find booking source for {booking['booking_id']} - logging debug info")
-                        logger.info(f"Page title: {driver.title}")
-                        logger.info(f"Current URL: {driver.current_url}")
-                        
-                        # Get all visible text elements for analysis
-                        visible_elements = driver.find_elements(By.XPATH, "//*[not(self::script or self::style)][string-length(normalize-space(text())) > 0]")
-                        visible_texts = []
-                        
-                        for elem in visible_elements[:20]:  # First 20 elements
-                            try:
-                                text = elem.text.strip()
-                                if text and len(text) < 100:  # Reasonable length
-                                    visible_texts.append(text)
-                            except:
-                                continue
-                        
-                        logger.info(f"Visible page elements: {visible_texts}")
-                        
-                        # Try to get some page content for debugging
-                        try:
-                            body_text = driver.find_element(By.TAG_NAME, "body").text
-                            # Look for any potential OTA indicators in the full text
-                            body_upper = body_text.upper()
-                            potential_sources = []
-                            
-                            for word in ['BOOKING', 'AGODA', 'EXPEDIA', 'MAKEMYTRIP', 'GOIBIBO', 'CHANNEL', 'SOURCE']:
-                                if word in body_upper:
-                                    # Get context around the word
-                                    start_idx = max(0, body_upper.find(word) - 50)
-                                    end_idx = min(len(body_text), body_upper.find(word) + 50)
-                                    context = body_text[start_idx:end_idx]
-                                    potential_sources.append(f"{word}: ...{context}...")
-                            
-                            if potential_sources:
-                                logger.info(f"Potential source contexts found: {potential_sources}")
-                            else:
-                                logger.info("No obvious OTA indicators found in page text")
-                                
-                        except Exception as debug_error:
-                            logger.warning(f"Debug content extraction failed: {str(debug_error)}")
-                        
-                        # For now, don't default to DIRECT - leave as None/original for investigation
-                        if not booking.get('booking_source') or booking['booking_source'] in ['DIRECT']:
-                            booking['booking_source'] = None  # Will be handled in is_ota_booking function
-                            
-                    except Exception as debug_error:
-                        logger.error(f"Debug logging failed: {str(debug_error)}")
-                        
+                            logger.info(f"Booking Source found in URL: {booking['booking_source']}")
+                            break
             except Exception as e:
-                logger.error(f"Error in booking source extraction: {str(e)}")
-                # Don't override existing source detection from text
-                if not booking.get('booking_source'):
-                    booking['booking_source'] = None
-
-            # Improved Rate Plan extraction with multiple strategies
+                logger.warning(f"URL check failed: {str(e)}")
+        
+        # Method 5: Enhanced JavaScript search for booking source
+        if not booking_source_found:
             try:
-                # Strategy 1: Look for text content that contains rate plan information
-                rate_plan_found = False
+                js_source_check = driver.execute_script("""
+                    // Check for data attributes containing source info
+                    const elements = document.querySelectorAll('[data-source], [data-booking-source], input[type="hidden"]');
+                    for (let elem of elements) {
+                        const value = elem.value || elem.dataset.source || elem.dataset.bookingSource || elem.textContent;
+                        if (value && (value.toLowerCase().includes('booking') || value.toLowerCase().includes('agoda') || value.toLowerCase().includes('expedia'))) {
+                            return value;
+                        }
+                    }
+                    
+                    // Check for any text nodes containing OTA names
+                    const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+                    let node;
+                    const candidates = [];
+                    
+                    while (node = walker.nextNode()) {
+                        const text = node.textContent.trim().toLowerCase();
+                        if (text.includes('booking.com') || text.includes('agoda') || text.includes('expedia') || 
+                            text.includes('makemytrip') || text.includes('goibibo')) {
+                            candidates.push(text);
+                        }
+                    }
+                    
+                    return candidates.length > 0 ? candidates[0] : null;
+                """)
                 
-                # Try to find elements containing "Plan" or "Rate" text
-                potential_rate_elements = driver.find_elements(By.XPATH, 
-                    "//div[contains(text(), 'Plan') or contains(text(), 'Rate') or contains(text(), 'Standard') or contains(text(), 'Flexible')]")
+                if js_source_check:
+                    source_text = js_source_check.upper()
+                    if 'BOOKING' in source_text:
+                        booking['booking_source'] = 'BOOKING.COM'
+                    elif 'AGODA' in source_text:
+                        booking['booking_source'] = 'AGODA'
+                    elif 'EXPEDIA' in source_text:
+                        booking['booking_source'] = 'EXPEDIA'
+                    elif 'MAKEMYTRIP' in source_text:
+                        booking['booking_source'] = 'MAKEMYTRIP'
+                    elif 'GOIBIBO' in source_text:
+                        booking['booking_source'] = 'GOIBIBO'
+                    else:
+                        booking['booking_source'] = source_text[:50]  # Limit length
+                    booking_source_found = True
+                    logger.info(f"Booking Source found via JavaScript: {booking['booking_source']}")
+            except Exception as e:
+                logger.warning(f"JavaScript source check failed: {str(e)}")
+        
+        # Method 6: Debug logging - capture page content for analysis
+        if not booking_source_found:
+            try:
+                # Log detailed page information for debugging
+                logger.warning(f"Could not find booking source for {booking['booking_id']} - logging debug info")
+                logger.info(f"Page title: {driver.title}")
+                logger.info(f"Current URL: {driver.current_url}")
                 
-                for elem in potential_rate_elements:
-                    text = elem.text.strip()
-                    # Skip elements that look like labels or contain unwanted text
-                    if text and not any(skip_word in text.lower() for skip_word in ['add', 'view', 'booking', 'notes', '(0)']):
-                        # Check if this looks like a rate plan (contains "Plan" or is a simple text)
-                        if 'plan' in text.lower() or re.match(r'^[A-Za-z\s]+$', text):
-                            booking['rate_plan'] = text
-                            rate_plan_found = True
-                            logger.info(f"Rate Plan found via content search: {booking['rate_plan']}")
-                            break
+                # Get all visible text elements for analysis
+                visible_elements = driver.find_elements(By.XPATH, "//*[not(self::script or self::style)][string-length(normalize-space(text())) > 0]")
+                visible_texts = []
                 
-                # Strategy 2: If not found, try the original XPath as fallback
-                if not rate_plan_found:
+                for elem in visible_elements[:20]:  # First 20 elements
                     try:
-                        rate_plan_elem = driver.find_element(By.XPATH, "//*[@id='panel1a-content']/div/div/div[1]/div/div[8]/div/div[2]")
-                        text = rate_plan_elem.text.strip()
-                        if text and not any(skip_word in text.lower() for skip_word in ['add', 'view', 'booking', 'notes', '(0)']):
-                            booking['rate_plan'] = text
-                            rate_plan_found = True
-                            logger.info(f"Rate Plan found via original XPath: {booking['rate_plan']}")
-                    except Exception:
-                        pass
+                        text = elem.text.strip()
+                        if text and len(text) < 100:  # Reasonable length
+                            visible_texts.append(text)
+                    except:
+                        continue
                 
-                # Strategy 3: Use JavaScript to search through all text nodes
-                if not rate_plan_found:
-                    try:
-                        js_rate_plan = driver.execute_script("""
-                            function findRatePlan() {
-                                const walker = document.createTreeWalker(
-                                    document.getElementById('panel1a-content') || document.body,
-                                    NodeFilter.SHOW_TEXT,
-                                    null,
-                                    false
-                                );
-                                
-                                let node;
-                                const candidates = [];
-                                
-                                while (node = walker.nextNode()) {
-                                    const text = node.textContent.trim();
-                                    if (text && 
-                                        (text.includes('Plan') || text.includes('Standard') || text.includes('Flexible')) &&
-                                        !text.includes('Add') && 
-                                        !text.includes('View') && 
-                                        !text.includes('booking') &&
-                                        !text.includes('(0)') &&
-                                        text.length < 50) {
-                                        candidates.push(text);
-                                    }
-                                }
-                                
-                                return candidates.length > 0 ? candidates[0] : null;
-                            }
-                            return findRatePlan();
-                        """)
+                logger.info(f"Visible page elements: {visible_texts}")
+                
+                # Try to get some page content for debugging
+                try:
+                    body_text = driver.find_element(By.TAG_NAME, "body").text
+                    # Look for any potential OTA indicators in the full text
+                    body_upper = body_text.upper()
+                    potential_sources = []
+                    
+                    for word in ['BOOKING', 'AGODA', 'EXPEDIA', 'MAKEMYTRIP', 'GOIBIBO', 'CHANNEL', 'SOURCE']:
+                        if word in body_upper:
+                            # Get context around the word
+                            start_idx = max(0, body_upper.find(word) - 50)
+                            end_idx = min(len(body_text), body_upper.find(word) + 50)
+                            context = body_text[start_idx:end_idx]
+                            potential_sources.append(f"{word}: ...{context}...")
+                    
+                    if potential_sources:
+                        logger.info(f"Potential source contexts found: {potential_sources}")
+                    else:
+                        logger.info("No obvious OTA indicators found in page text")
                         
-                        if js_rate_plan:
-                            booking['rate_plan'] = js_rate_plan
-                            rate_plan_found = True
-                            logger.info(f"Rate Plan found via JavaScript: {booking['rate_plan']}")
-                    except Exception as js_e:
-                        logger.warning(f"JavaScript rate plan search failed: {str(js_e)}")
+                except Exception as debug_error:
+                    logger.warning(f"Debug content extraction failed: {str(debug_error)}")
                 
-                if not rate_plan_found:
-                    booking['rate_plan'] = 'N/A'
-                    logger.warning("Could not find Rate Plan using any method")
+                # For now, don't default to DIRECT - leave as None/original for investigation
+                if not booking.get('booking_source') or booking['booking_source'] in ['DIRECT']:
+                    booking['booking_source'] = None  # Will be handled in is_ota_booking function
                     
-            except Exception as e:
-                booking['rate_plan'] = 'N/A'
-                logger.warning(f"Error in rate plan extraction: {str(e)}")
+            except Exception as debug_error:
+                logger.error(f"Debug logging failed: {str(debug_error)}")
+                
+    except Exception as e:
+        logger.error(f"Error in booking source extraction: {str(e)}")
+        # Don't override existing source detection from text
+        if not booking.get('booking_source'):
+            booking['booking_source'] = None
 
-            # Enhanced Adults/Children/Infant extraction with multiple strategies
+def find_folio_rate_plan(driver: webdriver.Chrome, booking: Dict[str, str]) -> None:
+    """Legacy multi-strategy search for the Rate Plan on the open folio page."""
+    try:
+        # Strategy 1: Look for text content that contains rate plan information
+        rate_plan_found = False
+        
+        # Try to find elements containing "Plan" or "Rate" text
+        potential_rate_elements = driver.find_elements(By.XPATH, 
+            "//div[contains(text(), 'Plan') or contains(text(), 'Rate') or contains(text(), 'Standard') or contains(text(), 'Flexible')]")
+        
+        for elem in potential_rate_elements:
+            text = elem.text.strip()
+            # Skip elements that look like labels or contain unwanted text
+            if text and not any(skip_word in text.lower() for skip_word in ['add', 'view', 'booking', 'notes', '(0)']):
+                # Check if this looks like a rate plan (contains "Plan" or is a simple text)
+                if 'plan' in text.lower() or re.match(r'^[A-Za-z\s]+$', text):
+                    booking['rate_plan'] = text
+                    rate_plan_found = True
+                    logger.info(f"Rate Plan found via content search: {booking['rate_plan']}")
+                    break
+        
+        # Strategy 2: If not found, try the original XPath as fallback
+        if not rate_plan_found:
             try:
-                adults_children_found = False
-                
-                # Strategy 1: Look specifically for numeric patterns like "7/0/0" and exclude field labels
-                numeric_pattern_elements = driver.find_elements(By.XPATH, "//*[text()]")
+                rate_plan_elem = driver.find_element(By.XPATH, "//*[@id='panel1a-content']/div/div/div[1]/div/div[8]/div/div[2]")
+                text = rate_plan_elem.text.strip()
+                if text and not any(skip_word in text.lower() for skip_word in ['add', 'view', 'booking', 'notes', '(0)']):
+                    booking['rate_plan'] = text
+                    rate_plan_found = True
+                    logger.info(f"Rate Plan found via original XPath: {booking['rate_plan']}")
+            except Exception:
+                pass
+        
+        # Strategy 3: Use JavaScript to search through all text nodes
+        if not rate_plan_found:
+            try:
+                js_rate_plan = driver.execute_script("""
+                    function findRatePlan() {
+                        const walker = document.createTreeWalker(
+                            document.getElementById('panel1a-content') || document.body,
+                            NodeFilter.SHOW_TEXT,
+                            null,
+                            false
+                        );
+                        
+                        let node;
+                        const candidates = [];
+                        
+                        while (node = walker.nextNode()) {
+                            const text = node.textContent.trim();
+                            if (text && 
+                                (text.includes('Plan') || text.includes('Standard') || text.includes('Flexible')) &&
+                                !text.includes('Add') && 
+                                !text.includes('View') && 
+                                !text.includes('booking') &&
+                                !text.includes('(0)') &&
+                                text.length < 50) {
+                                candidates.push(text);
+                            }
+                        }
+                        
+                        return candidates.length > 0 ? candidates[0] : null;
+                    }
+                    return findRatePlan();
+                """)
                 
-                for elem in numeric_pattern_elements:
-                    text = elem.text.strip()
-                    # Look for exact numeric patterns and exclude field labels
-                    if re.match(r'^\d+/\d+/\d+$', text):
-                        booking['adults_children_infant'] = text
+                if js_rate_plan:
+                    booking['rate_plan'] = js_rate_plan
+                    rate_plan_found = True
+                    logger.info(f"Rate Plan found via JavaScript: {booking['rate_plan']}")
+            except Exception as js_e:
+                logger.warning(f"JavaScript rate plan search failed: {str(js_e)}")
+        
+        if not rate_plan_found:
+            booking['rate_plan'] = 'N/A'
+            logger.warning("Could not find Rate Plan using any method")
+            
+    except Exception as e:
+        booking['rate_plan'] = 'N/A'
+        logger.warning(f"Error in rate plan extraction: {str(e)}")
+
+def find_folio_occupancy(driver: webdriver.Chrome, booking: Dict[str, str]) -> None:
+    """Legacy multi-strategy search for Adults/Children/Infant on the open folio page."""
+    try:
+        adults_children_found = False
+        
+        # Strategy 1: Look specifically for numeric patterns like "7/0/0" and exclude field labels
+        numeric_pattern_elements = driver.find_elements(By.XPATH, "//*[text()]")
+        
+        for elem in numeric_pattern_elements:
+            text = elem.text.strip()
+            # Look for exact numeric patterns and exclude field labels
+            if re.match(r'^\d+/\d+/\d+$', text):
+                booking['adults_children_infant'] = text
+                adults_children_found = True
+                logger.info(f"Adults/Children/Infant found via exact numeric pattern: {booking['adults_children_infant']}")
+                break
+            # Also check for single numbers that might represent guest count
+            elif re.match(r'^\d+$', text) and int(text) <= 20 and int(text) > 0:
+                # Look at the parent/sibling elements to see if this is guest-related
+                try:
+                    parent_text = elem.find_element(By.XPATH, "./..").text.lower()
+                    if any(keyword in parent_text for keyword in ['guest', 'adult', 'pax', 'occupancy']):
+                        booking['adults_children_infant'] = f"{text}/0/0"
                         adults_children_found = True
-                        logger.info(f"Adults/Children/Infant found via exact numeric pattern: {booking['adults_children_infant']}")
+                        logger.info(f"Adults/Children/Infant found via single guest count: {booking['adults_children_infant']}")
                         break
-                    # Also check for single numbers that might represent guest count
-                    elif re.match(r'^\d+$', text) and int(text) <= 20 and int(text) > 0:
-                        # Look at the parent/sibling elements to see if this is guest-related
-                        try:
-                            parent_text = elem.find_element(By.XPATH, "./..").text.lower()
-                            if any(keyword in parent_text for keyword in ['guest', 'adult', 'pax', 'occupancy']):
-                                booking['adults_children_infant'] = f"{text}/0/0"
-                                adults_children_found = True
-                                logger.info(f"Adults/Children/Infant found via single guest count: {booking['adults_children_infant']}")
-                                break
-                        except Exception:
-                            pass
-                
-                # Strategy 2: Enhanced JavaScript search with better filtering
-                if not adults_children_found:
-                    try:
-                        js_adults_children = driver.execute_script("""
-                            function findAdultsChildren() {
-                                const walker = document.createTreeWalker(
-                                    document.body,
-                                    NodeFilter.SHOW_TEXT,
-                                    null,
-                                    false
-                                );
-                                
-                                let node;
-                                const candidates = [];
-                                
-                                while (node = walker.nextNode()) {
-                                    const text = node.textContent.trim();
-                                    
-                                    // Pattern 1: Exact X/Y/Z format (highest priority)
-                                    if (/^\\d+\\/\\d+\\/\\d+$/.test(text)) {
-                                        candidates.push({text: text, priority: 1});
-                                    }
-                                    // Pattern 2: Single digit that might be guest count
-                                    else if (/^\\d+$/.test(text) && parseInt(text) <= 20 && parseInt(text) > 0) {
-                                        const parentText = node.parentElement ? node.parentElement.textContent.toLowerCase() : '';
-                                        if (parentText.includes('guest') || parentText.includes('adult') || parentText.includes('pax')) {
-                                            candidates.push({text: text + '/0/0', priority: 2});
-                                        }
-                                    }
+                except Exception:
+                    pass
+        
+        # Strategy 2: Enhanced JavaScript search with better filtering
+        if not adults_children_found:
+            try:
+                js_adults_children = driver.execute_script("""
+                    function findAdultsChildren() {
+                        const walker = document.createTreeWalker(
+                            document.body,
+                            NodeFilter.SHOW_TEXT,
+                            null,
+                            false
+                        );
+                        
+                        let node;
+                        const candidates = [];
+                        
+                        while (node = walker.nextNode()) {
+                            const text = node.textContent.trim();
+                            
+                            // Pattern 1: Exact X/Y/Z format (highest priority)
+                            if (/^\\d+\\/\\d+\\/\\d+$/.test(text)) {
+                                candidates.push({text: text, priority: 1});
+                            }
+                            // Pattern 2: Single digit that might be guest count
+                            else if (/^\\d+$/.test(text) && parseInt(text) <= 20 && parseInt(text) > 0) {
+                                const parentText = node.parentElement ? node.parentElement.textContent.toLowerCase() : '';
+                                if (parentText.includes('guest') || parentText.includes('adult') || parentText.includes('pax')) {
+                                    candidates.push({text: text + '/0/0', priority: 2});
                                 }
-                                
-                                // Filter out field labels
-                                const filtered = candidates.filter(c => {
-                                    const lowerText = c.text.toLowerCase();
-                                    return (!lowerText.includes('adult') && 
-                                           !lowerText.includes('child') && 
-                                           !lowerText.includes('infant')) ||
-                                           /^\\d+\\/\\d+\\/\\d+$/.test(c.text) ||
-                                           /^\\d+\\/0\\/0$/.test(c.text);
-                                });
-                                
-                                // Sort by priority and return best match
-                                filtered.sort((a, b) => a.priority - b.priority);
-                                return filtered.length > 0 ? filtered[0].text : null;
                             }
-                            return findAdultsChildren();
-                        """)
+                        }
                         
-                        if js_adults_children and 'adult' not in js_adults_children.lower():
-                            booking['adults_children_infant'] = js_adults_children
-                            adults_children_found = True
-                            logger.info(f"Adults/Children/Infant found via enhanced JavaScript: {booking['adults_children_infant']}")
-                    except Exception as js_e:
-                        logger.warning(f"Enhanced JavaScript adults/children search failed: {str(js_e)}")
-                
-                # Strategy 3: Try original XPath but validate it's not a field label
-                if not adults_children_found:
-                    try:
-                        adults_children_elem = driver.find_element(By.XPATH, "//*[@id='panel1a-content']/div/div/div[2]/div/div[8]/div/div[2]")
-                        text = adults_children_elem.text.strip()
-                        # Validate it's not a field label and contains actual numeric data
-                        if (text and 
-                            not any(skip_word in text.lower() for skip_word in ['add', 'view', 'booking', 'notes', '(0)', 'adults', 'children', 'infant']) and
-                            (re.search(r'\d+/\d+/\d+', text) or re.match(r'^\d+$', text))):
-                            if re.match(r'^\d+$', text):
-                                text = f"{text}/0/0"  # Convert single number to format
-                            booking['adults_children_infant'] = text
-                            adults_children_found = True
-                            logger.info(f"Adults/Children/Infant found via original XPath: {booking['adults_children_infant']}")
-                    except Exception:
-                        pass
+                        // Filter out field labels
+                        const filtered = candidates.filter(c => {
+                            const lowerText = c.text.toLowerCase();
+                            return (!lowerText.includes('adult') && 
+                                   !lowerText.includes('child') && 
+                                   !lowerText.includes('infant')) ||
+                                   /^\\d+\\/\\d+\\/\\d+$/.test(c.text) ||
+                                   /^\\d+\\/0\\/0$/.test(c.text);
+                        });
+                        
+                        // Sort by priority and return best match
+                        filtered.sort((a, b) => a.priority - b.priority);
+                        return filtered.length > 0 ? filtered[0].text : null;
+                    }
+                    return findAdultsChildren();
+                """)
                 
-                if not adults_children_found:
-                    booking['adults_children_infant'] = '1/0/0'  # Default to 1 adult instead of N/A
-                    logger.warning("Could not find Adults/Children/Infant using any method, defaulting to 1/0/0")
-                    
-            except Exception as e:
-                booking['adults_children_infant'] = '1/0/0'  # Default to 1 adult instead of N/A
-                logger.warning(f"Error in adults/children extraction, defaulting to 1/0/0: {str(e)}")
-
-            # Extract financial details
+                if js_adults_children and 'adult' not in js_adults_children.lower():
+                    booking['adults_children_infant'] = js_adults_children
+                    adults_children_found = True
+                    logger.info(f"Adults/Children/Infant found via enhanced JavaScript: {booking['adults_children_infant']}")
+            except Exception as js_e:
+                logger.warning(f"Enhanced JavaScript adults/children search failed: {str(js_e)}")
+        
+        # Strategy 3: Try original XPath but validate it's not a field label
+        if not adults_children_found:
             try:
-                financial_section = wait.until(EC.presence_of_element_located(
-                    (By.XPATH, "//*[@id='kt_content']/div/div/div[1]/div/div[2]/div/div[2]/div")))
-                financial_text = financial_section.text.strip().split('\n')
-
-                for i, line in enumerate(financial_text):
-                    if "Total without taxes" in line:
-                        booking['total_without_taxes'] = re.sub(r'(INR|Rs\.)\s*', '', financial_text[i + 1].strip())
-                    elif "Total tax amount" in line:
-                        booking['total_tax_amount'] = re.sub(r'(INR|Rs\.)\s*', '', financial_text[i + 1].strip())
-                    elif "Total with taxes and fees" in line:
-                        booking['total_with_taxes'] = re.sub(r'(INR|Rs\.)\s*', '', financial_text[i + 1].strip())
-                    elif "Payment made" in line:
-                        booking['payment_made'] = re.sub(r'(INR|Rs\.)\s*', '', financial_text[i + 1].strip())
-                    elif "Balance due" in line:
-                        booking['balance_due'] = re.sub(r'(INR|Rs\.)\s*', '', financial_text[i + 1].strip())
-
-                logger.info(f"Financial details extracted for {booking['booking_id']}")
-            except Exception as e:
-                logger.warning(f"Could not fetch financial details: {str(e)}")
-                
+                adults_children_elem = driver.find_element(By.XPATH, "//*[@id='panel1a-content']/div/div/div[2]/div/div[8]/div/div[2]")
+                text = adults_children_elem.text.strip()
+                # Validate it's not a field label and contains actual numeric data
+                if (text and 
+                    not any(skip_word in text.lower() for skip_word in ['add', 'view', 'booking', 'notes', '(0)', 'adults', 'children', 'infant']) and
+                    (re.search(r'\d+/\d+/\d+', text) or re.match(r'^\d+$', text))):
+                    if re.match(r'^\d+$', text):
+                        text = f"{text}/0/0"  # Convert single number to format
+                    booking['adults_children_infant'] = text
+                    adults_children_found = True
+                    logger.info(f"Adults/Children/Infant found via original XPath: {booking['adults_children_infant']}")
+            except Exception:
+                pass
+        
+        if not adults_children_found:
+            booking['adults_children_infant'] = '1/0/0'  # Default to 1 adult instead of N/A
+            logger.warning("Could not find Adults/Children/Infant using any method, defaulting to 1/0/0")
+            
+    except Exception as e:
+        booking['adults_children_infant'] = '1/0/0'  # Default to 1 adult instead of N/A
+        logger.warning(f"Error in adults/children extraction, defaulting to 1/0/0: {str(e)}")
+
+def find_folio_financials(driver: webdriver.Chrome, booking: Dict[str, str]) -> None:
+    """Read the folio financial block through its XPath."""
+    try:
+        financial_section = wait_for_stable_element(
+            driver, (By.XPATH, "//*[@id='kt_content']/div/div/div[1]/div/div[2]/div/div[2]/div"), "folio_financials")
+        financial_text = financial_section.text.strip().split('\n')
+        booking.update(parse_financial_lines(financial_text))
+
+        logger.info(f"Financial details extracted for {booking['booking_id']}")
+    except Exception as e:
+        logger.warning(f"Could not fetch financial details: {str(e)}")
+
+def extract_folio_details(driver: webdriver.Chrome, wait: WebDriverWait, booking: Dict[str, str]) -> None:
+    """Read booking source, Rate Plan, Adults/Children/Infant and financial details from the open folio page.
+
+    One script call reads every field with a confidence marker; the slower legacy strategies only
+    run for fields it could not find with at least medium confidence, and a low-confidence script
+    value is kept when they find nothing either.
+    """
+    try:
+        fields = extract_folio_fields(driver)
+        trusted = trusted_values(fields)
+        low = {key: field["value"] for key, field in fields.items() if key not in trusted}
+        legacy = []
+
+        # Booking source detected from the card text wins, as in the HTTP path
+        original_source = booking.get('booking_source')
+        if original_source and original_source not in ['DIRECT', None]:
+            logger.info(f"Using booking source from original text: {original_source}")
+        elif 'booking_source' in trusted:
+            booking['booking_source'] = trusted['booking_source']
+        else:
+            legacy.append('booking_source')
+            find_folio_booking_source(driver, booking)
+            if not booking.get('booking_source') and low.get('booking_source'):
+                booking['booking_source'] = low['booking_source']
+
+        if 'rate_plan' in trusted:
+            booking['rate_plan'] = trusted['rate_plan']
+        else:
+            legacy.append('rate_plan')
+            find_folio_rate_plan(driver, booking)
+            if booking.get('rate_plan') == 'N/A' and low.get('rate_plan'):
+                booking['rate_plan'] = low['rate_plan']
+
+        if 'adults_children_infant' in trusted:
+            booking['adults_children_infant'] = trusted['adults_children_infant']
+        else:
+            legacy.append('adults_children_infant')
+            find_folio_occupancy(driver, booking)
+            if low.get('adults_children_infant') and booking.get('adults_children_infant') == '1/0/0':
+                booking['adults_children_infant'] = low['adults_children_infant']
+
+        financial_keys = list(FINANCIAL_LABELS.values())
+        booking.update({key: trusted[key] for key in financial_keys if key in trusted})
+        if not all(key in trusted for key in financial_keys):
+            legacy.append('financials')
+            find_folio_financials(driver, booking)
+            for key in financial_keys:
+                if not booking.get(key) and low.get(key):
+                    booking[key] = low[key]
+
+        logger.info(f"Successfully extracted folio details for {booking['booking_id']} (script: {sorted(trusted)}, legacy: {legacy or 'none'})")
+    except Exception as e:
+        logger.error(f"Error extracting folio details for {booking.get('booking_id')}: {str(e)}")
+
+def read_open_folio(driver: webdriver.Chrome, wait: WebDriverWait, booking: Dict[str, str]) -> None:
+    """Expand and read a folio page that has already loaded in the current window."""
+    expand_folio(driver, wait)
+    with span(STAGE_FOLIO_EXTRACT):
+        extract_folio_details(driver, wait, booking)
+
+def fetch_folio_details(driver: webdriver.Chrome, wait: WebDriverWait, booking: Dict[str, str], hotel_id: str) -> None:
+    """Navigate to the folio page and fetch financial details, Rate Plan, and Adults/Children/Infant."""
+    try:
+        if booking['booking_id']:
+            folio_url = FOLIO_PAGE_URL.format(booking_id=booking['booking_id'], hotel_id=hotel_id)
+            logger.info(f"Navigating to folio page for {booking['booking_id']}...")
+            driver.get(folio_url)
+            wait_for_page_settled(driver, "folio_load")
+            read_open_folio(driver, wait, booking)
             logger.info(f"Successfully fetched folio details for {booking['booking_id']}")
         else:
             logger.warning("No booking ID found, skipping folio fetch")
@@ -582,17 +594,75 @@ def fetch_folio_details(driver: webdriver.Chrome, wait: WebDriverWait, booking:
     except Exception as e:
         logger.error(f"Error fetching folio details: {str(e)}")
 
-@retry(stop=stop_after_attempt(3), wait=wait_fixed(2))
-def fetch_and_display_bookings(driver: webdriver.Chrome, wait: WebDriverWait, hotel_id: str) -> List[Dict[str, str]]:
-    """Fetch and display all booking information entries - using logic from Daily_DMS_All.py"""
-    property_name = get_property_name(hotel_id) or "Unknown"
-    st.write(f"Fetching all booking information entries for {property_name}...")
-    bookings = []
-    current_url = driver.current_url
+def extract_all_cards(driver: webdriver.Chrome, quiet_ms: int = 300, max_ms: int = 5000) -> Optional[List[Dict[str, str]]]:
+    """Expand every booking accordion and read all card summaries in a single asynchronous script call.
+
+    Returns one {text, bookingId, roomNumber, roomType} object per card, an empty list if the page
+    has no cards, or None if the script failed so the caller can fall back to per-card extraction.
+    """
+    js_extract_cards = """
+    const done = arguments[arguments.length - 1];
+    const quietMs = arguments[0], maxMs = arguments[1];
+    const accordions = Array.from(document.querySelectorAll('div.MuiAccordion-root'))
+        .filter(acc => acc.querySelector('div.MuiAccordionSummary-content'));
+
+    const collect = () => done(accordions.map(acc => {
+        const text = (acc.querySelector('div.MuiAccordionSummary-content').innerText || '').trim();
+        const id = text.match(/SFBOOKING_\\d+_\\d+/);
+        const room = text.match(/(\\d+)\\s*\\(\\s*([^)]+)\\s*\\)/);
+        return {text: text, bookingId: id ? id[0] : null, roomNumber: room ? room[1] : null, roomType: room ? room[2].trim() : null};
+    }).filter(card => card.text));
+
+    // Expand collapsed cards, then wait once for the DOM to go quiet before reading them all
+    let clicked = 0;
+    for (const acc of accordions) {
+        const summary = acc.querySelector('div.MuiAccordionSummary-root');
+        if (summary && acc.querySelector('div.MuiCollapse-root.MuiCollapse-hidden')) {
+            summary.click();
+            clicked++;
+        }
+    }
+    if (!clicked) { collect(); return; }
 
-    time.sleep(8)
+    const start = performance.now();
+    let lastMutation = start;
+    const observer = new MutationObserver(() => { lastMutation = performance.now(); });
+    observer.observe(document.body, {subtree: true, childList: true, attributes: true, characterData: true});
+    const timer = setInterval(() => {
+        const now = performance.now();
+        if (now - lastMutation >= quietMs || now - start >= maxMs) {
+            clearInterval(timer);
+            observer.disconnect();
+            collect();
+        }
+    }, 50);
+    """
+    start = time.monotonic()
+    try:
+        cards = driver.execute_async_script(js_extract_cards, quiet_ms, max_ms)
+    except Exception as e:
+        logger.warning(f"Bulk card extraction failed, falling back to per-card extraction: {str(e)}")
+        return None
+    finally:
+        record_wait_timing("card_bulk_extract", time.monotonic() - start)
+    return cards if isinstance(cards, list) else None
+
+def capture_booking_texts(driver: webdriver.Chrome, wait: WebDriverWait, property_name: str) -> Tuple[List[str], bool]:
+    """First pass over the reservations list: expand every booking card and return its summary text.
+
+    The second value tells whether any booking cards were found at all.
+    """
+    wait_for_page_settled(driver, "reservations_list")
+
+    # One script call for all cards; the per-card WebDriver loop below is the fallback
+    cards = extract_all_cards(driver)
+    if cards is not None:
+        # An empty list means the script ran and the page has no cards
+        st.write(f"Found {len(cards)} booking entries in one pass for {property_name}")
+        for i, card in enumerate(cards):
+            logger.info(f"Card #{i+1}: {card.get('bookingId')} room {card.get('roomNumber')} ({card.get('roomType')})")
+        return [card['text'] for card in cards], bool(cards)
 
-    # Store all booking texts first, then process them
     booking_texts = []
     
     try:
@@ -610,7 +680,7 @@ def fetch_and_display_bookings(driver: webdriver.Chrome, wait: WebDriverWait, ho
             logger.warning(f"Could not find booking entries with MuiAccordionSummary-expanded: {str(e)}")
             booking_cards = []
 
-    # First pass: Extract all booking texts without navigating away
+    # Extract all booking texts without navigating away
     for i, card in enumerate(booking_cards):
         st.write(f"Extracting text from booking #{i+1} for {property_name}:")
         try:
@@ -619,7 +689,7 @@ def fetch_and_display_bookings(driver: webdriver.Chrome, wait: WebDriverWait, ho
                 logger.info("Element is collapsed, attempting to expand...")
                 accordion_button = card.find_element(By.XPATH, "./preceding-sibling::div[contains(@class, 'MuiAccordionSummary-root')]")
                 driver.execute_script("arguments[0].scrollIntoView(); arguments[0].click();", accordion_button)
-                time.sleep(2)
+                wait_for_dom_quiet(driver, "card_expand", quiet_ms=300)
 
             # Get the accordion container and extract text
             accordion = card.find_element(By.XPATH, "./ancestor::div[contains(@class, 'MuiAccordion-root')]")
@@ -637,55 +707,208 @@ def fetch_and_display_bookings(driver: webdriver.Chrome, wait: WebDriverWait, ho
             logger.error(f"Error extracting text from booking #{i+1}: {str(e)}")
             st.error(f"Error extracting text from booking #{i+1}: {str(e)}")
 
-    # Second pass: Process each booking text and fetch folio details
+    return booking_texts, bool(booking_cards)
+
+def go_to_next_list_page(driver: webdriver.Chrome) -> bool:
+    """Click the reservations list's next-page button; False when there is none or it is disabled."""
+    for selector in LIST_NEXT_PAGE_SELECTORS:
+        buttons = driver.find_elements(By.CSS_SELECTOR, selector)
+        if not buttons:
+            continue
+        button = buttons[0]
+        if not button.is_enabled() or "Mui-disabled" in (button.get_attribute("class") or ""):
+            return False
+        driver.execute_script("arguments[0].scrollIntoView(); arguments[0].click();", button)
+        wait_for_page_settled(driver, "list_next_page")
+        return True
+    return False
+
+def capture_all_booking_texts(driver: webdriver.Chrome, wait: WebDriverWait, property_name: str) -> Tuple[List[str], bool]:
+    """Capture the card texts of every page of the reservations list, following its pagination."""
+    booking_texts, found_cards = capture_booking_texts(driver, wait, property_name)
+    seen = set(booking_texts)
+    for page in range(2, LIST_MAX_PAGES + 1):
+        if not found_cards or not go_to_next_list_page(driver):
+            break
+        page_texts, _ = capture_booking_texts(driver, wait, property_name)
+        new_texts = [text for text in page_texts if text not in seen]
+        if not new_texts:
+            break  # The button did not move to a new page
+        st.write(f"Captured {len(new_texts)} more bookings from list page {page} for {property_name}")
+        booking_texts.extend(new_texts)
+        seen.update(new_texts)
+    return booking_texts, found_cards
+
+def plan_folio_fetches(booking_texts: List[str], hotel_id: str, property_name: str, watermark: Optional[SyncWatermark] = None,
+                       full_resync: bool = False, checkpoint: Optional[ScrapeCheckpoint] = None) -> List[Dict[str, str]]:
+    """Parse the captured card texts and return the bookings whose folios still have to be read."""
+    planned = []
+    unchanged_count = 0
+    completed_count = 0
     for i, raw_text in enumerate(booking_texts):
         st.write(f"Processing booking #{i+1} for {property_name}:")
         try:
             # Extract booking data using the improved function
             booking_data = extract_booking_data_from_text(raw_text, hotel_id)
-            
-            # DEBUG: Show extracted booking source
-            st.write(f"DEBUG - Extracted booking source: {booking_data.get('booking_source', 'None')}")
-            
-            if booking_data.get('booking_id'):
-                # Fetch additional details from folio page (this navigates away)
-                fetch_folio_details(driver, wait, booking_data, hotel_id)
-                
-                # DEBUG: Show final booking source after folio fetch
-                st.write(f"DEBUG - Final booking source after folio: {booking_data.get('booking_source', 'None')}")
-                
-                # Navigate back to reservations page for next booking
-                if i < len(booking_texts) - 1:  # Don't navigate back on last booking
-                    driver.get(current_url)
-                    time.sleep(3)
-                    # Wait for page to reload
-                    wait.until(EC.presence_of_element_located((By.XPATH, "//button[contains(text(), 'Reservations')]")))
-                
-                bookings.append(booking_data)
-                st.write(f"Extracted booking: {booking_data.get('booking_id')} for {property_name}")
-                logger.info(f"Successfully extracted booking: {booking_data.get('booking_id')}")
-            else:
-                st.write(f"No booking ID found for booking #{i+1} in {property_name}, skipping...")
-                logger.warning(f"No booking ID found in booking #{i+1}")
-
         except Exception as e:
             logger.error(f"Error processing booking #{i+1}: {str(e)}")
             st.error(f"Error processing booking #{i+1}: {str(e)}")
-            # Try to navigate back to reservations page if there was an error
-            try:
-                driver.get(current_url)
-                time.sleep(3)
-                wait.until(EC.presence_of_element_located((By.XPATH, "//button[contains(text(), 'Reservations')]")))
-            except Exception as nav_error:
-                logger.warning(f"Could not navigate back to reservations: {str(nav_error)}")
-
-    # If no booking cards found, try JavaScript approach from Daily_DMS_All.py
-    if not booking_cards:
+            continue
+        
+        # DEBUG: Show extracted booking source
+        st.write(f"DEBUG - Extracted booking source: {booking_data.get('booking_source', 'None')}")
+        
+        booking_id = booking_data.get('booking_id')
+        if not booking_id:
+            st.write(f"No booking ID found for booking #{i+1} in {property_name}, skipping...")
+            logger.warning(f"No booking ID found in booking #{i+1}")
+            continue
+        if checkpoint is not None and checkpoint.is_completed(booking_card_key(booking_data)):
+            logger.info(f"Booking {booking_id} already completed earlier today, skipping for {property_name}")
+            completed_count += 1
+            continue
+        if watermark and not full_resync and watermark.is_unchanged(booking_card_key(booking_data), booking_data['card_hash']):
+            st.write(f"Booking {booking_id} unchanged since last sync, skipping folio for {property_name}")
+            logger.info(f"Skipped unchanged booking {booking_id} for {property_name}")
+            unchanged_count += 1
+            continue
+        planned.append(booking_data)
+
+    if unchanged_count:
+        st.info(f"Skipped {unchanged_count} unchanged bookings for {property_name} (incremental sync)")
+    logger.info(f"Scrape plan for {property_name}: {len(booking_texts)} cards, {len(planned)} folios to read, {unchanged_count} unchanged, {completed_count} already done")
+    return planned
+
+def iter_bookings(driver: webdriver.Chrome, wait: WebDriverWait, hotel_id: str, cancel_event: Optional[threading.Event] = None,
+                  watermark: Optional[SyncWatermark] = None, full_resync: bool = False,
+                  checkpoint: Optional[ScrapeCheckpoint] = None) -> Iterator[Dict[str, str]]:
+    """Yield each booking as soon as its folio has been read - using logic from Daily_DMS_All.py
+
+    The scrape follows an explicit plan: capture every page of the reservations list once, work out
+    which folios must be read, then visit those folios directly without returning to the list.
+    With a watermark, bookings whose summary text is unchanged since the last sync are skipped
+    without opening their folio, unless full_resync is set. With a checkpoint from an interrupted
+    run earlier today, its captured card texts are reused and completed bookings are skipped.
+    """
+    property_name = get_property_name(hotel_id) or "Unknown"
+    st.write(f"Fetching all booking information entries for {property_name}...")
+    yielded_count = 0
+
+    # 1. Capture the card texts, unless an interrupted run already did today
+    if checkpoint is not None and checkpoint.resumable:
+        booking_texts = checkpoint.booking_texts
+        found_cards = True
+        st.info(f"Resuming interrupted scrape of {property_name}: {len(checkpoint.completed)} of {len(booking_texts)} bookings already done today")
+        logger.info(f"Resuming scrape of {property_name} from checkpoint ({len(checkpoint.completed)}/{len(booking_texts)} done)")
+    else:
+        with span(STAGE_LIST_CAPTURE):
+            booking_texts, found_cards = capture_all_booking_texts(driver, wait, property_name)
+        if checkpoint is not None and booking_texts:
+            checkpoint.set_texts(booking_texts)
+
+    # If no booking cards found, try JavaScript approach from Daily_DMS_All.py while still on the list
+    if not found_cards:
         st.write(f"No booking cards found, trying JavaScript approach for {property_name}...")
-        js_bookings = match_patterns_on_page(driver, hotel_id)
-        bookings.extend(js_bookings)
+        yield from match_patterns_on_page(driver, hotel_id)
+        if checkpoint is not None:
+            checkpoint.mark_finished()
+        return
 
-    return bookings
+    # 2. Decide which folios have to be read
+    with span(STAGE_FOLIO_PLAN):
+        planned = plan_folio_fetches(booking_texts, hotel_id, property_name, watermark, full_resync, checkpoint)
+
+    # Folio fast path: plain HTTP with the browser's cookies, Selenium only when it fails
+    http_fetcher = None
+    if http_fetch_enabled() and planned:
+        try:
+            http_fetcher = FolioHttpFetcher.from_driver(driver, hotel_id)
+        except Exception as e:
+            logger.warning(f"Could not build HTTP folio session for {property_name}: {str(e)}")
+
+    # Folios that need a browser load in spare tabs of the same session
+    tab_pool = None
+    if FOLIO_TABS > 1 and planned:
+        def read_in_tab(tab_driver: webdriver.Chrome, booking: Dict[str, str]) -> None:
+            # Only the reading is timed here; the concurrent tab loads show up as wait.folio_tab_load
+            with span(STAGE_FOLIO_TAB):
+                read_open_folio(tab_driver, wait, booking)
+
+        tab_pool = FolioTabPool(
+            driver,
+            lambda booking: FOLIO_PAGE_URL.format(booking_id=booking['booking_id'], hotel_id=hotel_id),
+            read_in_tab,
+            FOLIO_TABS,
+            prepare_tab=block_resources if is_light_profile() else None
+        )
+
+    def finish(booking_data: Dict[str, str]) -> Dict[str, str]:
+        nonlocal yielded_count
+        booking_data['folio_read'] = folio_was_read(booking_data)
+        booking_data['folio_hash'] = folio_fingerprint(booking_data) if booking_data['folio_read'] else None
+        
+        # DEBUG: Show final booking source after folio fetch
+        st.write(f"DEBUG - Final booking source after folio: {booking_data.get('booking_source', 'None')}")
+        
+        if not booking_data['folio_read']:
+            # Not marked as seen, so the next sync opens this folio again
+            logger.warning(f"Folio of {booking_data.get('booking_id')} could not be read for {property_name}; stored amounts are kept")
+        elif watermark:
+            watermark.mark_seen(booking_card_key(booking_data), booking_data['card_hash'])
+        st.write(f"Extracted booking: {booking_data.get('booking_id')} for {property_name}")
+        logger.info(f"Successfully extracted booking: {booking_data.get('booking_id')}")
+        yielded_count += 1
+        return booking_data
+
+    # 3. Read the planned folios; the list page is never needed again
+    cancelled = False
+    try:
+        for booking_data in planned:
+            if cancel_event is not None and cancel_event.is_set():
+                st.warning(f"Sync cancelled for {property_name} after {yielded_count} bookings")
+                logger.warning(f"Sync cancelled for {property_name} after {yielded_count} bookings")
+                cancelled = True
+                break
+            try:
+                fetched = False
+                if http_fetcher:
+                    with span(STAGE_FOLIO_HTTP):
+                        fetched = http_fetcher.fetch(booking_data)
+                if fetched:
+                    yield finish(booking_data)
+                elif tab_pool is not None:
+                    # Yields the folios that finished loading while waiting for a free tab
+                    for done in tab_pool.submit(booking_data):
+                        yield finish(done)
+                else:
+                    # Visit the folio page directly; the next booking goes straight to its own folio
+                    with span(STAGE_FOLIO_DIRECT):
+                        fetch_folio_details(driver, wait, booking_data, hotel_id)
+                    yield finish(booking_data)
+            except Exception as e:
+                logger.error(f"Error processing booking {booking_data.get('booking_id')}: {str(e)}")
+                st.error(f"Error processing booking {booking_data.get('booking_id')}: {str(e)}")
+                if tab_pool is not None:
+                    try:
+                        driver.switch_to.window(tab_pool.home_handle)
+                    except Exception as nav_error:
+                        logger.warning(f"Could not return to the reservations tab: {str(nav_error)}")
+
+        if tab_pool is not None and not cancelled:
+            for done in tab_pool.drain():
+                yield finish(done)
+    finally:
+        # Also runs when the consumer stops iterating early
+        if http_fetcher:
+            http_fetcher.close()
+        if tab_pool is not None:
+            try:
+                tab_pool.close()
+            except Exception as e:
+                logger.warning(f"Could not close folio tabs for {property_name}: {str(e)}")
+
+    if checkpoint is not None and not cancelled:
+        checkpoint.mark_finished()
 
 def match_patterns_on_page(driver: webdriver.Chrome, hotel_id: str) -> List[Dict[str, str]]:
     """Look for booking patterns directly on page using JavaScript - from Daily_DMS_All.py"""
@@ -769,268 +992,641 @@ def is_ota_booking(booking: Dict[str, str]) -> bool:
     logger.info(f"Booking {booking.get('booking_id', 'unknown')} source: '{source}', is_ota: {is_ota}")
     return is_ota
 
-def login_to_stayflexi(chrome_profile_path: str, property_name: str, hotel_id: str) -> List[Dict[str, str]]:
-    """Login to Stayflexi and navigate to reservations."""
-    driver = None
+def sign_in_to_stayflexi(driver: webdriver.Chrome, wait: WebDriverWait, property_name: str, hotel_id: str) -> bool:
+    """Perform the email/password login and wait for the property's dashboard link."""
+    st.write(f"Opening StayFlexi for {property_name} (ID: {hotel_id})...")
+    driver.get(f"{STAYFLEXI_BASE_URL}/auth/login")
+    logger.info(f"Navigated to Stayflexi login page for {property_name}")
+    
     try:
-        logger.info(f"Available secrets: {list(st.secrets.keys())}")
-        if "stayflexi" not in st.secrets:
-            logger.error(f"Missing 'stayflexi' secrets for {property_name} (ID: {hotel_id})")
-            st.error(f"Missing Stayflexi credentials for {property_name} (ID: {hotel_id}). Available secrets: {list(st.secrets.keys())}")
-            return []
+        email_field = wait.until(EC.presence_of_element_located((By.XPATH, "//input[@type='text']")))
+        email_field.clear()
+        email_field.send_keys(st.secrets["stayflexi"]["email"])
+        logger.info(f"Entered email for {property_name}")
         
-        driver = setup_driver(chrome_profile_path)
-        wait = WebDriverWait(driver, 30)
-        bookings = []
+        login_button = wait.until(EC.element_to_be_clickable((By.XPATH, "//button[contains(text(),'Sign In')]")))
+        login_button.click()
+        logger.info(f"Clicked first Sign In button for {property_name}")
         
-        st.write(f"Opening StayFlexi for {property_name} (ID: {hotel_id})...")
-        driver.get("https://app.stayflexi.com/auth/login")
-        logger.info(f"Navigated to Stayflexi login page for {property_name}")
+        password_field = wait.until(EC.presence_of_element_located((By.XPATH, "//input[@type='password']")))
+        password_field.send_keys(st.secrets["stayflexi"]["password"])
+        logger.info(f"Entered password for {property_name}")
         
-        try:
-            email_field = wait.until(EC.presence_of_element_located((By.XPATH, "//input[@type='text']")))
-            email_field.clear()
-            email_field.send_keys(st.secrets["stayflexi"]["email"])
-            logger.info(f"Entered email for {property_name}")
-            
-            login_button = wait.until(EC.element_to_be_clickable((By.XPATH, "//button[contains(text(),'Sign In')]")))
-            login_button.click()
-            logger.info(f"Clicked first Sign In button for {property_name}")
-            
-            password_field = wait.until(EC.presence_of_element_located((By.XPATH, "//input[@type='password']")))
-            password_field.send_keys(st.secrets["stayflexi"]["password"])
-            logger.info(f"Entered password for {property_name}")
-            
-            login_button = wait.until(EC.element_to_be_clickable((By.XPATH, "//button[contains(text(),'Sign In')]")))
-            login_button.click()
-            st.write(f"Logged in successfully for {property_name}")
-            logger.info(f"Logged in successfully for {property_name}")
-            wait.until(EC.presence_of_element_located((By.XPATH, f"//a[@href='/dashboard?hotelId={hotel_id}']")))
-        except Exception as e:
-            logger.warning(f"Login attempt failed for {property_name} (ID: {hotel_id}): {str(e)}")
-            st.error(f"Login failed for {property_name} (ID: {hotel_id}): {str(e)}")
-            return []
+        login_button = wait.until(EC.element_to_be_clickable((By.XPATH, "//button[contains(text(),'Sign In')]")))
+        login_button.click()
+        st.write(f"Logged in successfully for {property_name}")
+        logger.info(f"Logged in successfully for {property_name}")
+        wait.until(EC.presence_of_element_located((By.XPATH, f"//a[@href='/dashboard?hotelId={hotel_id}']")))
+        return True
+    except Exception as e:
+        logger.warning(f"Login attempt failed for {property_name} (ID: {hotel_id}): {str(e)}")
+        st.error(f"Login failed for {property_name} (ID: {hotel_id}): {str(e)}")
+        return False
+
+def open_dashboard_directly(driver: webdriver.Chrome, property_name: str, hotel_id: str) -> bool:
+    """Navigate an already authenticated session straight to the property dashboard."""
+    try:
+        driver.get(f"{STAYFLEXI_BASE_URL}/dashboard?hotelId={hotel_id}")
+        WebDriverWait(driver, 15).until(EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Reservations')]")))
+        st.write(f"Reused logged-in browser session for {property_name} (ID: {hotel_id})")
+        logger.info(f"Opened dashboard for {property_name} with pooled session")
+        return True
+    except Exception as e:
+        logger.info(f"Pooled session could not open dashboard for {property_name}, logging in again: {str(e)}")
+        return False
+
+def stream_ota_bookings(chrome_profile_path: str, property_name: str, hotel_id: str, cancel_event: Optional[threading.Event] = None,
+                        watermark: Optional[SyncWatermark] = None, full_resync: bool = False,
+                        checkpoint: Optional[ScrapeCheckpoint] = None) -> Iterator[Dict[str, str]]:
+    """Login to Stayflexi (or reuse a pooled session), navigate to reservations and yield OTA bookings as they are scraped.
+
+    The browser stays open while the caller consumes the stream and is released when the generator finishes,
+    fails or is closed. Errors are logged and re-raised once the browser has been handed back; missing
+    credentials and a failed sign-in raise RuntimeError, so the caller never mistakes them for an empty sync.
+    """
+    logger.info(f"Available secrets: {list(st.secrets.keys())}")
+    if "stayflexi" not in st.secrets:
+        logger.error(f"Missing 'stayflexi' secrets for {property_name} (ID: {hotel_id})")
+        st.error(f"Missing Stayflexi credentials for {property_name} (ID: {hotel_id}). Available secrets: {list(st.secrets.keys())}")
+        raise RuntimeError(f"Missing Stayflexi credentials for {property_name}")
+
+    driver = None
+    pooled: Optional[PooledDriver] = None
+    try:
+        if USE_DRIVER_POOL:
+            try:
+                pooled = get_driver_pool().acquire(timeout=DRIVER_ACQUIRE_TIMEOUT)
+            except TimeoutError:
+                # More properties than pooled browsers are syncing; fail this one instead of blocking its worker forever
+                st.error(f"No browser became free within {DRIVER_ACQUIRE_TIMEOUT:.0f}s for {property_name} (ID: {hotel_id}); raise DRIVER_POOL_SIZE or sync fewer properties at once")
+                raise
+            driver = pooled.driver
+        else:
+            driver = setup_driver(chrome_profile_path)
+        wait = WebDriverWait(driver, 30)
         
-        dashboard_button = wait.until(EC.element_to_be_clickable((By.XPATH, f"//a[@href='/dashboard?hotelId={hotel_id}']")))
-        dashboard_button.click()
-        logger.info(f"Clicked dashboard button for hotel ID {hotel_id}")
-        time.sleep(3)
-        driver.switch_to.window(driver.window_handles[-1])
+        reused_session = False
+        if pooled and pooled.authenticated:
+            with span(STAGE_DASHBOARD):
+                reused_session = open_dashboard_directly(driver, property_name, hotel_id)
+        if not reused_session:
+            if pooled and pooled.uses > 1:
+                # Drop a stale login before signing in again on a reused browser
+                pooled.authenticated = False
+                driver.get(f"{STAYFLEXI_BASE_URL}/auth/login")
+                driver.delete_all_cookies()
+                driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+            with span(STAGE_LOGIN):
+                signed_in = sign_in_to_stayflexi(driver, wait, property_name, hotel_id)
+            if not signed_in:
+                raise RuntimeError(f"Could not sign in to Stayflexi for {property_name}")
+            if pooled:
+                pooled.authenticated = True
+            
+            with span(STAGE_DASHBOARD):
+                dashboard_button = wait.until(EC.element_to_be_clickable((By.XPATH, f"//a[@href='/dashboard?hotelId={hotel_id}']")))
+                handles_before = driver.window_handles
+                dashboard_button.click()
+                logger.info(f"Clicked dashboard button for hotel ID {hotel_id}")
+                wait_for_new_window(driver, handles_before, "dashboard_open", timeout=10, url_fragment="/dashboard")
+                driver.switch_to.window(driver.window_handles[-1])
         
         reservations_button = wait.until(EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Reservations')]")))
         reservations_button.click()
         logger.info(f"Clicked Reservations button for {property_name}")
         
-        # Fetch all bookings using the improved logic
-        all_bookings = fetch_and_display_bookings(driver, wait, hotel_id)
-        
-        # DEBUG: Show all bookings before filtering
-        st.write(f"DEBUG - Total bookings found: {len(all_bookings)}")
-        for booking in all_bookings:
+        # Filter for OTA bookings as each one is scraped
+        total_count = 0
+        ota_count = 0
+        for booking in iter_bookings(driver, wait, hotel_id, cancel_event, watermark, full_resync, checkpoint):
+            total_count += 1
             st.write(f"  - {booking.get('booking_id', 'No ID')} | Source: {booking.get('booking_source', 'None')} | Name: {booking.get('name', 'No name')}")
-        
-        # Filter for OTA bookings with improved error handling
-        bookings = []
-        for booking in all_bookings:
             try:
-                if is_ota_booking(booking):
-                    bookings.append(booking)
-                    logger.info(f"Added OTA booking: {booking.get('booking_id')} from {booking.get('booking_source', 'unknown')}")
-                else:
-                    logger.info(f"Skipped non-OTA booking: {booking.get('booking_id')} from {booking.get('booking_source', 'unknown')}")
+                is_ota = is_ota_booking(booking)
             except Exception as e:
                 logger.error(f"Error filtering booking {booking.get('booking_id', 'unknown')}: {str(e)}")
-                # Include booking in results if filtering fails to avoid losing data
-                bookings.append(booking)
-        
-        st.write(f"Fetched {len(bookings)} OTA bookings out of {len(all_bookings)} total bookings for {property_name}")
-        logger.info(f"Fetched {len(bookings)} OTA bookings for {property_name}")
+                is_ota = True  # Include booking in results if filtering fails to avoid losing data
+            if is_ota:
+                ota_count += 1
+                logger.info(f"Added OTA booking: {booking.get('booking_id')} from {booking.get('booking_source', 'unknown')}")
+                yield booking
+            else:
+                logger.info(f"Skipped non-OTA booking: {booking.get('booking_id')} from {booking.get('booking_source', 'unknown')}")
+                if checkpoint is not None:
+                    checkpoint.mark_completed([booking_card_key(booking)])  # Nothing to store, so it is done
         
-        return bookings
+        st.write(f"Fetched {ota_count} OTA bookings out of {total_count} total bookings for {property_name}")
+        logger.info(f"Fetched {ota_count} OTA bookings for {property_name}")
     except Exception as e:
         logger.error(f"Error for {property_name} (ID: {hotel_id}): {str(e)}")
-        st.error(f"Error for {property_name} (ID: {hotel_id}): {str(e)}")
-        return []
+        if pooled:
+            pooled.broken = True
+        BROWSER_FAILURES.inc(stage="sync")
+        if watermark:
+            watermark.discard_pending()
+        raise
     finally:
-        if driver:
+        if pooled:
+            get_driver_pool().release(pooled)
+            logger.info(f"Returned pooled WebDriver for {property_name}")
+        elif driver:
             try:
                 driver.quit()
                 logger.info(f"Closed WebDriver for {property_name}")
             except Exception as e:
                 logger.warning(f"Failed to close WebDriver for {property_name}: {str(e)}")
 
-def store_in_supabase(bookings: List[Dict[str, str]], property_name: str) -> None:
-    """Store OTA bookings in Supabase 'otabooking' table with enhanced error handling."""
-    if not bookings:
-        st.warning(f"No bookings to store for {property_name}")
-        return
-        
-    supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-    stored_count = 0
-    skipped_count = 0
-    error_count = 0
-    
-    for booking in bookings:
-        if not booking.get('booking_id'):
-            logger.warning(f"Skipping booking for {property_name} due to missing booking_id")
-            st.warning(f"Skipping booking for {property_name}: No booking ID found")
-            skipped_count += 1
-            continue
-            
+def parse_booking_period(booking_period: Optional[str]) -> Tuple[str, str]:
+    """Convert a Stayflexi booking period into ISO check-in/check-out dates ('' when unparseable)."""
+    check_in = ""
+    check_out = ""
+    if booking_period:
         try:
+            dates = booking_period.split(' - ')
+            if len(dates) == 2:
+                check_in = datetime.strptime(dates[0], "%b %d, %Y %I:%M %p").strftime("%Y-%m-%d")
+                check_out = datetime.strptime(dates[1], "%b %d, %Y %I:%M %p").strftime("%Y-%m-%d")
+        except ValueError as e:
+            logger.warning(f"Could not parse booking period '{booking_period}': {str(e)}")
+            check_in = ""
+            check_out = ""
+    return check_in, check_out
+
+def card_key(booking_id: Optional[str], room_number: Optional[str]) -> str:
+    """Key of one booking card (one room of a booking): the 'otabooking' booking_id column."""
+    return f"{booking_id}_room_{room_number}"
+
+def booking_card_key(booking: Dict[str, str]) -> str:
+    return card_key(booking.get('booking_id'), booking.get('room_number', 'N/A'))
+
+def build_otabooking_row(booking: Dict[str, str], property_name: str) -> Dict:
+    """Build the 'otabooking' row for a scraped booking."""
+    check_in, check_out = parse_booking_period(booking.get('booking_period'))
+    today = datetime.now().date().isoformat()
+    return {
+        "property": property_name,
+        "report_date": today,
+        "booking_date": today,  # Using report date as booking date
+        # Unique identifier for multi-room bookings: booking_id plus room number
+        "booking_id": booking_card_key(booking),
+        "original_booking_id": booking.get('booking_id'),  # Store original booking ID for reference
+        "booking_source": booking['booking_source'],
+        "guest_name": booking.get('name', ''),
+        "guest_phone": booking.get('phone', ''),
+        "check_in": check_in,
+        "check_out": check_out,
+        "total_with_taxes": safe_float(booking.get('total_with_taxes')),
+        "payment_made": safe_float(booking.get('payment_made')),
+        "adults_children_infant": booking.get('adults_children_infant', '1/0/0'),  # Default to 1/0/0
+        "room_number": booking.get('room_number', 'N/A'),
+        "total_without_taxes": safe_float(booking.get('total_without_taxes')),
+        "total_tax_amount": safe_float(booking.get('total_tax_amount')),
+        "room_type": booking.get('room_type', 'N/A'),
+        "rate_plan": booking.get('rate_plan', 'N/A'),
+        "card_hash": booking.get('card_hash'),
+        "folio_hash": booking.get('folio_hash'),
+        "created_at": datetime.now().isoformat()
+    }
+
+# Columns kept from the first insert when a changed booking is updated
+INSERT_ONLY_COLUMNS = ("report_date", "booking_date", "created_at")
+
+# Columns read from the folio; a booking whose folio could not be read keeps the stored values
+FOLIO_COLUMNS = ("total_with_taxes", "payment_made", "total_without_taxes", "total_tax_amount", "adults_children_infant", "rate_plan", "folio_hash")
+
+def select_property_rows(supabase, columns: str, property_name: str, page_size: int = OTABOOKING_PAGE_SIZE) -> List[Dict]:
+    """All 'otabooking' rows of a property, read page by page so PostgREST's max-rows cap cannot silently truncate them."""
+    rows = []
+    start = 0
+    while True:
+        with observe_database("otabooking", "select"):
+            response = (supabase.table("otabooking").select(columns).eq("property", property_name)
+                        .order("booking_id").range(start, start + page_size - 1).execute())
+        rows.extend(response.data)
+        if len(response.data) < page_size:
+            return rows
+        start += page_size
+
+def load_stored_fingerprints(property_name: str) -> Dict[str, str]:
+    """Map each stored card (see card_key) to its card fingerprint in 'otabooking' for a property."""
+    try:
+        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+        rows = select_property_rows(supabase, "booking_id, card_hash", property_name)
+        return {row["booking_id"]: row["card_hash"] for row in rows if row.get("booking_id") and row.get("card_hash")}
+    except Exception as e:
+        logger.warning(f"Could not load stored fingerprints for {property_name}: {str(e)}")
+        return {}
+
+class OtaBookingWriter:
+    """Buffers scraped OTA bookings and writes them to the 'otabooking' table in micro-batches.
+
+    The property's existing keys, fingerprints and guest index are prefetched once, before the first
+    write, and kept up to date across batches so duplicates are still resolved in memory. Each flush
+    sends new rows in one bulk upsert and changed rows in a second one. With a watermark, bookings of
+    a batch are committed and saved as soon as the batch is written, so a later failure only loses
+    the bookings still in the buffer.
+    """
+
+    def __init__(self, property_name: str, batch_size: int = SYNC_WRITE_BATCH_SIZE, watermark: Optional[SyncWatermark] = None,
+                 checkpoint: Optional[ScrapeCheckpoint] = None):
+        self.property_name = property_name
+        self.batch_size = max(1, batch_size)
+        self.watermark = watermark
+        self.checkpoint = checkpoint
+        self.summary = {"stored": 0, "updated": 0, "skipped": 0, "errors": 0}
+        self.received = 0
+        self._buffer: List[Dict[str, str]] = []
+        self._supabase = None
+        self._existing_rooms: Optional[Dict[str, Dict[str, Dict]]] = None
+        self._guest_index = GuestIndex()
+
+    def add(self, booking: Dict[str, str]) -> None:
+        """Buffer a booking, writing the buffer once it holds batch_size bookings."""
+        self._buffer.append(booking)
+        self.received += 1
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def close(self) -> Dict[str, int]:
+        """Write whatever is still buffered and return the stored/updated/skipped/error counts."""
+        self.flush()
+        summary = self.summary
+        st.info(f"Storage summary for {self.property_name}: {summary['stored']} stored, {summary['updated']} updated, {summary['skipped']} skipped, {summary['errors']} errors")
+        logger.info(f"Storage summary for {self.property_name}: {summary['stored']} stored, {summary['updated']} updated, {summary['skipped']} skipped, {summary['errors']} errors")
+        return summary
+
+    def _prefetch(self) -> bool:
+        """Load stored rows (keyed by original_booking_id and room_number) and guest keys for this property."""
+        if self._existing_rooms is not None:
+            return True
+        property_name = self.property_name
+        try:
+            self._supabase = self._supabase or create_client(SUPABASE_URL, SUPABASE_KEY)
+            with span(STAGE_SUPABASE_PREFETCH):
+                existing = select_property_rows(self._supabase, ", ".join(("booking_id", "original_booking_id", "room_number", "guest_name", "guest_phone", "booking_source", "card_hash") + FOLIO_COLUMNS), property_name)
+            existing_rooms: Dict[str, Dict[str, Dict]] = {}
+            for row in existing:
+                original_id = row.get("original_booking_id") or row.get("booking_id")
+                existing_rooms.setdefault(original_id, {})[row.get("room_number")] = row
+                self._guest_index.add(row.get("guest_name"), row.get("guest_phone"), row.get("room_number"), original_id)
+            self._existing_rooms = existing_rooms
+            return True
+        except Exception as e:
+            st.error(f"Error loading existing bookings for {property_name}: {str(e)}")
+            logger.error(f"Error loading existing bookings for {property_name}: {str(e)}")
+            return False
+
+    def flush(self) -> None:
+        """Write the buffered bookings."""
+        if not self._buffer:
+            return
+        bookings, self._buffer = self._buffer, []
+        property_name = self.property_name
+        summary = self.summary
+        if not self._prefetch():
+            summary["errors"] += len(bookings)
+            return
+        supabase = self._supabase
+        existing_rooms = self._existing_rooms
+        guest_index = self._guest_index
+        failed_keys = set()
+
+        # 1. Decide inserts, updates and skips in memory
+        rows = []
+        updates = []
+        for booking in bookings:
+            if not booking.get('booking_id'):
+                logger.warning(f"Skipping booking for {property_name} due to missing booking_id")
+                st.warning(f"Skipping booking for {property_name}: No booking ID found")
+                summary["skipped"] += 1
+                continue
+
             # Enhanced booking source handling
             booking_source = booking.get('booking_source')
             if not booking_source or booking_source in ['None', '']:
                 booking_source = 'UNKNOWN'  # Use UNKNOWN instead of DIRECT for null sources
                 logger.info(f"Set booking_source to UNKNOWN for booking {booking.get('booking_id')}")
-            
             booking['booking_source'] = booking_source
-            
-            # Check if this exact combination of booking_id, property, and room_number already exists
-            existing_exact_booking = supabase.table("otabooking").select("*").eq("property", property_name).eq("booking_id", booking.get('booking_id')).eq("room_number", booking.get('room_number', 'N/A')).execute()
-            
-            if existing_exact_booking.data:
-                st.warning(f"Exact duplicate: Booking {booking.get('booking_id')} room {booking.get('room_number', 'N/A')} already exists for {property_name}")
-                logger.info(f"Skipped exact duplicate booking {booking.get('booking_id')} room {booking.get('room_number', 'N/A')} for {property_name}")
-                skipped_count += 1
-                continue
 
-            # Check if there are other rooms for this booking_id (multi-room scenario)
-            other_rooms = supabase.table("otabooking").select("room_number").eq("property", property_name).eq("booking_id", booking.get('booking_id')).execute()
-            
-            if other_rooms.data:
-                existing_rooms = [room['room_number'] for room in other_rooms.data]
-                current_room = booking.get('room_number', 'N/A')
-                
-                if current_room not in existing_rooms:
-                    st.info(f"Multi-room booking detected: {booking.get('booking_id')} adding room {current_room} (existing rooms: {', '.join(existing_rooms)}) for {property_name}")
-                    logger.info(f"Adding additional room {current_room} for booking {booking.get('booking_id')} at {property_name}")
+            booking_id = booking['booking_id']
+            current_room = booking.get('room_number', 'N/A')
+            rooms = existing_rooms.get(booking_id, {})
+            if current_room in rooms:
+                stored_row = rooms[current_room]
+                row = build_otabooking_row(booking, property_name)
+                changed = row["card_hash"] != stored_row.get("card_hash")
+                if booking.get('folio_read'):
+                    changed = changed or row["folio_hash"] != stored_row.get("folio_hash")
                 else:
-                    st.warning(f"Room {current_room} already exists for booking {booking.get('booking_id')} at {property_name}")
-                    logger.info(f"Skipped duplicate room {current_room} for booking {booking.get('booking_id')} at {property_name}")
-                    skipped_count += 1
+                    # Only the card-derived columns are refreshed; the old card fingerprint stays so the next sync reads the folio again
+                    row.update({column: stored_row.get(column) for column in FOLIO_COLUMNS}, card_hash=stored_row.get("card_hash"))
+                    if row["booking_source"] == 'UNKNOWN' and stored_row.get("booking_source"):
+                        row["booking_source"] = stored_row["booking_source"]
+                if changed:
+                    row["booking_id"] = stored_row["booking_id"]
+                    for column in INSERT_ONLY_COLUMNS:
+                        row.pop(column)
+                    updates.append(row)
+                    rooms[current_room] = row
+                    logger.info(f"Booking {booking_id} room {current_room} changed since last sync, queued update for {property_name}")
                     continue
+                st.warning(f"Exact duplicate: Booking {booking_id} room {current_room} already exists for {property_name}")
+                logger.info(f"Skipped exact duplicate booking {booking_id} room {current_room} for {property_name}")
+                DUPLICATES_SKIPPED.inc(property=property_name, kind="exact")
+                summary["skipped"] += 1
+                continue
+            if rooms:
+                st.info(f"Multi-room booking detected: {booking_id} adding room {current_room} (existing rooms: {', '.join(sorted(str(r) for r in rooms))}) for {property_name}")
+                logger.info(f"Adding additional room {current_room} for booking {booking_id} at {property_name}")
 
             # Additional guest-based duplicate check (for different booking IDs but same guest and room)
+            is_duplicate, existing_id = guest_index.find(booking.get('name'), booking.get('phone'), current_room, exclude_booking_id=booking_id)
+            if is_duplicate:
+                st.warning(f"Guest duplicate: {booking.get('name')} already has booking {existing_id} for same room at {property_name}")
+                logger.info(f"Skipped guest duplicate: {booking.get('name')} already has booking {existing_id} for {property_name}")
+                DUPLICATES_SKIPPED.inc(property=property_name, kind="guest")
+                summary["skipped"] += 1
+                continue
+
+            row = build_otabooking_row(booking, property_name)
+            if not booking.get('folio_read'):
+                row["card_hash"] = None  # Stored without a fingerprint so the next sync reads the folio again
+            existing_rooms.setdefault(booking_id, {})[current_room] = row
+            guest_index.add(booking.get('name'), booking.get('phone'), current_room, booking_id)
+            rows.append(row)
+
+        # 2. Write all new rows in one bulk upsert; rows hitting the unique booking_id are ignored
+        if rows:
             try:
-                is_duplicate, existing_id = check_duplicate_guest(
-                    supabase, "otabooking", 
-                    booking.get('name', ''), 
-                    booking.get('phone', ''), 
-                    booking.get('room_number', '')
-                )
-                if is_duplicate and existing_id != booking.get('booking_id'):
-                    st.warning(f"Guest duplicate: {booking.get('name')} already has booking {existing_id} for same room at {property_name}")
-                    logger.info(f"Skipped guest duplicate: {booking.get('name')} already has booking {existing_id} for {property_name}")
-                    skipped_count += 1
-                    continue
-            except Exception as guest_check_error:
-                logger.warning(f"Guest duplicate check failed for {booking.get('booking_id')}: {str(guest_check_error)}")
+                with span(STAGE_SUPABASE_UPSERT), observe_database("otabooking", "upsert"):
+                    result = supabase.table("otabooking").upsert(rows, on_conflict="booking_id", ignore_duplicates=True).execute()
+                inserted = len(result.data or [])
+                summary["stored"] += inserted
+                summary["skipped"] += len(rows) - inserted
+                if len(rows) > inserted:
+                    DUPLICATES_SKIPPED.inc(len(rows) - inserted, property=property_name, kind="conflict")
+                st.success(f"Stored {inserted} bookings for {property_name}: {', '.join(row['booking_id'] for row in (result.data or []))}")
+                logger.info(f"Bulk stored {inserted} of {len(rows)} bookings for {property_name}")
+            except Exception as e:
+                logger.warning(f"Bulk upsert failed for {property_name}, retrying row by row: {str(e)}")
+                for row in rows:
+                    try:
+                        with span(STAGE_SUPABASE_INSERT_ROW), observe_database("otabooking", "insert"):
+                            supabase.table("otabooking").insert(row).execute()
+                        st.success(f"Stored booking {row['original_booking_id']} (room {row['room_number']}) for {property_name}")
+                        logger.info(f"Stored booking {row['original_booking_id']} room {row['room_number']} for {property_name}")
+                        summary["stored"] += 1
+                    except Exception as row_error:
+                        # Handle the specific unique constraint violation
+                        if 'duplicate key value violates unique constraint' in str(row_error):
+                            st.warning(f"Booking {row['original_booking_id']} already exists in database for {property_name}")
+                            logger.info(f"Skipped existing booking {row['original_booking_id']} for {property_name}")
+                            DUPLICATES_SKIPPED.inc(property=property_name, kind="conflict")
+                            summary["skipped"] += 1
+                        else:
+                            st.error(f"Error storing booking {row['original_booking_id']} for {property_name}: {str(row_error)}")
+                            logger.error(f"Error storing booking for {property_name}: {str(row_error)}")
+                            summary["errors"] += 1
+                            failed_keys.add(card_key(row['original_booking_id'], row['room_number']))
 
-            # Parse dates from booking_period with enhanced error handling
-            check_in = ""
-            check_out = ""
-            if booking.get('booking_period'):
-                try:
-                    dates = booking['booking_period'].split(' - ')
-                    if len(dates) == 2:
-                        check_in_date = datetime.strptime(dates[0], "%b %d, %Y %I:%M %p")
-                        check_out_date = datetime.strptime(dates[1], "%b %d, %Y %I:%M %p")
-                        check_in = check_in_date.strftime("%Y-%m-%d")
-                        check_out = check_out_date.strftime("%Y-%m-%d")
-                except ValueError as e:
-                    logger.warning(f"Could not parse booking period '{booking.get('booking_period')}': {str(e)}")
-        
-            # Create a unique identifier for multi-room bookings by appending room number to booking_id
-            unique_booking_id = f"{booking.get('booking_id')}_room_{booking.get('room_number', 'N/A')}"
-            
-            data = {
-                "property": property_name,
-                "report_date": datetime.now().date().isoformat(),
-                "booking_date": datetime.now().date().isoformat(),  # Using report date as booking date
-                "booking_id": unique_booking_id,  # Use unique booking ID to avoid constraint violation
-                "original_booking_id": booking.get('booking_id'),  # Store original booking ID for reference
-                "booking_source": booking_source,  # Ensure not None
-                "guest_name": booking.get('name', ''),
-                "guest_phone": booking.get('phone', ''),
-                "check_in": check_in,
-                "check_out": check_out,
-                "total_with_taxes": safe_float(booking.get('total_with_taxes')),
-                "payment_made": safe_float(booking.get('payment_made')),
-                "adults_children_infant": booking.get('adults_children_infant', '1/0/0'),  # Default to 1/0/0
-                "room_number": booking.get('room_number', 'N/A'),
-                "total_without_taxes": safe_float(booking.get('total_without_taxes')),
-                "total_tax_amount": safe_float(booking.get('total_tax_amount')),
-                "room_type": booking.get('room_type', 'N/A'),
-                "rate_plan": booking.get('rate_plan', 'N/A'),
-                "created_at": datetime.now().isoformat()
-            }
-        
-            result = supabase.table("otabooking").insert(data).execute()
-            st.success(f"Stored booking {booking.get('booking_id')} (room {booking.get('room_number', 'N/A')}) for {property_name}")
-            logger.info(f"Stored booking {booking.get('booking_id')} room {booking.get('room_number', 'N/A')} for {property_name}")
-            stored_count += 1
-            
-        except Exception as e:
-            # Handle the specific unique constraint violation
-            if 'duplicate key value violates unique constraint' in str(e):
-                st.warning(f"Booking {booking.get('booking_id')} already exists in database for {property_name}")
-                logger.info(f"Skipped existing booking {booking.get('booking_id')} for {property_name}")
-                skipped_count += 1
-            else:
-                st.error(f"Error storing booking {booking.get('booking_id', 'unknown')} for {property_name}: {str(e)}")
-                logger.error(f"Error storing booking for {property_name}: {str(e)}")
-                error_count += 1
-    
-    # Summary
-    st.info(f"Storage summary for {property_name}: {stored_count} stored, {skipped_count} skipped, {error_count} errors")
-    logger.info(f"Storage summary for {property_name}: {stored_count} stored, {skipped_count} skipped, {error_count} errors")
+        # 3. Update changed bookings in place (keyed on the stored booking_id) in one more upsert
+        if updates:
+            try:
+                with span(STAGE_SUPABASE_UPDATE), observe_database("otabooking", "update"):
+                    result = supabase.table("otabooking").upsert(updates, on_conflict="booking_id").execute()
+                updated = len(result.data or [])
+                summary["updated"] += updated
+                st.success(f"Updated {updated} changed bookings for {property_name}")
+                logger.info(f"Updated {updated} changed bookings for {property_name}")
+            except Exception as e:
+                st.error(f"Error updating changed bookings for {property_name}: {str(e)}")
+                logger.error(f"Error updating changed bookings for {property_name}: {str(e)}")
+                summary["errors"] += len(updates)
+                failed_keys.update(card_key(row['original_booking_id'], row['room_number']) for row in updates)
 
-def fetch_for_property(property_name: str, hotel_id: str) -> None:
-    """Fetch OTA bookings for a single property with enhanced error handling."""
+        # 4. Bookings of this batch that were written are now known to the watermark and checkpoint
+        written = [booking for booking in bookings if booking.get('booking_id') and booking_card_key(booking) not in failed_keys]
+        if self.checkpoint is not None:
+            self.checkpoint.mark_completed([booking_card_key(booking) for booking in written])
+        if self.watermark:
+            self.watermark.commit([booking_card_key(booking) for booking in written])
+            try:
+                self.watermark.save()
+            except Exception as e:
+                logger.warning(f"Could not save sync watermark for {property_name}: {str(e)}")
+
+def fetch_for_property(property_name: str, hotel_id: str, chrome_profile_path: Optional[str] = None, cancel_event: Optional[threading.Event] = None,
+                       full_resync: bool = False) -> Dict[str, int]:
+    """Fetch OTA bookings for a single property and return the storage summary.
+
+    By default only new or changed bookings are scraped (see SyncWatermark); full_resync re-opens every folio.
+    Stage timings of the run are recorded as a sync trace (see sync_trace.py).
+    """
+    summary = {"stored": 0, "updated": 0, "skipped": 0, "errors": 0}
+    received = 0
+    trace = None
+    status = STATUS_CANCELLED  # Kept when Streamlit stops or reruns the script mid-sync
+    SYNC_IN_PROGRESS.inc(property=property_name)
     try:
-        st.info(f"Starting fetch for {property_name} (ID: {hotel_id})")
-        logger.info(f"Starting fetch for {property_name} (ID: {hotel_id})")
+        with trace_property(property_name, hotel_id) as trace:
+            try:
+                st.info(f"Starting fetch for {property_name} (ID: {hotel_id})")
+                logger.info(f"Starting fetch for {property_name} (ID: {hotel_id})")
         
-        bookings = login_to_stayflexi(CHROME_PROFILE_PATH, property_name, hotel_id)
+                # Each property gets its own profile directory so parallel browsers never share one
+                profile_path = chrome_profile_path or f"{CHROME_PROFILE_PATH}_{hotel_id}"
+                watermark = SyncWatermark.load(hotel_id)
+                # Fingerprints stored with the rows are authoritative, e.g. after a sync from another machine
+                with span(STAGE_SUPABASE_FINGERPRINTS):
+                    watermark.summary_hashes.update(load_stored_fingerprints(property_name))
+                # An interrupted run earlier today leaves a checkpoint to resume from; a full resync starts over
+                checkpoint = ScrapeCheckpoint.load(hotel_id)
+                if full_resync or checkpoint.finished:
+                    checkpoint.clear()
+
+                # Bookings are written in micro-batches while the scrape is still running
+                writer = OtaBookingWriter(property_name, watermark=watermark, checkpoint=checkpoint)
+                try:
+                    for booking in stream_ota_bookings(profile_path, property_name, hotel_id, cancel_event, watermark, full_resync, checkpoint):
+                        writer.add(booking)
+                finally:
+                    summary = writer.close()
         
-        if bookings:
-            st.info(f"Retrieved {len(bookings)} bookings for {property_name}, proceeding to store in database...")
-            store_in_supabase(bookings, property_name)
-        else:
-            st.warning(f"No bookings fetched for {property_name} (ID: {hotel_id})")
-            logger.warning(f"No bookings fetched for {property_name}")
+                received = writer.received
+                if not writer.received:
+                    st.warning(f"No new or changed bookings fetched for {property_name} (ID: {hotel_id})")
+                    logger.warning(f"No bookings fetched for {property_name}")
+
+                # Non-OTA bookings are only marked once the whole run succeeded, so failures are retried next run
+                if summary["errors"] == 0:
+                    watermark.commit()
+                    watermark.save()
+                # Bookings that failed to store are neither completed nor in the watermark, so the next run retries them
+                if checkpoint.finished:
+                    checkpoint.clear()
             
+            except Exception as e:
+                st.error(f"Critical error during fetch for {property_name} (ID: {hotel_id}): {str(e)}")
+                logger.error(f"Critical error during fetch for {property_name}: {str(e)}")
+                summary["errors"] += 1
+            trace.summary = summary
+        status = STATUS_CANCELLED if cancel_event is not None and cancel_event.is_set() else summary_status(summary)
+    finally:
+        # Also reached when Streamlit stops the script mid-sync
+        record_sync_metrics(property_name, status, summary, received, trace.elapsed if trace else 0.0)
+    return summary
+
+def record_sync_metrics(property_name: str, status: str, summary: Dict[str, int], received: int, elapsed: Optional[float]) -> None:
+    """Update the Prometheus metrics of a property sync that ended with status (done, failed or cancelled)."""
+    SYNC_IN_PROGRESS.dec(property=property_name)
+    SYNC_RUNS.inc(property=property_name, status=status)
+    SYNC_DURATION.observe(elapsed or 0.0, property=property_name)
+    if status == STATUS_DONE:
+        SYNC_LAST_SUCCESS.set(time.time(), property=property_name)
+    BOOKINGS_SCRAPED.inc(received, property=property_name)
+    for key, result in (("stored", "stored"), ("updated", "updated"), ("skipped", "skipped"), ("errors", "error")):
+        if summary.get(key):
+            BOOKINGS_WRITTEN.inc(summary[key], property=property_name, result=result)
+
+def sync_property(property_name: str, hotel_id: str, cancel_event: Optional[threading.Event] = None, full_resync: bool = False) -> Dict[str, int]:
+    """Sync a property from the page as a job of the sync queue.
+
+    The run is claimed in the job table like a background job, so it never overlaps a sync of the
+    same property by the worker or another session; if one is running or finished recently, this
+    waits for it and returns its summary instead.
+    """
+    return run_sync_job(
+        property_name, hotel_id, fetch_for_property, full_resync=full_resync,
+        requested_by=st.session_state.get("role"), cancel_event=cancel_event, timeout=SYNC_PROPERTY_TIMEOUT
+    )
+
+def job_progress_info(job: Dict) -> Dict:
+    """Shape a queued sync job like the per-property info that show_progress renders."""
+    info = {"hotel_id": job["hotel_id"], "summary": job.get("result"), "error": job.get("error")}
+    if job.get("started_at"):
+        info["elapsed"] = round((job.get("finished_at") or time.time()) - job["started_at"], 1)
+    return info
+
+def render_sync_jobs() -> None:
+    """Table of recent background sync jobs with a cancel button for each active one."""
+    jobs = list_jobs(limit=len(PROPERTIES) * 3)
+    if not jobs:
+        st.info("No sync jobs yet.")
+        return
+    for job in jobs:
+        col1, col2 = st.columns([5, 1])
+        show_progress(col1.empty(), f"#{job['id']} {job['property_name']}", job["status"], job_progress_info(job))
+        if job["status"] in ACTIVE_STATUSES:
+            # The callback runs before the rerun, so the table already shows the cancellation
+            col2.button("Cancel", key=f"sync_job_cancel_{job['id']}", on_click=request_cancel, args=(job["id"],))
+
+def show_sync_jobs() -> None:
+    """Show recent background sync jobs and let the user cancel active ones."""
+    st.subheader("Background Sync Jobs")
+    col1, col2 = st.columns([3, 1])
+    watch = col1.checkbox("Auto-refresh while jobs are active", value=True, key="sync_jobs_watch")
+    col2.button("Refresh", key="sync_jobs_refresh")
+
+    # Only the job table reruns on the timer, never the whole page; Streamlit releases without
+    # st.fragment (before 1.37) fall back to the Refresh button
+    fragment = getattr(st, "fragment", None)
+    active = any(job["status"] in ACTIVE_STATUSES for job in list_jobs(limit=len(PROPERTIES) * 3))
+    if watch and active and fragment is not None:
+        fragment(run_every=SYNC_WORKER_POLL_SECONDS)(render_sync_jobs)()
+    else:
+        render_sync_jobs()
+
+def show_sync_diagnostics() -> None:
+    """Show where sync time goes: mean seconds per stage for each property, and the stages of recent runs."""
+    with st.expander("Sync diagnostics (stage timings)"):
+        runs = load_runs()
+        running = active_runs()
+        if running:
+            st.write(f"Running in this process: {', '.join(run['property'] for run in running)}")
+        if not runs:
+            st.info("No finished syncs recorded yet.")
+            return
+
+        st.write(f"Mean seconds per run by stage, over the last {len(runs)} runs. Stages can nest, so they do not add up to the run time.")
+        by_property = aggregate_by_property(runs)
+        st.dataframe([
+            {"property": name, "runs": stages["run"]["runs"], **{stage: timing["mean_per_run"] for stage, timing in sorted(stages.items())}}
+            for name, stages in by_property.items()
+        ], use_container_width=True)
+
+        st.write("Recent runs (total seconds per stage):")
+        st.dataframe([
+            {"started": run["started_at"], "property": run["property"], "status": run["status"], "seconds": run["elapsed"],
+             "stored": run["summary"].get("stored", 0), "errors": run["summary"].get("errors", 0),
+             **{stage: timing["total"] for stage, timing in sorted(run["stages"].items())}}
+            for run in reversed(runs[-20:])
+        ], use_container_width=True)
+
+        st.download_button("Export timings (JSON)", export_json(runs), file_name=f"sync_traces_{datetime.now():%Y%m%d_%H%M%S}.json",
+                           mime="application/json", key="sync_traces_export")
+
+def start_background_sync(properties: Dict[str, str], full_resync: bool) -> None:
+    """Queue syncs for the background worker, starting the worker if none is running."""
+    try:
+        jobs = enqueue_all_properties(properties, full_resync=full_resync, requested_by=st.session_state.get("role"))
+        ensure_worker_running()
+        created = sum(1 for _, is_new in jobs if is_new)
+        message = f"Queued {created} sync job(s); they keep running if you leave this page."
+        if created < len(jobs):
+            message += f" {len(jobs) - created} property(ies) were already syncing or synced recently and were not queued again."
+        st.success(message)
     except Exception as e:
-        st.error(f"Critical error during fetch for {property_name} (ID: {hotel_id}): {str(e)}")
-        logger.error(f"Critical error during fetch for {property_name}: {str(e)}")
+        st.error(f"Error queuing sync: {str(e)}")
+        logger.error(f"Error queuing sync: {str(e)}")
 
 def show_online_reservations() -> None:
     """Streamlit UI for online reservations."""
     st.title("Online Reservations (OTA Bookings)")
     st.markdown("Sync bookings from Stayflexi for each property.")
 
+    col1, col2 = st.columns([3, 1])
+    background = col1.checkbox("Run syncs in the background worker", value=True, key="sync_background")
+    # With the driver pool, a property beyond its size would only wait DRIVER_ACQUIRE_TIMEOUT for a browser and fail
+    max_parallel = min(len(PROPERTIES), DRIVER_POOL_SIZE) if USE_DRIVER_POOL else len(PROPERTIES)
+    if max_parallel > 1:
+        max_workers = col1.slider("Properties synced in parallel", min_value=1, max_value=max_parallel, value=min(SYNC_MAX_WORKERS, max_parallel), key="sync_workers", disabled=background)
+    else:
+        max_workers = 1
+    full_resync = col1.checkbox("Full resync (re-open every folio, not only new or changed bookings)", key="sync_full_resync")
+    if not background:
+        # Any button press reruns the script, which interrupts the sync loop and cancels the remaining properties
+        col2.button("Cancel sync", key="sync_cancel")
+
     if st.button("Sync All Properties", key="sync_all"):
-        with st.spinner("Syncing all properties..."):
-            progress_bar = st.progress(0)
-            total = len(PROPERTIES)
-            success_count = 0
-            error_count = 0
-            
-            for i, (name, id) in enumerate(PROPERTIES.items()):
-                try:
-                    st.write(f"Processing {i+1}/{total}: {name} (ID: {id})")
-                    fetch_for_property(name, id)
-                    success_count += 1
-                    progress_bar.progress((i + 1) / total)
-                except Exception as e:
-                    st.error(f"Error syncing {name} (ID: {id}): {str(e)}")
-                    logger.error(f"Error syncing {name}: {str(e)}")
-                    error_count += 1
-                    progress_bar.progress((i + 1) / total)
-                    
-            st.success(f"Sync completed! {success_count} successful, {error_count} errors")
-            logger.info(f"Completed syncing all properties: {success_count} successful, {error_count} errors")
+        if background:
+            start_background_sync(PROPERTIES, full_resync)
+        else:
+            with st.spinner("Syncing all properties..."):
+                progress_bar = st.progress(0)
+                total = len(PROPERTIES)
+                status_slots = {name: st.empty() for name in PROPERTIES}
+                containers = {name: st.expander(f"Log: {name}") for name in PROPERTIES}
+                finished = set()
+
+                def on_progress(name: str, status: str, info: Dict) -> None:
+                    show_progress(status_slots[name], name, status, info)
+                    if status in FINISHED_STATUSES:
+                        finished.add(name)
+                        progress_bar.progress(len(finished) / total)
+
+                results = run_parallel_sync(
+                    PROPERTIES,
+                    functools.partial(sync_property, full_resync=full_resync),
+                    max_workers=max_workers,
+                    property_timeout=SYNC_PROPERTY_TIMEOUT,
+                    on_progress=on_progress,
+                    containers=containers
+                )
+                counts = summarize_results(results)
+                success_count = counts.get(STATUS_DONE, 0)
+                error_count = total - success_count
+                st.success(f"Sync completed! {success_count} successful, {error_count} errors")
+                logger.info(f"Completed syncing all properties: {success_count} successful, {error_count} errors ({counts})")
 
     st.markdown("---")
     st.subheader("Individual Property Sync")
@@ -1039,13 +1635,26 @@ def show_online_reservations() -> None:
         col1, col2 = st.columns([4, 1])
         col1.write(f"Hotel: {name} (ID: {id})")
         if col2.button(f"Sync {name}", key=f"sync_{name}"):
+            if background:
+                start_background_sync({name: id}, full_resync)
+                continue
             with st.spinner(f"Syncing {name}..."):
                 try:
-                    fetch_for_property(name, id)
-                    st.success(f"Successfully synced {name}")
+                    summary = sync_property(name, id, full_resync=full_resync)
+                    if summary.get("coalesced"):
+                        st.success(f"{name} was synced by another request; showing its result: {summary.get('stored', 0)} stored, {summary.get('updated', 0)} updated")
+                    else:
+                        st.success(f"Successfully synced {name}")
                 except Exception as e:
                     st.error(f"Error syncing {name} (ID: {id}): {str(e)}")
                     logger.error(f"Error syncing {name}: {str(e)}")
 
+    if background:
+        st.markdown("---")
+        show_sync_jobs()
+
+    st.markdown("---")
+    show_sync_diagnostics()
+
 if __name__ == "__main__":
     show_online_reservations()
@@ -0,0 +1,144 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+from config import PAGE_WAIT_TIMEOUT, PAGE_QUIET_MS
+from sync_trace import record as record_trace
+
+# Set up logging for debugging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Installs (once per document) a MutationObserver and fetch/XHR counters, then reports page activity.
+# Resource-timing entries are counted too so requests started before the hooks were installed are seen.
+ACTIVITY_PROBE_JS = """
+const w = window;
+if (!w.__tieWait) {
+    const state = {pending: 0, lastActivity: performance.now(), resources: 0};
+    w.__tieWait = state;
+    const touch = () => { state.lastActivity = performance.now(); };
+    new MutationObserver(touch).observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+    if (w.fetch) {
+        const originalFetch = w.fetch;
+        w.fetch = function() {
+            state.pending++; touch();
+            return originalFetch.apply(this, arguments).finally(() => { state.pending--; touch(); });
+        };
+    }
+    const originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function() {
+        state.pending++; touch();
+        this.addEventListener('loadend', () => { state.pending--; touch(); });
+        return originalSend.apply(this, arguments);
+    };
+}
+const state = w.__tieWait;
+const resources = performance.getEntriesByType('resource').length;
+if (resources !== state.resources) { state.resources = resources; state.lastActivity = performance.now(); }
+return {ready: document.readyState, pending: state.pending, quietFor: performance.now() - state.lastActivity, blank: location.href === 'about:blank'};
+"""
+
+# Returns a fingerprint of an element's geometry and text, or null if it is missing
+ELEMENT_SNAPSHOT_JS = """
+const elem = arguments[0];
+if (!elem || !elem.isConnected) return null;
+const rect = elem.getBoundingClientRect();
+return [rect.x, rect.y, rect.width, rect.height, (elem.innerText || '').length].join(',');
+"""
+
+_timings_lock = threading.Lock()
+_wait_timings: Dict[str, Dict[str, float]] = {}  # step -> count/total/max, so long-lived processes use constant memory
+
+def record_wait_timing(step: str, seconds: float) -> None:
+    """Record how long a named wait step took, also as a "wait.<step>" stage of the current sync trace."""
+    with _timings_lock:
+        timing = _wait_timings.setdefault(step, {"count": 0, "total": 0.0, "max": 0.0})
+        timing["count"] += 1
+        timing["total"] += seconds
+        timing["max"] = max(timing["max"], seconds)
+    record_trace(f"wait.{step}", seconds)
+
+def get_wait_timings() -> Dict[str, Dict[str, float]]:
+    """Return count/total/max seconds for every wait step recorded in this process."""
+    with _timings_lock:
+        return {
+            step: {"count": timing["count"], "total": round(timing["total"], 3), "max": round(timing["max"], 3)}
+            for step, timing in _wait_timings.items()
+        }
+
+def reset_wait_timings() -> None:
+    """Forget all recorded wait timings."""
+    with _timings_lock:
+        _wait_timings.clear()
+
+def _probe(driver: webdriver.Chrome) -> Optional[Dict]:
+    try:
+        return driver.execute_script(ACTIVITY_PROBE_JS)
+    except Exception:
+        return None  # Page is mid-navigation; try again on the next poll
+
+def _timed_wait(driver: webdriver.Chrome, step: str, condition, timeout: float) -> bool:
+    """Poll condition until it holds or timeout expires; never raises, always records the time spent."""
+    start = time.monotonic()
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.1).until(condition)
+        satisfied = True
+    except TimeoutException:
+        satisfied = False
+        logger.warning(f"Wait step '{step}' timed out after {timeout}s, continuing")
+    elapsed = time.monotonic() - start
+    record_wait_timing(step, elapsed)
+    logger.debug(f"Wait step '{step}' took {elapsed:.2f}s")
+    return satisfied
+
+def wait_for_page_settled(driver: webdriver.Chrome, step: str, timeout: float = PAGE_WAIT_TIMEOUT, quiet_ms: int = PAGE_QUIET_MS) -> bool:
+    """Wait until the document is loaded, no fetch/XHR is in flight and the DOM has been quiet for quiet_ms.
+
+    A request that stays open without any activity (long polling) is tolerated after four quiet periods.
+    """
+    return _timed_wait(driver, step, lambda d: page_settled_now(d, quiet_ms), timeout)
+
+def page_settled_now(driver: webdriver.Chrome, quiet_ms: int = PAGE_QUIET_MS) -> bool:
+    """Single non-blocking check of the wait_for_page_settled condition for the current window."""
+    state = _probe(driver)
+    if not state or state["ready"] != "complete" or state.get("blank"):
+        return False  # A tab still on about:blank has not started its navigation yet
+    return state["quietFor"] >= (quiet_ms if state["pending"] <= 0 else 4 * quiet_ms)
+
+def wait_for_dom_quiet(driver: webdriver.Chrome, step: str, timeout: float = PAGE_WAIT_TIMEOUT, quiet_ms: int = PAGE_QUIET_MS) -> bool:
+    """Wait until no DOM mutation has happened for quiet_ms, e.g. after expanding an accordion."""
+    def quiet(d):
+        state = _probe(d)
+        return bool(state) and state["quietFor"] >= quiet_ms
+    return _timed_wait(driver, step, quiet, timeout)
+
+def wait_for_stable_element(driver: webdriver.Chrome, locator: Tuple[str, str], step: str, timeout: float = PAGE_WAIT_TIMEOUT):
+    """Wait until the located element exists and its geometry and text are unchanged between two polls."""
+    last = {"snapshot": None}
+
+    def stable(d):
+        try:
+            elem = d.find_element(*locator)
+            snapshot = d.execute_script(ELEMENT_SNAPSHOT_JS, elem)
+        except Exception:
+            last["snapshot"] = None
+            return False
+        if snapshot is not None and snapshot == last["snapshot"]:
+            return elem
+        last["snapshot"] = snapshot
+        return False
+
+    start = time.monotonic()
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=0.2).until(stable)
+    finally:
+        record_wait_timing(step, time.monotonic() - start)
+
+def wait_for_new_window(driver: webdriver.Chrome, handles_before: List[str], step: str, timeout: float = PAGE_WAIT_TIMEOUT, url_fragment: Optional[str] = None) -> bool:
+    """Wait until a new window has opened, or the current one has navigated to url_fragment."""
+    def opened(d):
+        return len(d.window_handles) > len(handles_before) or bool(url_fragment and url_fragment in d.current_url)
+    return _timed_wait(driver, step, opened, timeout)
@@ -0,0 +1,147 @@
+import logging
+from datetime import date
+from typing import Dict, List, Optional
+import pandas as pd
+import streamlit as st
+from supabase import create_client, Client
+from config import RESERVATIONS_PAGE_SIZE, RESERVATIONS_CACHE_TTL
+from metrics import observe_database
+
+# Set up logging for debugging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Supabase camelCase column -> (UI title-case column, default value)
+RESERVATION_COLUMNS = {
+    "propertyName": ("Property Name", ""),
+    "bookingId": ("Booking ID", ""),
+    "guestName": ("Guest Name", ""),
+    "guestPhone": ("Guest Phone", ""),
+    "checkIn": ("Check In", ""),
+    "checkOut": ("Check Out", ""),
+    "roomNo": ("Room No", ""),
+    "roomType": ("Room Type", ""),
+    "noOfAdults": ("No of Adults", 0),
+    "noOfChildren": ("No of Children", 0),
+    "noOfInfants": ("No of Infants", 0),
+    "ratePlans": ("Rate Plans", ""),
+    "bookingSource": ("Booking Source", ""),
+    "totalTariff": ("Total Tariff", 0.0),
+    "advancePayment": ("Advance Payment", 0.0),
+    "balance": ("Balance", 0.0),
+    "advanceMop": ("Advance MOP", "Not Paid"),
+    "balanceMop": ("Balance MOP", "Not Paid"),
+    "bookingStatus": ("Booking Status", "Pending"),
+    "paymentStatus": ("Payment Status", "Not Paid"),
+    "submittedBy": ("Submitted By", ""),
+    "modifiedBy": ("Modified By", ""),
+    "modifiedComments": ("Modified Comments", ""),
+    "remarks": ("Remarks", "")
+}
+
+# Dtypes of the typed DataFrame returned by load_reservations_dataframe
+CATEGORY_COLUMNS = ["Property Name", "Room Type", "Booking Source", "Advance MOP", "Balance MOP", "Booking Status", "Payment Status"]
+DATETIME_COLUMNS = ["Check In", "Check Out"]
+FLOAT_COLUMNS = ["Total Tariff", "Advance Payment", "Balance"]
+COUNT_COLUMNS = ["No of Adults", "No of Children", "No of Infants"]
+
+@st.cache_resource
+def get_supabase_client() -> Client:
+    """Supabase client shared by every session."""
+    return create_client(st.secrets["supabase"]["url"], st.secrets["supabase"]["key"])
+
+def to_display_record(record: Dict) -> Dict:
+    """Transform a Supabase camelCase row to the title-case dict used by the UI."""
+    return {title: record.get(column, default) for column, (title, default) in RESERVATION_COLUMNS.items()}
+
+def _filtered_query(query, start_date: Optional[date], end_date: Optional[date], property_name: Optional[str]):
+    if start_date:
+        query = query.gte("checkIn", start_date.isoformat())
+    if end_date:
+        query = query.lte("checkIn", end_date.isoformat())
+    if property_name:
+        query = query.eq("propertyName", property_name)
+    return query
+
+@st.cache_data(ttl=RESERVATIONS_CACHE_TTL, show_spinner=False)
+def fetch_raw_reservations_page(page: int = 0, page_size: int = RESERVATIONS_PAGE_SIZE, start_date: Optional[date] = None,
+                                end_date: Optional[date] = None, property_name: Optional[str] = None) -> Dict:
+    """Fetch one page of raw camelCase reservation rows (newest check-in first) with filters applied by Supabase.
+
+    Returns {"rows": [...], "total": matching row count}. Results are cached across sessions for
+    RESERVATIONS_CACHE_TTL seconds or until invalidate_reservation_cache().
+    """
+    start = page * page_size
+    query = get_supabase_client().table("reservations").select("*", count="exact")
+    query = _filtered_query(query, start_date, end_date, property_name)
+    with observe_database("reservations", "select"):
+        response = query.order("checkIn", desc=True).range(start, start + page_size - 1).execute()
+    total = response.count if response.count is not None else start + len(response.data)
+    logger.info(f"Fetched reservations page {page} ({len(response.data)} rows of {total})")
+    return {"rows": response.data, "total": total}
+
+def fetch_reservations_page(page: int = 0, page_size: int = RESERVATIONS_PAGE_SIZE, start_date: Optional[date] = None,
+                            end_date: Optional[date] = None, property_name: Optional[str] = None) -> Dict:
+    """One page of reservations as title-case dicts: {"rows": [...], "total": matching row count}."""
+    result = fetch_raw_reservations_page(page, page_size, start_date, end_date, property_name)
+    return {"rows": [to_display_record(record) for record in result["rows"]], "total": result["total"]}
+
+def _iter_raw_pages(start_date: Optional[date], end_date: Optional[date], property_name: Optional[str], page_size: int = RESERVATIONS_PAGE_SIZE):
+    page = 0
+    while True:
+        result = fetch_raw_reservations_page(page, page_size, start_date, end_date, property_name)
+        yield result["rows"]
+        if len(result["rows"]) < page_size or (page + 1) * page_size >= result["total"]:
+            break
+        page += 1
+
+def iter_reservations(start_date: Optional[date] = None, end_date: Optional[date] = None, property_name: Optional[str] = None,
+                      page_size: int = RESERVATIONS_PAGE_SIZE):
+    """Yield matching reservations page by page, so callers only pull as much as they use."""
+    for rows in _iter_raw_pages(start_date, end_date, property_name, page_size):
+        for record in rows:
+            yield to_display_record(record)
+
+def fetch_all_reservations(start_date: Optional[date] = None, end_date: Optional[date] = None, property_name: Optional[str] = None) -> List[Dict]:
+    """All matching reservations, assembled from cached pages."""
+    return list(iter_reservations(start_date, end_date, property_name))
+
+@st.cache_data(ttl=RESERVATIONS_CACHE_TTL, show_spinner=False)
+def load_reservations_dataframe(start_date: Optional[date] = None, end_date: Optional[date] = None, property_name: Optional[str] = None) -> pd.DataFrame:
+    """Build a typed, column-oriented DataFrame of matching reservations without per-row dicts.
+
+    Check In/Check Out are parsed to datetimes once, tariffs are floats, guest counts are
+    integers and repetitive text columns (property, source, statuses, MOPs) are categoricals.
+    """
+    frames = [pd.DataFrame.from_records(rows) for rows in _iter_raw_pages(start_date, end_date, property_name) if rows]
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    df = df.reindex(columns=list(RESERVATION_COLUMNS))
+    df = df.fillna({column: default for column, (_, default) in RESERVATION_COLUMNS.items()})
+    df.columns = [title for title, _ in RESERVATION_COLUMNS.values()]
+    for column in DATETIME_COLUMNS:
+        df[column] = pd.to_datetime(df[column], errors="coerce")
+    for column in FLOAT_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors="coerce").fillna(0.0).astype("float64")
+    for column in COUNT_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors="coerce").fillna(0).astype("int16")
+    for column in CATEGORY_COLUMNS:
+        df[column] = df[column].astype("category")
+    logger.info(f"Loaded {len(df)} reservations into DataFrame ({df.memory_usage(deep=True).sum() / 1024:.0f} KiB)")
+    return df
+
+def filter_by_check_in(df: pd.DataFrame, start_date=None, end_date=None, property_name: Optional[str] = None) -> pd.DataFrame:
+    """Filter a typed reservations DataFrame on its pre-parsed Check In column (no up-front copy, no re-parsing)."""
+    mask = pd.Series(True, index=df.index)
+    if start_date:
+        mask &= df["Check In"] >= pd.Timestamp(start_date)
+    if end_date:
+        mask &= df["Check In"] <= pd.Timestamp(end_date)
+    if property_name:
+        mask &= df["Property Name"] == property_name
+    return df if mask.all() else df[mask]
+
+def invalidate_reservation_cache() -> None:
+    """Drop cached reservation pages and DataFrames after an insert, update or delete."""
+    fetch_raw_reservations_page.clear()
+    load_reservations_dataframe.clear()
+    logger.info("Invalidated reservation cache")
@@ -0,0 +1,36 @@
+-- Atomic booking-ID counter used by booking_ids.SupabaseCounterBackend.
+-- Apply once in the Supabase SQL editor.
+
+create table if not exists booking_id_counters (
+    prefix text not null,
+    day text not null,
+    last_value integer not null default 0,
+    primary key (prefix, day)
+);
+
+-- Reserves p_count sequence numbers for (p_prefix, p_day) and returns the last one.
+create or replace function allocate_booking_ids(p_prefix text, p_day text, p_count integer default 1)
+returns integer
+language sql
+as $$
+    insert into booking_id_counters (prefix, day, last_value)
+    values (p_prefix, p_day, p_count)
+    on conflict (prefix, day) do update
+        set last_value = booking_id_counters.last_value + excluded.last_value
+    returning last_value;
+$$;
+
+-- Seed the counters from IDs issued before the counter existed.
+insert into booking_id_counters (prefix, day, last_value)
+select 'TIE', substring("bookingId" from 4 for 8), max(substring("bookingId" from 12)::integer)
+from reservations
+where "bookingId" ~ '^TIE[0-9]{11,}$'
+group by 2
+on conflict (prefix, day) do update set last_value = greatest(booking_id_counters.last_value, excluded.last_value);
+
+insert into booking_id_counters (prefix, day, last_value)
+select 'SFX', substring(booking_id from 4 for 8), max(substring(booking_id from 12)::integer)
+from otabooking
+where booking_id ~ '^SFX[0-9]{11,}$'
+group by 2
+on conflict (prefix, day) do update set last_value = greatest(booking_id_counters.last_value, excluded.last_value);
@@ -0,0 +1,5 @@
+-- Index backing the per-property prefetch of 'otabooking' rows (booking keys, fingerprints and guest keys) in OtaBookingWriter.
+-- Apply once in the Supabase SQL editor.
+
+create index if not exists otabooking_property_idx
+    on otabooking (property);
@@ -0,0 +1,6 @@
+-- Content fingerprints used by online_reservation to detect changed bookings between syncs.
+-- card_hash: SHA-1 of the reservation-list card text; folio_hash: SHA-1 of the folio financial figures.
+-- Apply once in the Supabase SQL editor.
+
+alter table otabooking add column if not exists card_hash text;
+alter table otabooking add column if not exists folio_hash text;
@@ -0,0 +1,167 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, Optional
+from config import SYNC_MAX_WORKERS, SYNC_PROPERTY_TIMEOUT
+
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except ImportError:  # Older Streamlit releases
+    from streamlit.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+# Set up logging for debugging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Per-property sync states reported through on_progress
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+STATUS_TIMED_OUT = "timed out"
+STATUS_CANCELLED = "cancelled"
+
+FINISHED_STATUSES = (STATUS_DONE, STATUS_FAILED, STATUS_TIMED_OUT, STATUS_CANCELLED)
+
+def summary_status(summary: Optional[Dict[str, int]]) -> str:
+    """Final status of a sync that returned normally: sync functions report failures as errors in their summary."""
+    return STATUS_FAILED if (summary or {}).get("errors") else STATUS_DONE
+
+def run_parallel_sync(
+    properties: Dict[str, str],
+    sync_fn: Callable[..., Optional[Dict[str, int]]],
+    max_workers: int = SYNC_MAX_WORKERS,
+    property_timeout: float = SYNC_PROPERTY_TIMEOUT,
+    cancel_event: Optional[threading.Event] = None,
+    on_progress: Optional[Callable[[str, str, Dict], None]] = None,
+    containers: Optional[Dict[str, object]] = None,
+    poll_interval: float = 1.0
+) -> Dict[str, Dict]:
+    """Run sync_fn(property_name, hotel_id, cancel_event=...) for several properties on a bounded worker pool.
+
+    on_progress is always called from the calling thread, so it may safely update Streamlit placeholders.
+    Workers are told to stop through their own cancel event when they time out or the whole run is cancelled.
+    """
+    cancel_event = cancel_event or threading.Event()
+    max_workers = max(1, min(max_workers, len(properties) or 1))
+    ctx = get_script_run_ctx()
+    results: Dict[str, Dict] = {name: {"status": STATUS_QUEUED, "hotel_id": hotel_id} for name, hotel_id in properties.items()}
+    started_at: Dict[str, float] = {}
+    property_events = {name: threading.Event() for name in properties}
+
+    def report(name: str) -> None:
+        if on_progress:
+            try:
+                on_progress(name, results[name]["status"], results[name])
+            except Exception as e:
+                logger.warning(f"Progress callback failed for {name}: {str(e)}")
+
+    def worker(name: str, hotel_id: str) -> Optional[Dict[str, int]]:
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        if cancel_event.is_set() or property_events[name].is_set():
+            return None
+        started_at[name] = time.monotonic()
+        if containers and name in containers:
+            with containers[name]:
+                return sync_fn(name, hotel_id, cancel_event=property_events[name])
+        return sync_fn(name, hotel_id, cancel_event=property_events[name])
+
+    for name in properties:
+        report(name)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="property-sync")
+    futures = {executor.submit(worker, name, hotel_id): name for name, hotel_id in properties.items()}
+    pending = set(futures)
+    logger.info(f"Started parallel sync of {len(properties)} properties with {max_workers} workers")
+
+    try:
+        while pending:
+            done, _ = wait(pending, timeout=poll_interval, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                name = futures[future]
+                if results[name]["status"] in FINISHED_STATUSES:
+                    continue  # Already reported as timed out or cancelled
+                if future.cancelled():
+                    results[name]["status"] = STATUS_CANCELLED
+                else:
+                    error = future.exception()
+                    if error is not None:
+                        results[name].update(status=STATUS_FAILED, error=str(error))
+                        logger.error(f"Sync failed for {name}: {str(error)}")
+                    elif cancel_event.is_set() or property_events[name].is_set():
+                        results[name].update(status=STATUS_CANCELLED, summary=future.result() or {})
+                    else:
+                        summary = future.result() or {}
+                        results[name].update(status=summary_status(summary), summary=summary)
+                if name in started_at:
+                    results[name]["elapsed"] = round(time.monotonic() - started_at[name], 1)
+                report(name)
+
+            now = time.monotonic()
+            for future in list(pending):
+                name = futures[future]
+                if name in started_at and results[name]["status"] == STATUS_QUEUED:
+                    results[name]["status"] = STATUS_RUNNING
+                    report(name)
+                if name in started_at and now - started_at[name] > property_timeout:
+                    # The worker thread cannot be killed; signal it and stop waiting for it
+                    property_events[name].set()
+                    pending.discard(future)
+                    results[name].update(status=STATUS_TIMED_OUT, elapsed=round(now - started_at[name], 1))
+                    logger.warning(f"Sync for {name} exceeded {property_timeout}s and was abandoned")
+                    report(name)
+
+            if cancel_event.is_set():
+                for future in list(pending):
+                    name = futures[future]
+                    property_events[name].set()
+                    if future.cancel() or results[name]["status"] != STATUS_RUNNING:
+                        pending.discard(future)
+                        results[name]["status"] = STATUS_CANCELLED
+                        report(name)
+    finally:
+        # Reached on completion and also when Streamlit interrupts the script run (rerun/stop)
+        if pending:
+            cancel_event.set()
+            for event in property_events.values():
+                event.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    logger.info(f"Parallel sync finished: {summarize_results(results)}")
+    return results
+
+def summarize_results(results: Dict[str, Dict]) -> Dict[str, int]:
+    """Count properties per final status."""
+    summary: Dict[str, int] = {}
+    for result in results.values():
+        summary[result["status"]] = summary.get(result["status"], 0) + 1
+    return summary
+
+def format_progress(name: str, status: str, info: Dict) -> str:
+    """Build a one-line progress message for a property."""
+    message = f"{name} (ID: {info.get('hotel_id')}): {status}"
+    if info.get("elapsed") is not None:
+        message += f" in {info['elapsed']}s"
+    if info.get("summary"):
+        summary = info["summary"]
+        message += f" - {summary.get('stored', 0)} stored, {summary.get('updated', 0)} updated, {summary.get('skipped', 0)} skipped, {summary.get('errors', 0)} errors"
+        if summary.get("coalesced"):
+            message += " (shared with another sync)"
+    if info.get("error"):
+        message += f" - {info['error']}"
+    return message
+
+def show_progress(placeholder, name: str, status: str, info: Dict) -> None:
+    """Render a property's progress into a Streamlit placeholder."""
+    message = format_progress(name, status, info)
+    if status == STATUS_DONE:
+        placeholder.success(message)
+    elif status in (STATUS_FAILED, STATUS_TIMED_OUT):
+        placeholder.error(message)
+    elif status == STATUS_CANCELLED:
+        placeholder.warning(message)
+    else:
+        placeholder.info(message)
@@ -0,0 +1,307 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from config import SYNC_JOBS_DB, SYNC_WORKER_POLL_SECONDS, SYNC_WORKER_STALE_SECONDS, SYNC_COALESCE_WINDOW_SECONDS
+from sync_engine import STATUS_QUEUED, STATUS_RUNNING, STATUS_DONE, STATUS_FAILED, STATUS_CANCELLED, FINISHED_STATUSES, summary_status
+
+# Set up logging for debugging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sync_worker.py")
+
+# Worker IDs of app processes running a job in-page; they send heartbeats but are not background workers
+PAGE_RUNNER_PREFIX = "page-"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    batch_id TEXT,
+    property_name TEXT NOT NULL,
+    hotel_id TEXT NOT NULL,
+    full_resync INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    requested_by TEXT,
+    worker_id TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS sync_jobs_status_idx ON sync_jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS sync_jobs_hotel_idx ON sync_jobs (hotel_id, status, finished_at);
+CREATE TABLE IF NOT EXISTS sync_workers (
+    worker_id TEXT PRIMARY KEY,
+    pid INTEGER,
+    heartbeat_at REAL NOT NULL
+);
+"""
+
+@contextmanager
+def _connect(immediate: bool = False) -> Iterator[sqlite3.Connection]:
+    """Open the job database; immediate=True takes the write lock up front for read-modify-write steps."""
+    os.makedirs(os.path.dirname(SYNC_JOBS_DB) or ".", exist_ok=True)
+    conn = sqlite3.connect(SYNC_JOBS_DB, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.executescript(SCHEMA)
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+def _job_dict(row: sqlite3.Row) -> Dict:
+    job = dict(row)
+    job["full_resync"] = bool(job["full_resync"])
+    job["result"] = json.loads(job["result"]) if job.get("result") else None
+    return job
+
+def _requeue_orphaned(conn: sqlite3.Connection) -> int:
+    """Requeue running jobs whose worker or page runner stopped sending heartbeats; cancel those already asked to stop."""
+    orphaned = "status = ? AND (worker_id IS NULL OR worker_id NOT IN (SELECT worker_id FROM sync_workers WHERE heartbeat_at >= ?))"
+    cutoff = time.time() - SYNC_WORKER_STALE_SECONDS
+    cancelled = conn.execute(
+        f"UPDATE sync_jobs SET status = ?, finished_at = ?, error = ? WHERE {orphaned} AND cancel_requested = 1",
+        (STATUS_CANCELLED, time.time(), "Cancelled after its runner stopped", STATUS_RUNNING, cutoff)
+    ).rowcount
+    requeued = conn.execute(
+        f"UPDATE sync_jobs SET status = ?, worker_id = NULL, started_at = NULL WHERE {orphaned}",
+        (STATUS_QUEUED, STATUS_RUNNING, cutoff)
+    ).rowcount
+    if requeued or cancelled:
+        logger.warning(f"Requeued {requeued} and cancelled {cancelled} sync jobs left running by a stopped runner")
+    return requeued + cancelled
+
+def _find_coalescable_job(conn: sqlite3.Connection, hotel_id: str, full_resync: bool, window: float) -> Optional[sqlite3.Row]:
+    """An active job for the hotel, or (unless a full resync is wanted) one that succeeded within the window."""
+    row = conn.execute(
+        "SELECT * FROM sync_jobs WHERE hotel_id = ? AND status IN (?, ?) ORDER BY id LIMIT 1",
+        (hotel_id, STATUS_QUEUED, STATUS_RUNNING)
+    ).fetchone()
+    if row is not None or full_resync or window <= 0:
+        return row
+    row = conn.execute(
+        "SELECT * FROM sync_jobs WHERE hotel_id = ? AND status = ? AND finished_at >= ? ORDER BY finished_at DESC LIMIT 1",
+        (hotel_id, STATUS_DONE, time.time() - window)
+    ).fetchone()
+    if row is not None and json.loads(row["result"] or "{}").get("errors", 0) == 0:
+        return row
+    return None
+
+def enqueue_sync_job(property_name: str, hotel_id: str, full_resync: bool = False, requested_by: Optional[str] = None,
+                     batch_id: Optional[str] = None, window: float = SYNC_COALESCE_WINDOW_SECONDS,
+                     claim_as: Optional[str] = None) -> Tuple[int, bool]:
+    """Queue a sync of one property and return (job ID, created).
+
+    A request for a property that is already queued or running, or that synced successfully within
+    the last window seconds, is attached to that job instead (created=False), so concurrent clicks
+    never scrape the same property twice. A full resync upgrades a still-queued job; if an
+    incremental sync is already running, a full resync is queued to follow it. Jobs left running
+    by a stopped runner are requeued first, so they never block the property.
+    With claim_as the caller runs the job itself: a new job, or the queued one it attaches to,
+    starts out running for that runner and created is True.
+    """
+    with _connect(immediate=True) as conn:
+        _requeue_orphaned(conn)
+        existing = _find_coalescable_job(conn, hotel_id, full_resync, window)
+        if existing is not None and full_resync and existing["status"] == STATUS_RUNNING and not existing["full_resync"]:
+            # The running job will not re-open every folio; attach to (or create) a queued follow-up instead
+            existing = conn.execute(
+                "SELECT * FROM sync_jobs WHERE hotel_id = ? AND status = ? ORDER BY id LIMIT 1", (hotel_id, STATUS_QUEUED)
+            ).fetchone()
+            claim_as = None  # The hotel is busy; the follow-up waits for the worker
+        if existing is not None and claim_as and existing["status"] == STATUS_QUEUED:
+            # Nothing is syncing the property yet, so run the waiting job here rather than wait for the worker
+            conn.execute(
+                "UPDATE sync_jobs SET status = ?, worker_id = ?, started_at = ?, full_resync = ? WHERE id = ?",
+                (STATUS_RUNNING, claim_as, time.time(), int(full_resync or existing["full_resync"]), existing["id"])
+            )
+            logger.info(f"Started queued sync job {existing['id']} for {property_name} (ID: {hotel_id})")
+            return existing["id"], True
+        if existing is not None:
+            if full_resync and existing["status"] == STATUS_QUEUED and not existing["full_resync"]:
+                conn.execute("UPDATE sync_jobs SET full_resync = 1 WHERE id = ?", (existing["id"],))
+            logger.info(f"Sync of {property_name} (ID: {hotel_id}) attached to job {existing['id']} ({existing['status']})")
+            return existing["id"], False
+        now = time.time()
+        cursor = conn.execute(
+            "INSERT INTO sync_jobs (batch_id, property_name, hotel_id, full_resync, status, requested_by, worker_id, created_at, started_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (batch_id, property_name, hotel_id, int(full_resync), STATUS_RUNNING if claim_as else STATUS_QUEUED, requested_by,
+             claim_as, now, now if claim_as else None)
+        )
+        job_id = cursor.lastrowid
+    logger.info(f"{'Started' if claim_as else 'Queued'} sync job {job_id} for {property_name} (ID: {hotel_id})")
+    return job_id, True
+
+def enqueue_all_properties(properties: Dict[str, str], full_resync: bool = False, requested_by: Optional[str] = None) -> List[Tuple[int, bool]]:
+    """Queue one job per property, grouped under a common batch ID."""
+    batch_id = uuid.uuid4().hex[:12]
+    return [enqueue_sync_job(name, hotel_id, full_resync, requested_by, batch_id) for name, hotel_id in properties.items()]
+
+def wait_for_job(job_id: int, timeout: Optional[float] = None, poll_interval: float = 2.0,
+                 cancel_event: Optional[threading.Event] = None) -> Optional[Dict]:
+    """Block until the job finishes and return it; returns the unfinished job on timeout or cancellation."""
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    while True:
+        job = get_job(job_id)
+        if job is None or job["status"] in FINISHED_STATUSES:
+            return job
+        if (deadline is not None and time.monotonic() >= deadline) or (cancel_event is not None and cancel_event.is_set()):
+            return job
+        time.sleep(poll_interval)
+
+def claim_next_job(worker_id: str) -> Optional[Dict]:
+    """Atomically move the oldest queued job to running for this worker."""
+    with _connect(immediate=True) as conn:
+        _requeue_orphaned(conn)
+        # A follow-up job waits until the running sync of its hotel has finished
+        row = conn.execute(
+            "SELECT * FROM sync_jobs WHERE status = ? AND hotel_id NOT IN (SELECT hotel_id FROM sync_jobs WHERE status = ?) "
+            "ORDER BY created_at, id LIMIT 1",
+            (STATUS_QUEUED, STATUS_RUNNING)
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute(
+            "UPDATE sync_jobs SET status = ?, worker_id = ?, started_at = ? WHERE id = ?",
+            (STATUS_RUNNING, worker_id, time.time(), row["id"])
+        )
+        job = _job_dict(row)
+    job.update(status=STATUS_RUNNING, worker_id=worker_id)
+    return job
+
+def run_sync_job(property_name: str, hotel_id: str, sync_fn: Callable[..., Dict[str, int]], full_resync: bool = False,
+                 requested_by: Optional[str] = None, cancel_event: Optional[threading.Event] = None,
+                 timeout: Optional[float] = None) -> Dict[str, int]:
+    """Run sync_fn(property_name, hotel_id, cancel_event=..., full_resync=...) in this process as a job of the queue.
+
+    The job is claimed in the same transaction that checks for other syncs of the hotel, so an in-page
+    sync never overlaps one by the background worker or another session. If the hotel is already
+    being synced (or synced recently), this waits for that job and returns its summary with coalesced=True.
+    """
+    runner_id = f"{PAGE_RUNNER_PREFIX}{socket.gethostname()}-{os.getpid()}"
+    record_worker_heartbeat(runner_id)  # Before claiming, so the new job never looks orphaned
+    job_id, created = enqueue_sync_job(property_name, hotel_id, full_resync, requested_by, claim_as=runner_id)
+    job = get_job(job_id)
+    if not created:
+        logger.info(f"{property_name} (ID: {hotel_id}) is already being synced by job {job_id}, waiting for it")
+        if job["status"] == STATUS_QUEUED:
+            ensure_worker_running()
+        job = wait_for_job(job_id, timeout=timeout, cancel_event=cancel_event) or job
+        summary = job.get("result") or {"stored": 0, "updated": 0, "skipped": 0, "errors": 0 if job["status"] == STATUS_DONE else 1}
+        return dict(summary, coalesced=True)
+    full_resync = job["full_resync"]  # A claimed queued job may have been requested as a full resync
+
+    # Heartbeats keep requeue_orphaned_jobs from handing the job to the worker; a cancel from the job table reaches the sync here
+    cancel_event = cancel_event or threading.Event()
+    stopped = threading.Event()
+
+    def heartbeat() -> None:
+        while not stopped.wait(SYNC_WORKER_POLL_SECONDS):
+            try:
+                record_worker_heartbeat(runner_id)
+                if is_cancel_requested(job_id):
+                    cancel_event.set()
+            except Exception as e:
+                logger.warning(f"Heartbeat for sync job {job_id} failed: {str(e)}")
+
+    threading.Thread(target=heartbeat, name=f"sync-job-{job_id}-heartbeat", daemon=True).start()
+    try:
+        result = sync_fn(property_name, hotel_id, cancel_event=cancel_event, full_resync=full_resync)
+    except Exception as e:
+        finish_job(job_id, STATUS_FAILED, error=str(e))
+        raise
+    except BaseException:
+        # Streamlit stopped or reran the script mid-sync
+        finish_job(job_id, STATUS_CANCELLED, error="Interrupted")
+        raise
+    finally:
+        stopped.set()
+    finish_job(job_id, STATUS_CANCELLED if cancel_event.is_set() else summary_status(result), result=result)
+    return result
+
+def finish_job(job_id: int, status: str, result: Optional[Dict] = None, error: Optional[str] = None) -> None:
+    """Record the final state of a job."""
+    with _connect(immediate=True) as conn:
+        conn.execute(
+            "UPDATE sync_jobs SET status = ?, finished_at = ?, result = ?, error = ? WHERE id = ?",
+            (status, time.time(), json.dumps(result) if result is not None else None, error, job_id)
+        )
+    logger.info(f"Sync job {job_id} finished: {status}")
+
+def request_cancel(job_id: int) -> None:
+    """Cancel a queued job immediately, or ask the worker to stop a running one."""
+    with _connect(immediate=True) as conn:
+        _requeue_orphaned(conn)  # A job whose runner stopped is queued again and so cancelled right away
+        conn.execute("UPDATE sync_jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?", (STATUS_CANCELLED, time.time(), job_id, STATUS_QUEUED))
+        conn.execute("UPDATE sync_jobs SET cancel_requested = 1 WHERE id = ? AND status = ?", (job_id, STATUS_RUNNING))
+
+def is_cancel_requested(job_id: int) -> bool:
+    with _connect() as conn:
+        row = conn.execute("SELECT cancel_requested FROM sync_jobs WHERE id = ?", (job_id,)).fetchone()
+    return bool(row and row["cancel_requested"])
+
+def get_job(job_id: int) -> Optional[Dict]:
+    with _connect() as conn:
+        row = conn.execute("SELECT * FROM sync_jobs WHERE id = ?", (job_id,)).fetchone()
+    return _job_dict(row) if row else None
+
+def list_jobs(limit: int = 50) -> List[Dict]:
+    """Most recent jobs first."""
+    with _connect() as conn:
+        rows = conn.execute("SELECT * FROM sync_jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+    return [_job_dict(row) for row in rows]
+
+def record_worker_heartbeat(worker_id: str) -> None:
+    with _connect(immediate=True) as conn:
+        conn.execute(
+            "INSERT INTO sync_workers (worker_id, pid, heartbeat_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (worker_id) DO UPDATE SET pid = excluded.pid, heartbeat_at = excluded.heartbeat_at",
+            (worker_id, os.getpid(), time.time())
+        )
+
+def worker_alive() -> bool:
+    """True if some worker has sent a heartbeat recently."""
+    with _connect() as conn:
+        row = conn.execute("SELECT MAX(heartbeat_at) AS last FROM sync_workers WHERE worker_id NOT LIKE ?", (f"{PAGE_RUNNER_PREFIX}%",)).fetchone()
+    return bool(row and row["last"] and time.time() - row["last"] < SYNC_WORKER_STALE_SECONDS)
+
+def requeue_orphaned_jobs() -> int:
+    """Put running jobs whose worker or page runner stopped sending heartbeats back on the queue."""
+    with _connect(immediate=True) as conn:
+        return _requeue_orphaned(conn)
+
+def ensure_worker_running() -> bool:
+    """Start a background worker process unless one is already alive; returns True if one was started."""
+    if worker_alive():
+        return False
+    log_path = os.path.join(os.path.dirname(SYNC_JOBS_DB) or ".", "sync_worker.log")
+    with open(log_path, "a") as log_file:
+        subprocess.Popen(
+            [sys.executable, WORKER_SCRIPT],
+            cwd=os.path.dirname(WORKER_SCRIPT),
+            stdout=log_file,
+            stderr=subprocess.STDOUT,
+            start_new_session=True
+        )
+    logger.info(f"Started background sync worker (log: {log_path})")
+    return True
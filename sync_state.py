@@ -0,0 +1,170 @@
+import json
+import logging
+import os
+import re
+import tempfile
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional
+from config import SYNC_STATE_DIR, SYNC_STATE_MAX_BOOKINGS
+
+# Set up logging for debugging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class SyncWatermark:
+    """Per-property sync state: a fingerprint of the summary text of every processed booking card, keyed per room."""
+
+    def __init__(self, hotel_id: str, summary_hashes: Optional[Dict[str, str]] = None, last_synced_at: Optional[str] = None):
+        self.hotel_id = hotel_id
+        self.summary_hashes = summary_hashes or {}
+        self.last_synced_at = last_synced_at
+        self._pending: Dict[str, str] = {}  # Seen this run, promoted by commit() once stored
+
+    @staticmethod
+    def path_for(hotel_id: str) -> str:
+        return os.path.join(SYNC_STATE_DIR, f"watermark_{hotel_id}.json")
+
+    @classmethod
+    def load(cls, hotel_id: str) -> "SyncWatermark":
+        """Load the stored watermark, or an empty one if none exists or it is unreadable."""
+        try:
+            with open(cls.path_for(hotel_id), encoding="utf-8") as f:
+                data = json.load(f)
+            return cls(hotel_id, data.get("summary_hashes", {}), data.get("last_synced_at"))
+        except FileNotFoundError:
+            return cls(hotel_id)
+        except Exception as e:
+            logger.warning(f"Could not read sync watermark for hotel {hotel_id}, starting fresh: {str(e)}")
+            return cls(hotel_id)
+
+    def save(self) -> None:
+        """Atomically write the watermark, keeping only the most recent bookings."""
+        os.makedirs(SYNC_STATE_DIR, exist_ok=True)
+        if len(self.summary_hashes) > SYNC_STATE_MAX_BOOKINGS:
+            newest = sorted(self.summary_hashes, key=booking_number, reverse=True)[:SYNC_STATE_MAX_BOOKINGS]
+            self.summary_hashes = {booking_id: self.summary_hashes[booking_id] for booking_id in newest}
+        self.last_synced_at = datetime.now().isoformat()
+        data = {
+            "hotel_id": self.hotel_id,
+            "last_synced_at": self.last_synced_at,
+            "summary_hashes": self.summary_hashes
+        }
+        write_json_atomic(self.path_for(self.hotel_id), data)
+        logger.info(f"Saved sync watermark for hotel {self.hotel_id}: {len(self.summary_hashes)} bookings")
+
+    def is_unchanged(self, booking_id: str, summary_hash: str) -> bool:
+        """True if this booking was already processed with the same summary text."""
+        return self.summary_hashes.get(booking_id) == summary_hash
+
+    def mark_seen(self, booking_id: str, summary_hash: str) -> None:
+        """Record a processed booking; it only counts as known after commit()."""
+        self._pending[booking_id] = summary_hash
+
+    def commit(self, booking_ids: Optional[Iterable[str]] = None) -> None:
+        """Promote this run's processed bookings once they have been stored; all of them unless booking_ids is given."""
+        for booking_id in list(self._pending if booking_ids is None else booking_ids):
+            summary_hash = self._pending.pop(booking_id, None)
+            if summary_hash is None:
+                continue
+            self.summary_hashes[booking_id] = summary_hash
+
+    def discard_pending(self) -> None:
+        """Forget this run's processed bookings, e.g. after the scrape failed."""
+        self._pending.clear()
+
+class ScrapeCheckpoint:
+    """Progress of the current day's scrape of one property, so a crashed run can resume where it stopped.
+
+    Holds the card texts captured in the first pass and the cards (by card key) whose folios have been
+    read and stored. Only a run that did not finish is resumed; a checkpoint from an earlier day is ignored.
+    """
+
+    def __init__(self, hotel_id: str, day: Optional[str] = None, booking_texts: Optional[List[str]] = None, completed: Optional[List[str]] = None,
+                 finished: bool = False):
+        self.hotel_id = hotel_id
+        self.day = day or date.today().isoformat()
+        self.booking_texts = booking_texts or []
+        self.completed = set(completed or [])
+        self.finished = finished  # Set by the scraper once every card of the run has been processed
+
+    @staticmethod
+    def path_for(hotel_id: str) -> str:
+        return os.path.join(SYNC_STATE_DIR, f"checkpoint_{hotel_id}.json")
+
+    @classmethod
+    def load(cls, hotel_id: str) -> "ScrapeCheckpoint":
+        """Load today's checkpoint, or an empty one if there is none."""
+        try:
+            with open(cls.path_for(hotel_id), encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cls(hotel_id)
+        except Exception as e:
+            logger.warning(f"Could not read scrape checkpoint for hotel {hotel_id}, starting fresh: {str(e)}")
+            return cls(hotel_id)
+        if data.get("day") != date.today().isoformat():
+            return cls(hotel_id)
+        return cls(hotel_id, data["day"], data.get("booking_texts"), data.get("completed"), data.get("finished", False))
+
+    @property
+    def resumable(self) -> bool:
+        """True if an earlier run captured the card texts but stopped before processing every card."""
+        return bool(self.booking_texts) and not self.finished
+
+    def set_texts(self, booking_texts: List[str]) -> None:
+        """Record the first-pass card texts of a new run and persist them."""
+        self.booking_texts = list(booking_texts)
+        self.completed.clear()
+        self.finished = False
+        self.save()
+
+    def is_completed(self, card_key: str) -> bool:
+        return card_key in self.completed
+
+    def mark_completed(self, card_keys: Iterable[str]) -> None:
+        """Record cards whose folios have been read and stored, and persist the checkpoint."""
+        before = len(self.completed)
+        self.completed.update(card_keys)
+        if len(self.completed) != before:
+            self.save()
+
+    def mark_finished(self) -> None:
+        """Record that every card of this run has been processed, so the checkpoint is not resumed."""
+        self.finished = True
+        self.save()
+
+    def save(self) -> None:
+        """Persist the checkpoint; failures are only logged since the checkpoint is an optimisation."""
+        try:
+            os.makedirs(SYNC_STATE_DIR, exist_ok=True)
+            write_json_atomic(self.path_for(self.hotel_id), {
+                "hotel_id": self.hotel_id,
+                "day": self.day,
+                "booking_texts": self.booking_texts,
+                "completed": sorted(self.completed),
+                "finished": self.finished
+            })
+        except Exception as e:
+            logger.warning(f"Could not save scrape checkpoint for hotel {self.hotel_id}: {str(e)}")
+
+    def clear(self) -> None:
+        """Remove the checkpoint once the property has been scraped completely."""
+        self.booking_texts = []
+        self.completed.clear()
+        self.finished = False
+        try:
+            os.remove(self.path_for(self.hotel_id))
+        except FileNotFoundError:
+            pass
+
+def write_json_atomic(path: str, data: Dict) -> None:
+    """Write JSON through a temporary file and rename it into place, so readers never see a partial file."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f".{os.path.basename(path)}_")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+def booking_number(booking_id: str) -> int:
+    """Trailing sequence number of an SFBOOKING_{hotel}_{n} ID or SFBOOKING_{hotel}_{n}_room_{room} card key (0 if absent)."""
+    match = re.search(r'_(\d+)$', (booking_id or "").split("_room_")[0])
+    return int(match.group(1)) if match else 0
@@ -0,0 +1,182 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+from config import SYNC_TRACE_LOG, SYNC_TRACE_MAX_RUNS
+
+# Set up logging for debugging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Stages recorded by the OTA sync; page waits are added as "wait.<step>". Stages may nest
+# (folio_direct includes its folio_extract and waits), so their totals are not additive.
+STAGE_BROWSER_SETUP = "browser_setup"
+STAGE_LOGIN = "login"
+STAGE_DASHBOARD = "dashboard"
+STAGE_LIST_CAPTURE = "list_capture"
+STAGE_FOLIO_PLAN = "folio_plan"
+STAGE_FOLIO_HTTP = "folio_http"
+STAGE_FOLIO_TAB = "folio_tab"
+STAGE_FOLIO_DIRECT = "folio_direct"
+STAGE_FOLIO_EXTRACT = "folio_extract"
+STAGE_SUPABASE_FINGERPRINTS = "supabase_fingerprints"
+STAGE_SUPABASE_PREFETCH = "supabase_prefetch"
+STAGE_SUPABASE_UPSERT = "supabase_upsert"
+STAGE_SUPABASE_INSERT_ROW = "supabase_insert_row"
+STAGE_SUPABASE_UPDATE = "supabase_update"
+
+# The log is rewritten with only the newest runs once it grows past this size
+_LOG_TRIM_BYTES = 2 * 1024 * 1024
+
+_local = threading.local()
+_lock = threading.Lock()
+_active: Dict[str, "SyncTrace"] = {}
+
+class SyncTrace:
+    """Stage timings of one property sync run."""
+
+    def __init__(self, property_name: str, hotel_id: str):
+        self.property_name = property_name
+        self.hotel_id = hotel_id
+        self.run_id = f"{hotel_id}-{int(time.time() * 1000)}"
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self.status = "running"
+        self.elapsed: Optional[float] = None
+        self.summary: Dict[str, int] = {}
+        self.error: Optional[str] = None
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            timing = self.stages.setdefault(stage, {"count": 0, "total": 0.0, "max": 0.0})
+            timing["count"] += 1
+            timing["total"] += seconds
+            timing["max"] = max(timing["max"], seconds)
+
+    def finish(self, status: str, error: Optional[str] = None) -> None:
+        self.status = status
+        self.error = error
+        self.elapsed = round(time.monotonic() - self._start, 3)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            stages = {stage: {"count": t["count"], "total": round(t["total"], 3), "max": round(t["max"], 3)} for stage, t in self.stages.items()}
+        return {
+            "run_id": self.run_id,
+            "property": self.property_name,
+            "hotel_id": self.hotel_id,
+            "started_at": self.started_at,
+            "status": self.status,
+            "elapsed": self.elapsed if self.elapsed is not None else round(time.monotonic() - self._start, 3),
+            "summary": self.summary,
+            "error": self.error,
+            "stages": stages
+        }
+
+def current_trace() -> Optional[SyncTrace]:
+    """The trace of the property sync running on this thread, if any."""
+    return getattr(_local, "trace", None)
+
+@contextmanager
+def trace_property(property_name: str, hotel_id: str) -> Iterator[SyncTrace]:
+    """Collect the stage timings recorded on this thread into a new trace, saved to the log when the run ends."""
+    trace = SyncTrace(property_name, hotel_id)
+    previous = current_trace()
+    _local.trace = trace
+    with _lock:
+        _active[trace.run_id] = trace
+    try:
+        yield trace
+        trace.finish("failed" if trace.summary.get("errors") else "done")
+    except BaseException as e:
+        trace.finish("failed", str(e))
+        raise
+    finally:
+        _local.trace = previous
+        with _lock:
+            _active.pop(trace.run_id, None)
+        _save_run(trace.to_dict())
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time a block as one occurrence of stage in the current trace (a no-op outside a traced sync)."""
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        record(stage, time.monotonic() - start)
+
+def record(stage: str, seconds: float) -> None:
+    """Add an already measured duration to the current trace."""
+    trace = current_trace()
+    if trace is not None:
+        trace.record(stage, seconds)
+
+def active_runs() -> List[Dict]:
+    """Runs of this process that have not finished yet."""
+    with _lock:
+        traces = list(_active.values())
+    return [trace.to_dict() for trace in traces]
+
+def _save_run(run: Dict) -> None:
+    """Append a finished run to the trace log, keeping only the newest runs once the log grows large."""
+    try:
+        os.makedirs(os.path.dirname(SYNC_TRACE_LOG), exist_ok=True)
+        with _lock:
+            with open(SYNC_TRACE_LOG, "a", encoding="utf-8") as f:
+                f.write(json.dumps(run) + "\n")
+            if os.path.getsize(SYNC_TRACE_LOG) > _LOG_TRIM_BYTES:
+                runs = load_runs()
+                tmp_path = f"{SYNC_TRACE_LOG}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.writelines(json.dumps(kept) + "\n" for kept in runs)
+                os.replace(tmp_path, SYNC_TRACE_LOG)
+    except Exception as e:
+        logger.warning(f"Could not save sync trace for {run.get('property')}: {str(e)}")
+
+def load_runs(limit: int = SYNC_TRACE_MAX_RUNS) -> List[Dict]:
+    """The newest finished runs from the trace log (written by every process), oldest first."""
+    if not os.path.exists(SYNC_TRACE_LOG):
+        return []
+    runs = []
+    with open(SYNC_TRACE_LOG, encoding="utf-8") as f:
+        for line in f:
+            try:
+                runs.append(json.loads(line))
+            except ValueError:
+                continue  # A line cut short by a crash
+    return runs[-limit:]
+
+def aggregate_by_property(runs: List[Dict]) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Stage timings summed over runs per property: {property: {stage: {runs, count, total, max, mean_per_run}}}.
+
+    The "run" stage is the whole sync of each run.
+    """
+    totals: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for run in runs:
+        property_stages = totals.setdefault(run["property"], {})
+        for stage, timing in dict(run["stages"], run={"count": 1, "total": run.get("elapsed") or 0.0, "max": run.get("elapsed") or 0.0}).items():
+            aggregate = property_stages.setdefault(stage, {"runs": 0, "count": 0, "total": 0.0, "max": 0.0})
+            aggregate["runs"] += 1
+            aggregate["count"] += timing["count"]
+            aggregate["total"] += timing["total"]
+            aggregate["max"] = max(aggregate["max"], timing["max"])
+    for property_stages in totals.values():
+        for aggregate in property_stages.values():
+            aggregate["total"] = round(aggregate["total"], 3)
+            aggregate["mean_per_run"] = round(aggregate["total"] / aggregate["runs"], 3)
+    return totals
+
+def export_json(runs: List[Dict]) -> str:
+    """JSON document with the given runs and their per-property aggregates."""
+    return json.dumps({
+        "exported_at": datetime.now().isoformat(timespec="seconds"),
+        "runs": runs,
+        "by_property": aggregate_by_property(runs)
+    }, indent=2)
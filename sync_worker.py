@@ -0,0 +1,77 @@
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Tuple
+from config import METRICS_HOST, METRICS_WORKER_FILE, METRICS_WORKER_PORT, SYNC_MAX_WORKERS, SYNC_PROPERTY_TIMEOUT, SYNC_WORKER_POLL_SECONDS
+from metrics import start_metrics_exporter
+from sync_engine import STATUS_FAILED, STATUS_TIMED_OUT, STATUS_CANCELLED, summary_status
+from sync_jobs import claim_next_job, finish_job, is_cancel_requested, record_worker_heartbeat, requeue_orphaned_jobs
+
+# Set up logging for debugging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def run_worker(max_jobs: int = SYNC_MAX_WORKERS, poll_interval: float = SYNC_WORKER_POLL_SECONDS, once: bool = False) -> None:
+    """Claim queued sync jobs and run up to max_jobs of them concurrently, outside any Streamlit script run.
+
+    With once=True the worker exits as soon as the queue is empty and its jobs have finished.
+    """
+    # Imported here so the job queue can be used without loading Selenium
+    from online_reservation import fetch_for_property
+
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    executor = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="sync-job")
+    running: Dict[int, Tuple[Future, threading.Event, float, Dict]] = {}
+    abandoned = set()  # Timed-out futures still holding a thread
+    record_worker_heartbeat(worker_id)
+    requeue_orphaned_jobs()
+    start_metrics_exporter(METRICS_WORKER_PORT, METRICS_WORKER_FILE, METRICS_HOST)
+    logger.info(f"Sync worker {worker_id} started with {max_jobs} slots")
+
+    while True:
+        record_worker_heartbeat(worker_id)
+        requeue_orphaned_jobs()  # Jobs of a stopped worker or app process go back on the queue
+        abandoned = {future for future in abandoned if not future.done()}
+
+        for job_id, (future, cancel_event, started, job) in list(running.items()):
+            if future.done():
+                del running[job_id]
+                error = future.exception()
+                if error is not None:
+                    finish_job(job_id, STATUS_FAILED, error=str(error))
+                elif cancel_event.is_set():
+                    finish_job(job_id, STATUS_CANCELLED, result=future.result())
+                else:
+                    finish_job(job_id, summary_status(future.result()), result=future.result())
+            elif time.monotonic() - started > SYNC_PROPERTY_TIMEOUT:
+                cancel_event.set()
+                del running[job_id]
+                abandoned.add(future)
+                finish_job(job_id, STATUS_TIMED_OUT, error=f"Exceeded {SYNC_PROPERTY_TIMEOUT}s")
+            elif is_cancel_requested(job_id):
+                cancel_event.set()
+
+        while len(running) + len(abandoned) < max_jobs:
+            job = claim_next_job(worker_id)
+            if job is None:
+                break
+            cancel_event = threading.Event()
+            future = executor.submit(
+                fetch_for_property, job["property_name"], job["hotel_id"],
+                cancel_event=cancel_event, full_resync=job["full_resync"]
+            )
+            running[job["id"]] = (future, cancel_event, time.monotonic(), job)
+            logger.info(f"Worker {worker_id} started job {job['id']} for {job['property_name']}")
+
+        if once and not running:
+            break
+        time.sleep(poll_interval)
+
+    executor.shutdown(wait=False)
+    logger.info(f"Sync worker {worker_id} stopped")
+
+if __name__ == "__main__":
+    run_worker()
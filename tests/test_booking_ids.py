@@ -0,0 +1,41 @@
+import threading
+
+from booking_ids import BookingIdAllocator, SQLiteCounterBackend, format_booking_id
+
+def allocate_concurrently(allocators, ids_per_thread, day="20250101"):
+    """Draw IDs from each allocator on its own thread, all threads starting together."""
+    barrier = threading.Barrier(len(allocators))
+    results = [[] for _ in allocators]
+
+    def draw(index, allocator):
+        barrier.wait()
+        for _ in range(ids_per_thread):
+            results[index].append(allocator.next_id("TIE", day))
+
+    threads = [threading.Thread(target=draw, args=(i, allocator)) for i, allocator in enumerate(allocators)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return [booking_id for ids in results for booking_id in ids]
+
+def test_threads_sharing_an_allocator_get_unique_ids():
+    allocator = BookingIdAllocator(SQLiteCounterBackend())
+    ids = allocate_concurrently([allocator] * 5, 20)
+    assert len(ids) == 100
+    assert sorted(ids) == [format_booking_id("TIE", "20250101", n) for n in range(1, 101)]
+
+def test_processes_sharing_a_counter_get_unique_ids(tmp_path):
+    # One backend connection and allocator per simulated process, with block reservation
+    path = str(tmp_path / "counters.db")
+    allocators = [BookingIdAllocator(SQLiteCounterBackend(path), block_size=3) for _ in range(5)]
+    ids = allocate_concurrently(allocators, 20)
+    assert len(ids) == 100
+    assert len(set(ids)) == 100
+
+def test_counters_are_per_prefix_and_day():
+    allocator = BookingIdAllocator(SQLiteCounterBackend())
+    assert allocator.next_id("TIE", "20250101") == "TIE20250101001"
+    assert allocator.next_id("SFX", "20250101") == "SFX20250101001"
+    assert allocator.next_id("TIE", "20250102") == "TIE20250102001"
+    assert allocator.next_id("TIE", "20250101") == "TIE20250101002"
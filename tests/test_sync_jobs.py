@@ -0,0 +1,57 @@
+import sqlite3
+import time
+
+import pytest
+
+pytest.importorskip("streamlit")  # sync_jobs shares its statuses with sync_engine
+
+import sync_jobs
+from sync_engine import STATUS_CANCELLED, STATUS_DONE, STATUS_RUNNING
+
+SUMMARY = {"stored": 1, "updated": 0, "skipped": 0, "errors": 0}
+
+@pytest.fixture(autouse=True)
+def job_db(tmp_path, monkeypatch):
+    path = str(tmp_path / "sync_jobs.db")
+    monkeypatch.setattr(sync_jobs, "SYNC_JOBS_DB", path)
+    return path
+
+def start_dead_page_job(job_db, hotel_id="1"):
+    """A page runner claims a job and its process dies: the heartbeat stops and the job stays running."""
+    runner_id = "page-gone-4242"
+    sync_jobs.record_worker_heartbeat(runner_id)
+    job_id, created = sync_jobs.enqueue_sync_job("Hotel", hotel_id, claim_as=runner_id)
+    assert created
+    stale = time.time() - sync_jobs.SYNC_WORKER_STALE_SECONDS - 1
+    with sqlite3.connect(job_db) as conn:
+        conn.execute("UPDATE sync_workers SET heartbeat_at = ? WHERE worker_id = ?", (stale, runner_id))
+    return job_id
+
+def test_live_page_runner_keeps_its_hotel():
+    sync_jobs.record_worker_heartbeat("page-alive-1")
+    job_id, _ = sync_jobs.enqueue_sync_job("Hotel", "1", claim_as="page-alive-1")
+    assert sync_jobs.enqueue_sync_job("Hotel", "1") == (job_id, False)
+    assert sync_jobs.claim_next_job("worker-1") is None
+
+def test_hotel_of_a_dead_page_runner_can_be_synced_again(job_db):
+    job_id = start_dead_page_job(job_db)
+    calls = []
+
+    def sync(property_name, hotel_id, cancel_event=None, full_resync=False):
+        calls.append(hotel_id)
+        return dict(SUMMARY)
+
+    assert sync_jobs.run_sync_job("Hotel", "1", sync) == SUMMARY
+    assert calls == ["1"]
+    assert sync_jobs.get_job(job_id)["status"] == STATUS_DONE
+
+def test_worker_takes_over_the_job_of_a_dead_page_runner(job_db):
+    job_id = start_dead_page_job(job_db)
+    job = sync_jobs.claim_next_job("worker-1")
+    assert job["id"] == job_id
+    assert sync_jobs.get_job(job_id)["status"] == STATUS_RUNNING
+
+def test_cancel_of_a_job_whose_runner_died(job_db):
+    job_id = start_dead_page_job(job_db)
+    sync_jobs.request_cancel(job_id)
+    assert sync_jobs.get_job(job_id)["status"] == STATUS_CANCELLED
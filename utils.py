@@ -1,7 +1,9 @@
-from datetime import datetime
+import hashlib
+import re
 import streamlit as st
 import requests
 import logging
+from booking_ids import BOOKING_ID_PREFIXES, get_booking_id_allocator
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -22,6 +24,11 @@ def safe_float(value, default=0.0):
         logger.error(f"safe_float error: {e}, value: {value}")
         return default
 
+def text_fingerprint(text):
+    """Stable SHA-1 fingerprint of text, insensitive to whitespace differences."""
+    normalized = re.sub(r"\s+", " ", text or "").strip()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
 def calculate_days(check_in, check_out):
     """Calculate number of days between check-in and check-out."""
     try:
@@ -34,16 +41,13 @@ def calculate_days(check_in, check_out):
         return 0
 
 def generate_booking_id(supabase, table_name="reservations"):
-    """Generate a unique booking ID for the specified table (e.g., 'reservations' for direct, 'otabooking' for OTA)."""
+    """Generate a unique booking ID for the specified table (e.g., 'reservations' for direct, 'otabooking' for OTA).
+
+    IDs come from an atomic server-side counter (see booking_ids.py), so concurrent submissions never collide.
+    """
     try:
-        today = datetime.now().strftime('%Y%m%d')
-        prefix = "SFX" if table_name == "otabooking" else "TIE"
-        response = supabase.table(table_name).select("booking_id").like("booking_id", f"{prefix}{today}%").execute()
-        existing_ids = [record["booking_id"] for record in response.data]
-        sequence = 1
-        while f"{prefix}{today}{sequence:03d}" in existing_ids:
-            sequence += 1
-        booking_id = f"{prefix}{today}{sequence:03d}"
+        prefix = BOOKING_ID_PREFIXES.get(table_name, "TIE")
+        booking_id = get_booking_id_allocator(supabase).next_id(prefix)
         logger.info(f"Generated booking ID: {booking_id} for table: {table_name}")
         return booking_id
     except Exception as e:
@@ -51,22 +55,25 @@ def generate_booking_id(supabase, table_name="reservations"):
         logger.error(f"generate_booking_id error: {e}, table: {table_name}")
         return None
 
-def check_duplicate_guest(supabase, table_name, guest_name, guest_phone, room_no, exclude_booking_id=None):
-    """Check for duplicate guest in the specified table (e.g., 'reservations' for direct, 'otabooking' for OTA)."""
-    try:
-        response = supabase.table(table_name).select("*").execute()
-        for reservation in response.data:
-            if exclude_booking_id and reservation["booking_id"] == exclude_booking_id:
+def guest_key(guest_name, guest_phone, room_no):
+    """Normalized (name, phone, room) key used for duplicate-guest detection."""
+    return ((guest_name or "").strip().lower(), (guest_phone or "").strip(), str(room_no or "").strip())
+
+class GuestIndex:
+    """In-process set of guest keys, built once per sync run so duplicate checks need no queries."""
+
+    def __init__(self):
+        self._bookings = {}
+
+    def add(self, guest_name, guest_phone, room_no, booking_id):
+        self._bookings.setdefault(guest_key(guest_name, guest_phone, room_no), set()).add(booking_id)
+
+    def find(self, guest_name, guest_phone, room_no, exclude_booking_id=None):
+        """Return (is_duplicate, booking_id) of another booking with the same guest key."""
+        for booking_id in sorted(self._bookings.get(guest_key(guest_name, guest_phone, room_no), ())):
+            if exclude_booking_id and booking_id == exclude_booking_id:
                 continue
-            if (reservation["guest_name"].lower() == guest_name.lower() and
-                reservation.get("guest_phone") == guest_phone and
-                reservation.get("room_no") == room_no):
-                logger.info(f"Duplicate guest found in {table_name}: {guest_name}, {guest_phone}, {room_no}")
-                return True, reservation["booking_id"]
-        return False, None
-    except Exception as e:
-        st.error(f"Error checking duplicate guest in {table_name}: {e}")
-        logger.error(f"check_duplicate_guest error: {e}, table: {table_name}, guest: {guest_name}")
+            return True, booking_id
         return False, None
 
 def get_property_name(hotel_id):